@@ -1,19 +1,152 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import Dict
+from typing import Any, Dict, List, Optional
 import numpy as np
-import pandas as pd
-import tensorflow as tf
-import json
-from preprocessors.data_preprocessor import DataPreprocessor
-from scalers.scaler import DataScaler
-from models.ann_model import ANNModel
-from dataset.constants import MODEL_SAVE_PATH, VAL_LOGITS_PATH, VAL_LABELS_PATH
-from logger import setup_logger
+import os
+from utils.loaders import load_serving_artifacts
+from utils.prediction_cache import PredictionCache
+from utils.micro_batcher import MicroBatcher
+from utils.audit_log import AuditLog, CODES, PROPERTIES
+from utils.metrics import ServingMetrics, MetricsMiddleware
+from utils.versions import artifact_path, current_version, current_version_dir
+from utils.sensitivity import perturbation_codes, analyze_perturbations
+from utils import columnar
+from preprocessors.clustering import column_cluster_codes
+from preprocessors.type_costs import STATISTICS as COST_STATISTICS, RANKINGS
+from dataset.constants import (
+    PROPERTY_COLUMNS, MAX_BATCH_SIZE, PREDICTION_CACHE_SIZE, PRECOMPUTE_PREDICTIONS,
+    TRAINING_CLUSTERS_PATH, MICRO_BATCHING, MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS,
+    MODEL_VERSIONS_DIR, MODEL_RELOAD_INTERVAL_S, METRICS_ENABLED, RECOMMEND_TOP_K, COLUMNAR_MAX_ROWS,
+    SIMILAR_MAX_K, AUDIT_LOG, UNCERTAINTY, UNCERTAINTY_REVIEW_THRESHOLD
+)
+from logger import setup_logger, sampled
+
+# Per-process pipeline metrics served on /metrics (None when disabled)
+metrics = ServingMetrics() if METRICS_ENABLED else None
+stage_observer = metrics.observe_stage if metrics is not None else None
+
+
+def record_stage(stage, start):
+    """Record the time since `start` for a pipeline stage."""
+    if metrics is not None:
+        metrics.observe_stage(stage, time.perf_counter() - start)
+
+
+def count_predictions(class_names, class_indices):
+    if metrics is not None:
+        metrics.count_predictions(class_names, class_indices)
+
+
+def audit(request, artifacts, input_kind, inputs, probabilities=None, top1=None):
+    """Queue served predictions for the audit log, if enabled; never blocks the request."""
+    audit_log = request.app.state.audit_log
+    if audit_log is not None:
+        audit_log.submit(
+            request.url.path, artifacts.version, artifacts.class_names, input_kind, inputs, probabilities, top1
+        )
+
+
+def precompute_predictions(artifacts):
+    """Score every cluster combination seen in training in one batch; return (keys, predictions)."""
+    path = artifact_path(TRAINING_CLUSTERS_PATH, artifacts.directory)
+    if not os.path.exists(path):
+        return [], []
+    X_input = artifacts.feature_schema.encode_codes(np.load(path))
+    predictions = artifacts.predict_probabilities(X_input)
+    keys = [tuple(np.flatnonzero(row).tolist()) for row in X_input]
+    return keys, predictions
+
+
+async def reload_artifacts(app, version_dir):
+    """Load a published version off the event loop, then swap it in.
+
+    The swap is a single reference assignment: requests already running keep
+    the artifacts they started with, new requests see the new version.
+    """
+    start = time.perf_counter()
+    artifacts = await asyncio.to_thread(load_serving_artifacts, directory=version_dir)
+    if PRECOMPUTE_PREDICTIONS:
+        keys, predictions = await asyncio.to_thread(precompute_predictions, artifacts)
+    loaded = time.perf_counter()
 
+    previous_version = app.state.artifacts.version
+    app.state.artifacts = artifacts
+    app.state.prediction_cache.reset(artifacts.version)
+    if PRECOMPUTE_PREDICTIONS:
+        app.state.prediction_cache.preload(artifacts.version, keys, predictions)
 
-app = FastAPI()
+    app.state.reloads.append({
+        "from_version": previous_version,
+        "to_version": artifacts.version,
+        "load_ms": (loaded - start) * 1000,
+        "swap_ms": (time.perf_counter() - loaded) * 1000,
+        "swapped_at": time.time()
+    })
+    logger.info("Swapped model version", extra={"fields": app.state.reloads[-1]})
+
+
+async def watch_for_new_versions(app):
+    """Poll the LATEST pointer and hot-swap newly published versions in the background."""
+    failed_version = None
+    while True:
+        await asyncio.sleep(MODEL_RELOAD_INTERVAL_S)
+        version = current_version(MODEL_VERSIONS_DIR)
+        if version is None or version in (app.state.artifacts.version, failed_version):
+            continue
+        try:
+            await reload_artifacts(app, os.path.join(MODEL_VERSIONS_DIR, version))
+        except Exception:
+            # Keep serving the current version; retry only once a different version is published
+            failed_version = version
+            logger.exception("Failed to load model version", extra={"fields": {"version": version}})
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Load the published model version (or the top-level artifacts) once per worker
+    app.state.artifacts = load_serving_artifacts(directory=current_version_dir(MODEL_VERSIONS_DIR))
+    app.state.prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE)
+    if PRECOMPUTE_PREDICTIONS:
+        app.state.prediction_cache.preload(app.state.artifacts.version, *precompute_predictions(app.state.artifacts))
+    app.state.reloads = []
+
+    # Optionally coalesce concurrent /predict calls into batched forward passes
+    app.state.batcher = None
+    if MICRO_BATCHING:
+        app.state.batcher = MicroBatcher(
+            lambda X, artifacts: artifacts.predict_probabilities(X, stage_observer),
+            max_batch_size=MICRO_BATCH_MAX_SIZE,
+            max_wait_ms=MICRO_BATCH_MAX_WAIT_MS
+        )
+        await app.state.batcher.start()
+
+    # Optionally record every served prediction; written to SQLite off the request path
+    app.state.audit_log = None
+    if AUDIT_LOG:
+        app.state.audit_log = AuditLog()
+        app.state.audit_log.start()
+
+    # Pick up new versions written by finetune.py without restarting
+    watcher = None
+    if MODEL_RELOAD_INTERVAL_S > 0:
+        watcher = asyncio.create_task(watch_for_new_versions(app))
+    yield
+    if watcher is not None:
+        watcher.cancel()
+    if app.state.batcher is not None:
+        await app.state.batcher.stop()
+    if app.state.audit_log is not None:
+        # Flush queued records before the worker exits
+        await asyncio.to_thread(app.state.audit_log.stop)
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,28 +155,12 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if metrics is not None:
+    app.add_middleware(MetricsMiddleware, metrics=metrics)
 
 # Set up logger
 logger = setup_logger()
 
-# Initialize components
-preprocessor = DataPreprocessor()
-scaler = DataScaler()
-
-# Preprocess data first to fit encoder
-X_train, _, _, _, _, _ = preprocessor.preprocess()
-scaler.fit(X_train)
-
-num_classes = len(preprocessor.get_class_names())
-ann_model = ANNModel(input_dim=9, num_classes=num_classes)
-ann_model.load_model(MODEL_SAVE_PATH)
-
-# Load validation data for Platt scaling
-val_logits = np.load(VAL_LOGITS_PATH)
-val_labels = np.load(VAL_LABELS_PATH)
-
-class_names = preprocessor.get_class_names()
-
 # Brief descriptions for each type (you can expand these)
 descriptions = {
     'Recycled PET Nonwoven': 'Recycled PET Nonwoven is a nonwoven geotextile made from recycled PET, offering good filtration and cost-effectiveness.',
@@ -59,63 +176,687 @@ descriptions = {
 
 class PredictionRequest(BaseModel):
     clusters: Dict[str, str]
+    # Number of most similar catalog rows to return (needs GEOTEXTILE_SIMILARITY_INDEX=1)
+    similar: int = 0
+    # Monte Carlo dropout uncertainty; None follows GEOTEXTILE_UNCERTAINTY
+    uncertainty: Optional[bool] = None
+
+class BatchItem(BaseModel):
+    # Exactly one of: pre-clustered labels ("C1".."C5") or raw numeric properties
+    clusters: Optional[Dict[str, Any]] = None
+    properties: Optional[Dict[str, Any]] = None
+
+class BatchPredictionRequest(BaseModel):
+    items: List[BatchItem]
+    similar: int = 0
+    uncertainty: Optional[bool] = None
+
+class RecommendationRequest(BaseModel):
+    # Exactly one of: pre-clustered labels ("C1".."C5") or raw numeric properties
+    clusters: Optional[Dict[str, Any]] = None
+    properties: Optional[Dict[str, Any]] = None
+    top_k: int = RECOMMEND_TOP_K
+    # Calibrated probability threshold in percent, like "confidence"
+    min_probability: float = 0.0
+    # Budgets in PHP/m², compared against `cost_statistic` of each type's costs
+    max_material_cost: Optional[float] = None
+    max_installation_cost: Optional[float] = None
+    max_total_cost: Optional[float] = None
+    cost_statistic: str = "median"
+    # "probability" (most likely first) or "cost" (cheapest total cost first)
+    rank_by: str = "probability"
+
+class SensitivityRequest(BaseModel):
+    # Exactly one of: pre-clustered labels ("C1".."C5") or raw numeric properties
+    clusters: Optional[Dict[str, Any]] = None
+    properties: Optional[Dict[str, Any]] = None
+
+class PropertiesPredictionRequest(BaseModel):
+    # Raw property column names (dataset headers) and one row of values per material
+    columns: List[str]
+    values: List[List[float]]
+    similar: int = 0
+    uncertainty: Optional[bool] = None
+
+
+def validate_properties(properties):
+    """Return an error message for an invalid raw property dict, or None if it is valid."""
+    missing = [column for column in PROPERTY_COLUMNS if column not in properties]
+    if missing:
+        return f"Missing properties: {', '.join(missing)}"
+    unknown = [column for column in properties if column not in PROPERTY_COLUMNS]
+    if unknown:
+        return f"Unknown properties: {', '.join(unknown)}"
+    non_numeric = [
+        column for column, value in properties.items()
+        if isinstance(value, bool) or not isinstance(value, (int, float))
+    ]
+    if non_numeric:
+        return f"Non-numeric properties: {', '.join(non_numeric)}"
+    return None
+
+
+def check_similar(artifacts, k):
+    """Reject an invalid `similar` count, or one that cannot be served without the similarity index."""
+    if k == 0:
+        return
+    if not 0 < k <= SIMILAR_MAX_K:
+        raise HTTPException(status_code=422, detail=f"similar must be between 0 and {SIMILAR_MAX_K}")
+    if artifacts.similarity_index is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Similarity index not loaded; build it with python -m models.similarity_index and set GEOTEXTILE_SIMILARITY_INDEX=1"
+        )
+
+
+def cluster_codes(feature_schema, clusters_list):
+    """(n, 9) level codes of validated cluster dicts."""
+    return np.array([
+        [feature_schema.levels.index(clusters[column]) for column in feature_schema.cluster_columns]
+        for clusters in clusters_list
+    ], dtype=np.int64).reshape(-1, len(feature_schema.cluster_columns))
+
+
+def wants_uncertainty(requested):
+    """Whether a request's "uncertainty" field (None: server default) asks for uncertainty."""
+    return UNCERTAINTY if requested is None else requested
+
+
+def uncertainty_results(artifacts, X_input, requested):
+    """Per-row Monte Carlo dropout summary, or None when not requested (`requested` None: server default).
+
+    Mean probabilities are percentages aligned with class_names; entropy and
+    mutual information are in nats. "review" flags mutual information above
+    UNCERTAINTY_REVIEW_THRESHOLD, i.e. inputs the model has not learned well.
+    """
+    if not wants_uncertainty(requested):
+        return None
+    mean, total, mutual_information = artifacts.predict_uncertainty(X_input, observe=stage_observer)
+    return [
+        {
+            "mean_probabilities": row,
+            "predictive_entropy": round(h, 4),
+            "mutual_information": round(mi, 4),
+            "review": mi > UNCERTAINTY_REVIEW_THRESHOLD
+        }
+        for row, h, mi in zip(np.round(mean * 100, 2).tolist(), total.tolist(), mutual_information.tolist())
+    ]
+
+
+def format_batch_results(class_names, predictions):
+    """Per-row type, confidence and probability vector (percentages aligned with class_names)."""
+    predicted_class_idx = np.argmax(predictions, axis=1)
+    probabilities = np.round(predictions.astype(np.float64) * 100, 2).tolist()
+    return [
+        {
+            "predicted_type": str(class_names[class_idx]),
+            "confidence": row[class_idx],
+            "probabilities": row
+        }
+        for class_idx, row in zip(predicted_class_idx.tolist(), probabilities)
+    ]
 
 @app.get("/welcome")
 def welcome(request: Request):
     """
     Returns a welcome message
     """
-    logger.info(f"Request received: {request.method} {request.url.path}")
+    if sampled():
+        logger.info("Request received", extra={"fields": {"method": request.method, "path": request.url.path}})
     return {"message": "Welcome to the Geotextile Predictor API!"}
 
+@app.get("/cache/stats")
+def cache_stats(request: Request):
+    """
+    Returns hit/miss counters of the /predict result cache
+    """
+    return request.app.state.prediction_cache.stats()
+
+@app.get("/batcher/stats")
+def batcher_stats(request: Request):
+    """
+    Returns queue depth, batch-size histogram and wait times of the micro-batcher
+    """
+    batcher = request.app.state.batcher
+    return {"enabled": batcher is not None, **(batcher.stats() if batcher is not None else {})}
+
+@app.get("/audit/stats")
+def audit_stats(request: Request):
+    """
+    Returns queue depth and written / dropped record counters of the audit log
+    """
+    audit_log = request.app.state.audit_log
+    return {"enabled": audit_log is not None, **(audit_log.stats() if audit_log is not None else {})}
+
+@app.get("/model/version")
+def model_version(request: Request):
+    """
+    Returns the served model version and the history of hot reloads
+    """
+    return {"version": request.app.state.artifacts.version, "reloads": request.app.state.reloads}
+
+@app.get("/metrics")
+def prometheus_metrics(request: Request):
+    """
+    Returns per-stage latency histograms, request latency, predictions by type,
+    the served model version and process RSS in the Prometheus text format
+    """
+    if metrics is None:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (GEOTEXTILE_METRICS=0)")
+    state = request.app.state
+    return PlainTextResponse(
+        metrics.render(state.artifacts.version, state.prediction_cache.stats()),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+async def cluster_probabilities(app, artifacts, clusters):
+    """Calibrated probabilities for one cluster dict; returns (probabilities, source).
+
+    `source` is "table" (precomputed table), "cache" or "model" (live inference).
+    """
+    # Full-probability tables answer every valid cluster tuple with one mapped row read
+    table = artifacts.prediction_table
+    if table is not None and table.mode == "full":
+        start = time.perf_counter()
+        index = table.index(clusters)
+        if index is not None:
+            probabilities = table.probabilities(index)
+            record_stage("lookup", start)
+            return probabilities, "table"
+
+    cache = app.state.prediction_cache
+
+    # Identical encoded inputs share one cached result (dropped when the model changes)
+    cache_key = artifacts.feature_schema.cache_key(clusters)
+    probabilities = cache.get(artifacts.version, cache_key)
+    if probabilities is not None:
+        return probabilities, "cache"
+
+    # One-hot encode straight into the training feature layout (42 features)
+    start = time.perf_counter()
+    X_input = artifacts.feature_schema.encode(clusters)
+    record_stage("encode", start)
+
+    # Scale and predict with Platt scaling, batched with concurrent requests if enabled
+    batcher = app.state.batcher
+    if batcher is not None:
+        probabilities = await batcher.submit(X_input, artifacts)
+    else:
+        probabilities = (await run_in_threadpool(artifacts.predict_probabilities, X_input, stage_observer))[0]
+    cache.put(artifacts.version, cache_key, probabilities)
+    return probabilities, "model"
+
 @app.post("/predict")
-def predict(request: Request, request_data: PredictionRequest):
-    logger.info(f"Request received: {request.method} {request.url.path} with clusters: {request_data.clusters}")
-
-    # Convert input into DataFrame
-    df_input = pd.DataFrame([request_data.clusters])
-
-    # One-hot encode using same cluster columns
-    df_encoded = pd.get_dummies(df_input)
-
-    # Align to the training feature columns (42 features)
-    # Get the present columns from training preprocessing
-    from preprocessors.data_preprocessor import DataPreprocessor
-    p = DataPreprocessor()
-    p.load_data()
-    df = p.assign_clusters(p.df)
-    cluster_columns = ['Tensile Cluster', 'Puncture Cluster', 'Permittivity Cluster', 'Filtration Cluster', 'Recycled Cluster', 'Biobased Cluster', 'UV Cluster', 'Material Cost Cluster', 'Install Cost Cluster']
-    df_clusters = df[cluster_columns + ['Type']].copy()
-    df_train_encoded = pd.get_dummies(df_clusters, columns=cluster_columns)
-    train_columns = [col for col in df_train_encoded.columns if col != 'Type']
-
-    # Add missing columns as 0 and reorder to match training
-    for col in train_columns:
-        if col not in df_encoded.columns:
-            df_encoded[col] = 0
-    df_encoded = df_encoded[train_columns]
-
-    # Convert to numeric numpy array
-    X_input = df_encoded.to_numpy(dtype=np.float32)
-
-    # Scale the new data
-    new_data_scaled = scaler.transform(X_input)
-
-    # Predict with Platt scaling
-    predictions = ann_model.predict_with_platt_scaling(new_data_scaled, val_logits, val_labels)
-    predicted_class_idx = int(np.argmax(predictions, axis=1)[0])
-    confidence = float(np.max(predictions, axis=1)[0] * 100)
-
-    predicted_type = class_names[predicted_class_idx]
+async def predict(request: Request, request_data: PredictionRequest):
+    artifacts = request.app.state.artifacts
+    check_similar(artifacts, request_data.similar)
+    table = artifacts.prediction_table
+    start = time.perf_counter()
+    index = table.index(request_data.clusters) if table is not None else None
+    if index is not None:
+        # Precomputed top-1 (float16 confidence): no encoding or forward pass
+        predicted_class_idx, probability = table.top1(index)
+        record_stage("lookup", start)
+        confidence = probability * 100
+        source = "table"
+        audit(request, artifacts, CODES, [request_data.clusters], top1=([predicted_class_idx], [probability]))
+    else:
+        probabilities, source = await cluster_probabilities(request.app, artifacts, request_data.clusters)
+        predicted_class_idx = int(np.argmax(probabilities))
+        confidence = float(probabilities[predicted_class_idx] * 100)
+        audit(request, artifacts, CODES, [request_data.clusters], probabilities)
+
+    predicted_type = artifacts.class_names[predicted_class_idx]
     description = descriptions.get(predicted_type, "No description available")
 
-    logger.info(f"Predicted: {predicted_type}, Confidence: {confidence}")
-    return {
+    count_predictions(artifacts.class_names, predicted_class_idx)
+    if sampled():
+        logger.info("Prediction", extra={"fields": {
+            "path": request.url.path, "clusters": request_data.clusters, "predicted_type": predicted_type,
+            "confidence": confidence, "source": source, "version": artifacts.version
+        }})
+
+    content = {
         "predicted_type": str(predicted_type),
         "confidence": round(confidence, 2),
         "description": str(description)
     }
+    if wants_uncertainty(request_data.uncertainty):
+        X_input = artifacts.feature_schema.encode(request_data.clusters)
+        uncertainty = (await run_in_threadpool(uncertainty_results, artifacts, X_input, True))[0]
+        uncertainty["mean_probabilities"] = dict(
+            zip((str(name) for name in artifacts.class_names), uncertainty["mean_probabilities"])
+        )
+        content["uncertainty"] = uncertainty
+    if request_data.similar:
+        # /predict ignores unseen pairs; without a level for every column there is no point to search around
+        content["similar"] = []
+        if artifacts.feature_schema.validate(request_data.clusters) is None:
+            start = time.perf_counter()
+            similarity_index = artifacts.similarity_index
+            codes = cluster_codes(artifacts.feature_schema, [request_data.clusters])
+            content["similar"] = similarity_index.neighbors(*similarity_index.query_codes(codes, request_data.similar))[0]
+            record_stage("similar", start)
+
+    start = time.perf_counter()
+    response = JSONResponse(content)
+    record_stage("serialize", start)
+    return response
+
+@app.post("/recommend")
+async def recommend(request: Request, request_data: RecommendationRequest):
+    """
+    Returns the top-k types for one material from a single forward pass,
+    filtered by a probability threshold and cost budgets and ranked by
+    probability or cost, using per-type cost statistics loaded at startup
+    """
+    artifacts = request.app.state.artifacts
+    type_costs = artifacts.type_costs
+    if type_costs is None:
+        raise HTTPException(status_code=503, detail="Cost statistics not available; run train.py or python -m preprocessors.type_costs")
+    if (request_data.clusters is None) == (request_data.properties is None):
+        raise HTTPException(status_code=422, detail="Provide exactly one of 'clusters' or 'properties'")
+    if not 1 <= request_data.top_k <= len(artifacts.class_names):
+        raise HTTPException(status_code=422, detail=f"top_k must be between 1 and {len(artifacts.class_names)}")
+    if request_data.cost_statistic not in COST_STATISTICS:
+        raise HTTPException(status_code=422, detail=f"cost_statistic must be one of: {', '.join(COST_STATISTICS)}")
+    if request_data.rank_by not in RANKINGS:
+        raise HTTPException(status_code=422, detail=f"rank_by must be one of: {', '.join(RANKINGS)}")
+
+    if request_data.clusters is not None:
+        error = artifacts.feature_schema.validate(request_data.clusters)
+        if error is not None:
+            raise HTTPException(status_code=422, detail=error)
+        probabilities, source = await cluster_probabilities(request.app, artifacts, request_data.clusters)
+        audit(request, artifacts, CODES, [request_data.clusters], probabilities)
+    else:
+        error = validate_properties(request_data.properties)
+        if error is not None:
+            raise HTTPException(status_code=422, detail=error)
+        start = time.perf_counter()
+        values = [[request_data.properties[column] for column in PROPERTY_COLUMNS]]
+        X_input = artifacts.feature_schema.encode_properties(values)
+        record_stage("encode", start)
+        probabilities = (await run_in_threadpool(artifacts.predict_probabilities, X_input, stage_observer))[0]
+        source = "model"
+        audit(request, artifacts, PROPERTIES, values, probabilities)
+    count_predictions(artifacts.class_names, int(np.argmax(probabilities)))
+
+    statistic = request_data.cost_statistic
+    ranked, excluded = type_costs.recommend(
+        probabilities, request_data.top_k, request_data.min_probability / 100,
+        budgets={
+            "material": request_data.max_material_cost,
+            "installation": request_data.max_installation_cost,
+            "total": request_data.max_total_cost
+        },
+        statistic=statistic, rank_by=request_data.rank_by
+    )
+    costs = type_costs.lookup(ranked, statistic)
+    recommendations = [
+        {
+            "rank": rank + 1,
+            "type": str(artifacts.class_names[class_idx]),
+            "probability": round(float(probabilities[class_idx]) * 100, 2),
+            "material_cost": round(float(costs["material"][rank]), 2),
+            "installation_cost": round(float(costs["installation"][rank]), 2),
+            "total_cost": round(float(costs["total"][rank]), 2),
+            "description": descriptions.get(artifacts.class_names[class_idx], "No description available")
+        }
+        for rank, class_idx in enumerate(ranked.tolist())
+    ]
+    if sampled():
+        logger.info("Recommendation", extra={"fields": {
+            "path": request.url.path, "top_k": request_data.top_k, "returned": len(recommendations),
+            "excluded": excluded, "source": source, "version": artifacts.version
+        }})
+
+    start = time.perf_counter()
+    response = JSONResponse({
+        "recommendations": recommendations,
+        "excluded": excluded,
+        "cost_statistic": statistic,
+        "rank_by": request_data.rank_by
+    })
+    record_stage("serialize", start)
+    return response
+
+@app.post("/predict/sensitivity")
+def predict_sensitivity(request: Request, request_data: SensitivityRequest):
+    """
+    Returns how the prediction changes under every single-feature level change
+    (9 features x 4 alternative levels) and the smallest change that flips the
+    predicted type. The input and all perturbations are scored in one batch.
+    """
+    artifacts = request.app.state.artifacts
+    feature_schema = artifacts.feature_schema
+    if (request_data.clusters is None) == (request_data.properties is None):
+        raise HTTPException(status_code=422, detail="Provide exactly one of 'clusters' or 'properties'")
+    if request_data.clusters is not None:
+        error = feature_schema.validate(request_data.clusters)
+        if error is not None:
+            raise HTTPException(status_code=422, detail=error)
+        codes = [feature_schema.levels.index(request_data.clusters[column]) for column in feature_schema.cluster_columns]
+    else:
+        error = validate_properties(request_data.properties)
+        if error is not None:
+            raise HTTPException(status_code=422, detail=error)
+        codes = [
+            int(column_cluster_codes(column, np.array([request_data.properties[property_column]], dtype=np.float64))[0])
+            for column, property_column in zip(feature_schema.cluster_columns, PROPERTY_COLUMNS)
+        ]
+
+    # Row 0 is the input, rows 1.. change one cluster column each
+    start = time.perf_counter()
+    matrix, columns, levels = perturbation_codes(codes, len(feature_schema.levels))
+    table = artifacts.prediction_table
+    if table is not None and table.mode == "full":
+        probabilities = table.rows(matrix)
+        record_stage("lookup", start)
+    else:
+        X_input = feature_schema.encode_codes(matrix)
+        record_stage("encode", start)
+        probabilities = artifacts.predict_probabilities(X_input, stage_observer)
+    deltas, classes, steps, smallest = analyze_perturbations(probabilities, codes, columns, levels)
+
+    class_names = artifacts.class_names
+    predicted_class_idx = int(np.argmax(probabilities[0]))
+    count_predictions(class_names, predicted_class_idx)
+    # Only the input itself is audited, not its perturbations
+    if request_data.clusters is not None:
+        audit(request, artifacts, CODES, matrix[:1], probabilities[:1])
+    else:
+        audit(request, artifacts, PROPERTIES, [[request_data.properties[column] for column in PROPERTY_COLUMNS]], probabilities[:1])
+    confidences = np.round(probabilities[1:][np.arange(len(classes)), classes].astype(np.float64) * 100, 2).tolist()
+    perturbations = [
+        {
+            "feature": feature_schema.cluster_columns[column],
+            "from": feature_schema.levels[codes[column]],
+            "to": feature_schema.levels[level],
+            "steps": step,
+            "predicted_type": str(class_names[class_idx]),
+            "confidence": confidence,
+            "flips": class_idx != predicted_class_idx,
+            # Change of every class probability, in percentage points, aligned with "classes"
+            "deltas": row
+        }
+        for column, level, step, class_idx, confidence, row in zip(
+            columns.tolist(), levels.tolist(), steps.tolist(), classes.tolist(), confidences,
+            np.round(deltas * 100, 2).tolist()
+        )
+    ]
+    smallest_flip = None
+    if smallest is not None:
+        smallest_flip = {key: value for key, value in perturbations[smallest].items() if key != "deltas"}
+
+    if sampled():
+        logger.info("Sensitivity", extra={"fields": {
+            "path": request.url.path, "predicted_type": class_names[predicted_class_idx],
+            "flips": int(np.sum(classes != predicted_class_idx)), "version": artifacts.version
+        }})
+
+    start = time.perf_counter()
+    response = JSONResponse({
+        "predicted_type": str(class_names[predicted_class_idx]),
+        "confidence": round(float(probabilities[0][predicted_class_idx]) * 100, 2),
+        "classes": [str(name) for name in class_names],
+        "perturbations": perturbations,
+        "smallest_flip": smallest_flip
+    })
+    record_stage("serialize", start)
+    return response
+
+@app.post("/predict/batch")
+def predict_batch(request: Request, request_data: BatchPredictionRequest):
+    """
+    Predicts geotextile types for many items in one forward pass.
+    Invalid items get a per-item error instead of failing the batch.
+    """
+    items = request_data.items
+    artifacts = request.app.state.artifacts
+    feature_schema = artifacts.feature_schema
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch size {len(items)} exceeds the maximum of {MAX_BATCH_SIZE}")
+    check_similar(artifacts, request_data.similar)
+
+    results = [None] * len(items)
+    cluster_rows, cluster_indices = [], []
+    property_rows, property_indices = [], []
+    for i, item in enumerate(items):
+        if (item.clusters is None) == (item.properties is None):
+            results[i] = {"index": i, "error": "Provide exactly one of 'clusters' or 'properties'"}
+            continue
+        if item.clusters is not None:
+            error = feature_schema.validate(item.clusters)
+            if error is None:
+                cluster_rows.append(item.clusters)
+                cluster_indices.append(i)
+        else:
+            error = validate_properties(item.properties)
+            if error is None:
+                property_rows.append(item.properties)
+                property_indices.append(i)
+        if error is not None:
+            results[i] = {"index": i, "error": error}
+
+    if cluster_rows or property_rows:
+        # Encode all valid items into one matrix; raw properties are binned straight to codes
+        start = time.perf_counter()
+        X_input = np.empty((len(cluster_rows) + len(property_rows), feature_schema.num_features), dtype=np.float32)
+        feature_schema.encode_batch(cluster_rows, out=X_input[:len(cluster_rows)])
+        if property_rows:
+            values = [[row[column] for column in PROPERTY_COLUMNS] for row in property_rows]
+            feature_schema.encode_properties(values, out=X_input[len(cluster_rows):])
+        record_stage("encode", start)
+
+        # Single forward pass over the whole batch
+        predictions = artifacts.predict_probabilities(X_input, stage_observer)
+        count_predictions(artifacts.class_names, np.argmax(predictions, axis=1))
+        if cluster_rows:
+            audit(request, artifacts, CODES, cluster_rows, predictions[:len(cluster_rows)])
+        if property_rows:
+            audit(request, artifacts, PROPERTIES, values, predictions[len(cluster_rows):])
+        for i, result in zip(cluster_indices + property_indices, format_batch_results(artifacts.class_names, predictions)):
+            results[i] = {"index": i, **result}
+        uncertainty = uncertainty_results(artifacts, X_input, request_data.uncertainty)
+        if uncertainty is not None:
+            for i, row in zip(cluster_indices + property_indices, uncertainty):
+                results[i]["uncertainty"] = row
+
+        if request_data.similar:
+            # One tree query per input kind: cluster items by level centers, raw items by their properties
+            start = time.perf_counter()
+            similarity_index = artifacts.similarity_index
+            similar = []
+            if cluster_rows:
+                similar += similarity_index.neighbors(*similarity_index.query_codes(
+                    cluster_codes(feature_schema, cluster_rows), request_data.similar
+                ))
+            if property_rows:
+                similar += similarity_index.neighbors(*similarity_index.query_properties(values, request_data.similar))
+            for i, neighbors in zip(cluster_indices + property_indices, similar):
+                results[i]["similar"] = neighbors
+            record_stage("similar", start)
+
+    if sampled():
+        logger.info("Batch prediction", extra={"fields": {
+            "path": request.url.path, "items": len(items), "scored": len(cluster_rows) + len(property_rows),
+            "version": artifacts.version
+        }})
+
+    start = time.perf_counter()
+    response = JSONResponse({
+        "classes": [str(name) for name in artifacts.class_names],
+        "results": results
+    })
+    record_stage("serialize", start)
+    return response
+
+@app.post("/predict/properties")
+def predict_properties(request: Request, request_data: PropertiesPredictionRequest):
+    """
+    Predicts geotextile types from raw numeric properties (one or many rows).
+    Properties are clustered with the training thresholds and one-hot encoded in one pass.
+    """
+    columns, rows = request_data.columns, request_data.values
+    artifacts = request.app.state.artifacts
+    if len(rows) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch size {len(rows)} exceeds the maximum of {MAX_BATCH_SIZE}")
+    check_similar(artifacts, request_data.similar)
+
+    # Columns may arrive in any order; map them onto the training property order
+    missing = [column for column in PROPERTY_COLUMNS if column not in columns]
+    unknown = [column for column in columns if column not in PROPERTY_COLUMNS]
+    if missing or unknown or len(set(columns)) != len(columns):
+        raise HTTPException(
+            status_code=422,
+            detail=f"columns must list each of the properties exactly once: {', '.join(PROPERTY_COLUMNS)}"
+        )
+    order = [columns.index(column) for column in PROPERTY_COLUMNS]
+
+    results = [None] * len(rows)
+    valid_indices = [i for i, row in enumerate(rows) if len(row) == len(columns)]
+    for i, row in enumerate(rows):
+        if len(row) != len(columns):
+            results[i] = {"index": i, "error": f"Expected {len(columns)} values, got {len(row)}"}
+
+    if valid_indices:
+        start = time.perf_counter()
+        values = np.array([rows[i] for i in valid_indices], dtype=np.float64)[:, order]
+        X_input = artifacts.feature_schema.encode_properties(values)
+        record_stage("encode", start)
+        predictions = artifacts.predict_probabilities(X_input, stage_observer)
+        count_predictions(artifacts.class_names, np.argmax(predictions, axis=1))
+        audit(request, artifacts, PROPERTIES, values, predictions)
+        for i, result in zip(valid_indices, format_batch_results(artifacts.class_names, predictions)):
+            results[i] = {"index": i, **result}
+        uncertainty = uncertainty_results(artifacts, X_input, request_data.uncertainty)
+        if uncertainty is not None:
+            for i, row in zip(valid_indices, uncertainty):
+                results[i]["uncertainty"] = row
+        if request_data.similar:
+            start = time.perf_counter()
+            similarity_index = artifacts.similarity_index
+            neighbors = similarity_index.neighbors(*similarity_index.query_properties(values, request_data.similar))
+            for i, row_neighbors in zip(valid_indices, neighbors):
+                results[i]["similar"] = row_neighbors
+            record_stage("similar", start)
+
+    if sampled():
+        logger.info("Properties prediction", extra={"fields": {
+            "path": request.url.path, "rows": len(rows), "scored": len(valid_indices), "version": artifacts.version
+        }})
+
+    start = time.perf_counter()
+    response = JSONResponse({
+        "classes": [str(name) for name in artifacts.class_names],
+        "results": results
+    })
+    record_stage("serialize", start)
+    return response
+
+def score_columnar(artifacts, content_type, body):
+    """Decode, validate, encode and score a /predict/columnar body; returns (kind, values, probabilities)."""
+    feature_schema = artifacts.feature_schema
+    start = time.perf_counter()
+    try:
+        if content_type == columnar.MEDIA_TYPE:
+            kind, values = columnar.decode_array(body)
+        else:
+            kind, values = columnar.read_arrow(body, feature_schema.cluster_columns, PROPERTY_COLUMNS)
+    except ImportError:
+        raise HTTPException(status_code=415, detail="Arrow bodies require pyarrow on the server (pip install pyarrow)")
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error))
+    if kind not in (columnar.CODES, columnar.PROPERTIES) or values.shape[1] != len(feature_schema.cluster_columns):
+        raise HTTPException(
+            status_code=422, detail=f"Body must hold {len(feature_schema.cluster_columns)} columns of cluster codes or raw properties"
+        )
+    if len(values) > COLUMNAR_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"Batch size {len(values)} exceeds the maximum of {COLUMNAR_MAX_ROWS}")
+
+    # Codes are scattered, raw properties binned, straight into the one-hot matrix
+    if kind == columnar.CODES:
+        if values.size and values.max() >= len(feature_schema.levels):
+            raise HTTPException(status_code=422, detail=f"Cluster codes must be below {len(feature_schema.levels)}")
+        X_input = feature_schema.encode_codes(values)
+    else:
+        if not np.isfinite(values).all():
+            raise HTTPException(status_code=422, detail="Raw properties must be finite")
+        X_input = feature_schema.encode_properties(values)
+    record_stage("encode", start)
+    return kind, values, artifacts.predict_probabilities(X_input, stage_observer)
+
+def columnar_response(class_names, response_type, predictions):
+    """/predict/columnar response body in the negotiated format."""
+    if response_type == columnar.MEDIA_TYPE:
+        return Response(
+            columnar.encode_array(columnar.PROBABILITIES, predictions), media_type=columnar.MEDIA_TYPE,
+            headers={"X-Geotextile-Classes": columnar.class_names_header(class_names)}
+        )
+    if response_type == columnar.ARROW_MEDIA_TYPE:
+        return Response(columnar.write_arrow(class_names, predictions), media_type=columnar.ARROW_MEDIA_TYPE)
+    return JSONResponse({
+        "classes": [str(name) for name in class_names],
+        "results": [{"index": i, **result} for i, result in enumerate(format_batch_results(class_names, predictions))]
+    })
+
+@app.post("/predict/columnar")
+async def predict_columnar(request: Request):
+    """
+    Predicts geotextile types for a binary columnar body: uint8 cluster codes or
+    float32 raw properties, as a raw little-endian array or an Arrow IPC stream.
+    The body is viewed as one NumPy array without per-row Python objects; the
+    response format (raw array, Arrow or JSON) follows the Accept header.
+    """
+    artifacts = request.app.state.artifacts
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type not in (columnar.MEDIA_TYPE, columnar.ARROW_MEDIA_TYPE):
+        raise HTTPException(
+            status_code=415, detail=f"Content-Type must be {columnar.MEDIA_TYPE} or {columnar.ARROW_MEDIA_TYPE}"
+        )
+    response_type = columnar.negotiate(request.headers.get("accept"))
+    if response_type is None:
+        raise HTTPException(
+            status_code=406,
+            detail=f"Accept must allow {columnar.MEDIA_TYPE}, {columnar.ARROW_MEDIA_TYPE} or {columnar.JSON_MEDIA_TYPE}"
+        )
+    if response_type == columnar.ARROW_MEDIA_TYPE:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=406, detail="Arrow responses require pyarrow on the server (pip install pyarrow)")
+
+    body = await request.body()
+    # Decoding, validation, encoding and serialization are O(rows): keep them off the event loop
+    kind, values, predictions = await run_in_threadpool(score_columnar, artifacts, content_type, body)
+    count_predictions(artifacts.class_names, np.argmax(predictions, axis=1))
+    audit(request, artifacts, CODES if kind == columnar.CODES else PROPERTIES, values, predictions)
+    if sampled():
+        logger.info("Columnar prediction", extra={"fields": {
+            "path": request.url.path, "rows": len(values), "content_type": content_type,
+            "response_type": response_type, "version": artifacts.version
+        }})
+
+    start = time.perf_counter()
+    response = await run_in_threadpool(columnar_response, artifacts.class_names, response_type, predictions)
+    record_stage("serialize", start)
+    return response
 
 if __name__ == "__main__":
+    import argparse
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    from dataset.constants import SERVING_WORKERS
+
+    parser = argparse.ArgumentParser(description="Run the Geotextile Predictor API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=SERVING_WORKERS,
+                        help="Number of worker processes (set GEOTEXTILE_SHARED_ARTIFACTS=1 to share one mapped model)")
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        # Workers re-import the app from its import string
+        uvicorn.run("app:app", host=args.host, port=args.port, workers=args.workers)
+    else:
+        uvicorn.run(app, host=args.host, port=args.port)
@@ -0,0 +1,128 @@
+"""Request overhead, writer throughput and backpressure of the prediction audit log.
+
+Reported:
+- /predict and /predict/batch latency (p50 / p99) through the in-process test
+  client with the audit log off and on, in the same app instance;
+- writer throughput: records/s from queueing single-row and batch entries to
+  their last SQLite commit (`stop` flushes everything queued);
+- burst behaviour: submitted vs. dropped records when requests arrive faster
+  than a small queue is drained;
+- replay rate of the logged records through the served model.
+Run from the backend directory:
+    python -m benchmarks.bench_audit [--requests 2000] [--records 200000]
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+
+os.environ.setdefault("GEOTEXTILE_LOG_SAMPLE_RATE", "0")
+
+
+def latency_ms(client, path, body, requests):
+    times = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.post(path, json=body)
+        times.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text[:200]
+    return np.percentile(times, 50) * 1000, np.percentile(times, 99) * 1000
+
+
+def request_overhead(requests, workdir):
+    from fastapi.testclient import TestClient
+    import app
+    from utils.audit_log import AuditLog
+    from dataset.constants import CLUSTER_COLUMNS, CLUSTER_LEVELS
+
+    rng = np.random.default_rng(42)
+    clusters = [dict(zip(CLUSTER_COLUMNS, rng.choice(CLUSTER_LEVELS, len(CLUSTER_COLUMNS)))) for _ in range(100)]
+    cases = [
+        ("/predict", "/predict", {"clusters": clusters[0]}),
+        ("/predict/batch x100", "/predict/batch", {"items": [{"clusters": c} for c in clusters]}),
+    ]
+    results = []
+    with TestClient(app.app) as client:
+        for name, path, body in cases:
+            client.app.state.audit_log = None
+            latency_ms(client, path, body, 50)
+            off = latency_ms(client, path, body, requests)
+            audit_log = AuditLog(os.path.join(workdir, "overhead.sqlite"))
+            audit_log.start()
+            client.app.state.audit_log = audit_log
+            on = latency_ms(client, path, body, requests)
+            client.app.state.audit_log = None
+            audit_log.stop()
+            results.append((name, off, on, audit_log.stats()))
+    return results
+
+
+def writer_throughput(records, rows_per_entry, workdir, artifacts):
+    from utils.audit_log import AuditLog, CODES
+
+    rng = np.random.default_rng(0)
+    entries = records // rows_per_entry
+    codes = rng.integers(0, 5, size=(entries, rows_per_entry, 9)).astype(np.uint8)
+    probabilities = rng.dirichlet(np.ones(len(artifacts.class_names)), size=(entries, rows_per_entry)).astype(np.float32)
+    audit_log = AuditLog(os.path.join(workdir, f"writer_{rows_per_entry}.sqlite"), max_queue=entries)
+    audit_log.start()
+    start = time.perf_counter()
+    for i in range(entries):
+        audit_log.submit("/bench", artifacts.version, artifacts.class_names, CODES, codes[i], probabilities[i])
+    queued = time.perf_counter() - start
+    audit_log.stop()
+    elapsed = time.perf_counter() - start
+    stats = audit_log.stats()
+    return {
+        "rows_per_entry": rows_per_entry, "records": stats["written_records"], "submit_us": queued / entries * 1e6,
+        "records_per_s": stats["written_records"] / elapsed, "batches": stats["batches"],
+        "file_mb": os.path.getsize(audit_log.path) / 1e6, "path": audit_log.path
+    }
+
+
+def burst(entries, max_queue, workdir, artifacts):
+    from utils.audit_log import AuditLog, CODES
+
+    codes = np.zeros((1, 9), dtype=np.uint8)
+    probabilities = np.full((1, len(artifacts.class_names)), 1 / len(artifacts.class_names), dtype=np.float32)
+    audit_log = AuditLog(os.path.join(workdir, "burst.sqlite"), max_queue=max_queue)
+    audit_log.start()
+    for _ in range(entries):
+        audit_log.submit("/bench", artifacts.version, artifacts.class_names, CODES, codes, probabilities)
+    audit_log.stop()
+    return audit_log.stats()
+
+
+def main(requests, records):
+    from utils.loaders import load_serving_artifacts
+    from utils.audit_log import replay
+
+    artifacts = load_serving_artifacts()
+    with tempfile.TemporaryDirectory(prefix="geotextile-audit-") as workdir:
+        print(f"{'request':<20} {'off p50 ms':>10} {'off p99 ms':>10} {'on p50 ms':>10} {'on p99 ms':>10} {'dropped':>8}")
+        for name, off, on, stats in request_overhead(requests, workdir):
+            print(f"{name:<20} {off[0]:>10.3f} {off[1]:>10.3f} {on[0]:>10.3f} {on[1]:>10.3f} {stats['dropped_records']:>8}")
+
+        print(f"\n{'rows/entry':>10} {'records':>9} {'submit us':>10} {'records/s':>11} {'batches':>8} {'file MB':>8}")
+        writes = [writer_throughput(records, rows, workdir, artifacts) for rows in (1, 100)]
+        for r in writes:
+            print(f"{r['rows_per_entry']:>10} {r['records']:>9} {r['submit_us']:>10.1f} {r['records_per_s']:>11,.0f} "
+                  f"{r['batches']:>8} {r['file_mb']:>8.1f}")
+
+        stats = burst(100_000, 1000, workdir, artifacts)
+        print(f"\nburst of 100,000 single-row requests into a 1,000-request queue: "
+              f"{stats['written_records']:,} written, {stats['dropped_records']:,} dropped")
+
+        start = time.perf_counter()
+        replayed = sum(len(chunk["id"]) for chunk, _, _ in replay(artifacts, writes[-1]["path"]))
+        elapsed = time.perf_counter() - start
+        print(f"replayed {replayed:,} records in {elapsed:.2f} s ({replayed / elapsed:,.0f} records/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the prediction audit log")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per latency measurement")
+    parser.add_argument("--records", type=int, default=200_000, help="Records written per throughput run")
+    args = parser.parse_args()
+    main(args.requests, args.records)
@@ -0,0 +1,149 @@
+"""Vectorized cluster assignment vs. the previous per-row `Series.apply` version.
+
+Times both at increasing row counts. tests/test_clustering.py checks that
+they produce identical clusters (golden bins, dataset rows, random values).
+Run from the backend directory:
+    python -m benchmarks.bench_clustering [--sizes 10000 1000000 10000000]
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from preprocessors.data_preprocessor import DataPreprocessor
+from preprocessors.feature_schema import FeatureSchema
+from dataset.constants import CLUSTER_COLUMNS, CLUSTER_THRESHOLDS, FEATURE_SCHEMA_PATH
+
+# Legacy per-row implementation is only timed up to this many rows
+LEGACY_MAX_ROWS = 1_000_000
+
+
+def legacy_assign_clusters(df):
+    """Previous implementation: one Python function per property, applied row by row."""
+
+    def tensile_cluster(x):
+        if x <= 30: return "C1"
+        elif x <= 60: return "C2"
+        elif x <= 120: return "C3"
+        elif x <= 200: return "C4"
+        else: return "C5"
+
+    def puncture_cluster(x):
+        if x <= 600: return "C1"
+        elif x <= 1000: return "C2"
+        elif x <= 1400: return "C3"
+        elif x <= 1800: return "C4"
+        else: return "C5"
+
+    def permittivity_cluster(x):
+        if x <= 0.2: return "C1"
+        elif x <= 0.5: return "C2"
+        elif x <= 1.0: return "C3"
+        elif x <= 1.5: return "C4"
+        else: return "C5"
+
+    def filtration_cluster(x):
+        if x <= 75: return "C1"
+        elif x <= 85: return "C2"
+        elif x <= 90: return "C3"
+        elif x <= 95: return "C4"
+        else: return "C5"
+
+    def recycled_cluster(x):
+        if x == 0: return "C1"
+        elif x <= 30: return "C2"
+        elif x <= 60: return "C3"
+        elif x <= 99: return "C4"
+        else: return "C5"
+
+    def biobased_cluster(x):
+        if x == 0: return "C1"
+        elif x <= 30: return "C2"
+        elif x <= 70: return "C3"
+        elif x <= 99: return "C4"
+        else: return "C5"
+
+    def uv_cluster(x):
+        if x <= 30: return "C1"
+        elif x <= 50: return "C2"
+        elif x <= 70: return "C3"
+        elif x <= 85: return "C4"
+        else: return "C5"
+
+    def material_cost_cluster(x):
+        if x <= 100: return "C1"
+        elif x <= 200: return "C2"
+        elif x <= 400: return "C3"
+        elif x <= 700: return "C4"
+        else: return "C5"
+
+    def install_cost_cluster(x):
+        if x <= 50: return "C1"
+        elif x <= 100: return "C2"
+        elif x <= 200: return "C3"
+        elif x <= 350: return "C4"
+        else: return "C5"
+
+    # Apply clusters
+    df["Tensile Cluster"] = df["Tensile Strength (kN/m)"].apply(tensile_cluster)
+    df["Puncture Cluster"] = df["Puncture Resistance (N)"].apply(puncture_cluster)
+    df["Permittivity Cluster"] = df["Permittivity (s⁻¹)"].apply(permittivity_cluster)
+    df["Filtration Cluster"] = df["Filtration Efficiency (%)"].apply(filtration_cluster)
+    df["Recycled Cluster"] = df["Recycled Content (%)"].apply(recycled_cluster)
+    df["Biobased Cluster"] = df["Biobased Content (%)"].apply(biobased_cluster)
+    df["UV Cluster"] = df["UV Strength Retained (% after 500h)"].apply(uv_cluster)
+    df["Material Cost Cluster"] = df["Material Cost (PHP/m²)"].apply(material_cost_cluster)
+    df["Install Cost Cluster"] = df["Installation Cost (PHP/m²)"].apply(install_cost_cluster)
+
+    return df
+
+
+def synthetic_properties(n, rng):
+    """Random property values spanning every bin, with exact edges and zeros mixed in."""
+    preprocessor = DataPreprocessor()
+    data = {}
+    for column, name in zip(CLUSTER_COLUMNS, preprocessor.feature_columns):
+        edges = np.asarray(CLUSTER_THRESHOLDS[column]["edges"], dtype=np.float64)
+        values = rng.uniform(-0.1 * edges[-1], 1.5 * edges[-1], size=n)
+        special = rng.random(n)
+        values[special < 0.1] = rng.choice(edges, size=int(np.sum(special < 0.1)))
+        values[(special >= 0.1) & (special < 0.15)] = 0.0
+        data[name] = values
+    return pd.DataFrame(data)
+
+
+def time_call(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    preprocessor = DataPreprocessor()
+    schema = FeatureSchema.load(FEATURE_SCHEMA_PATH)
+
+    for n in args.sizes:
+        df = synthetic_properties(n, rng)
+        values = df[preprocessor.feature_columns].to_numpy()
+        codes_time = time_call(lambda: preprocessor.cluster_codes(values))
+        codes = preprocessor.cluster_codes(values)
+        one_hot_time = time_call(lambda: schema.encode_codes(codes))
+        fused_time = time_call(lambda: schema.encode_properties(values))
+        if not np.array_equal(schema.encode_properties(values), schema.encode_codes(codes)):
+            raise AssertionError("Fused encode_properties differs from cluster_codes + encode_codes")
+        vectorized_time = time_call(lambda: preprocessor.assign_clusters(df.copy()))
+        line = (f"rows={n:>10,}  cluster_codes={codes_time:7.3f} s  encode_codes={one_hot_time:7.3f} s  "
+                f"encode_properties={fused_time:7.3f} s  assign_clusters={vectorized_time:7.3f} s")
+        if n <= LEGACY_MAX_ROWS:
+            legacy_time = time_call(lambda: legacy_assign_clusters(df.copy()))
+            line += f"  legacy={legacy_time:8.3f} s  speedup={legacy_time / vectorized_time:6.1f}x"
+        print(line)
+        del df, values, codes
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Request size and end-to-end rows/s of JSON vs. binary columnar bulk scoring.
+
+Formats compared at each row count, through the in-process test client:
+    json-clusters    POST /predict/batch with one {"clusters": {...}} dict per row
+    json-properties  POST /predict/properties with columns + values lists
+    raw-codes        POST /predict/columnar, uint8 cluster codes in, float32 probabilities out
+    raw-properties   POST /predict/columnar, float32 raw properties in, float32 probabilities out
+    arrow-codes      POST /predict/columnar with Arrow IPC streams (skipped without pyarrow)
+Times include building the request body and parsing the response on the
+client. The JSON batch limit is raised so the same sizes can be sent.
+Run from the backend directory:
+    python -m benchmarks.bench_columnar [--rows 1000 100000] [--repeats 3]
+"""
+import argparse
+import json
+import os
+import time
+import numpy as np
+
+os.environ.setdefault("GEOTEXTILE_MAX_BATCH_SIZE", "1000000")
+os.environ.setdefault("GEOTEXTILE_LOG_SAMPLE_RATE", "0")
+
+
+def synthetic_rows(rows, rng):
+    """Random cluster codes and raw properties that bin to them."""
+    from benchmarks.bench_clustering import synthetic_properties
+    from preprocessors.data_preprocessor import DataPreprocessor
+    from dataset.constants import PROPERTY_COLUMNS
+
+    values = synthetic_properties(rows, rng)[PROPERTY_COLUMNS].to_numpy(dtype=np.float32)
+    codes = DataPreprocessor().cluster_codes(values.astype(np.float64)).astype(np.uint8)
+    return codes, values
+
+
+def request_builders(codes, values):
+    """name -> (make request kwargs, parse response) for every available format."""
+    from utils import columnar
+    from dataset.constants import CLUSTER_COLUMNS, CLUSTER_LEVELS, PROPERTY_COLUMNS
+
+    def json_clusters():
+        items = [{"clusters": dict(zip(CLUSTER_COLUMNS, (CLUSTER_LEVELS[c] for c in row)))} for row in codes.tolist()]
+        return "/predict/batch", {"content": json.dumps({"items": items}), "headers": {"content-type": "application/json"}}
+
+    def json_properties():
+        body = {"columns": PROPERTY_COLUMNS, "values": values.tolist()}
+        return "/predict/properties", {"content": json.dumps(body), "headers": {"content-type": "application/json"}}
+
+    def raw(kind, array):
+        return lambda: ("/predict/columnar", {
+            "content": columnar.encode_array(kind, array),
+            "headers": {"content-type": columnar.MEDIA_TYPE, "accept": columnar.MEDIA_TYPE}
+        })
+
+    builders = {
+        "json-clusters": (json_clusters, lambda response: response.json()),
+        "json-properties": (json_properties, lambda response: response.json()),
+        "raw-codes": (raw(columnar.CODES, codes), lambda response: columnar.decode_array(response.content)),
+        "raw-properties": (raw(columnar.PROPERTIES, values), lambda response: columnar.decode_array(response.content)),
+    }
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return builders
+
+    def arrow_codes():
+        table = pa.table({column: codes[:, j] for j, column in enumerate(CLUSTER_COLUMNS)})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return "/predict/columnar", {
+            "content": sink.getvalue().to_pybytes(),
+            "headers": {"content-type": columnar.ARROW_MEDIA_TYPE, "accept": columnar.ARROW_MEDIA_TYPE}
+        }
+
+    builders["arrow-codes"] = (arrow_codes, lambda response: pa.ipc.open_stream(response.content).read_all())
+    return builders
+
+
+def main(row_counts, repeats):
+    from fastapi.testclient import TestClient
+    import app
+
+    rng = np.random.default_rng(42)
+    results = []
+    with TestClient(app.app) as client:
+        for rows in row_counts:
+            codes, values = synthetic_rows(rows, rng)
+            for name, (build, parse) in request_builders(codes, values).items():
+                times = []
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    path, kwargs = build()
+                    response = client.post(path, **kwargs)
+                    assert response.status_code == 200, response.text[:200]
+                    parse(response)
+                    times.append(time.perf_counter() - start)
+                seconds = float(np.median(times))
+                results.append({
+                    "format": name, "rows": rows, "request_bytes": len(kwargs["content"]),
+                    "response_bytes": len(response.content), "seconds": seconds, "rows_per_s": rows / seconds
+                })
+
+    print(f"{'format':<16} {'rows':>8} {'request KB':>11} {'response KB':>12} {'seconds':>9} {'rows/s':>11}")
+    for r in results:
+        print(f"{r['format']:<16} {r['rows']:>8} {r['request_bytes'] / 1024:>11.1f} {r['response_bytes'] / 1024:>12.1f} "
+              f"{r['seconds']:>9.4f} {r['rows_per_s']:>11,.0f}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare JSON and binary columnar bulk scoring")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 100_000])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    main(args.rows, args.repeats)
@@ -0,0 +1,99 @@
+"""Preprocessing time of train.py with and without the encoded dataset cache.
+
+For the dataset and larger synthetic resamples of it (see
+bench_training_data), each row count reports:
+- pandas: the previous train.py preprocessing (read_csv, assign_clusters,
+  pd.get_dummies, OneHotEncoder, two train_test_split calls);
+- miss: hashing, encoding and writing a new cache entry;
+- hit: hashing the CSV and memory-mapping the entry;
+- hit + splits: a hit plus copying the train/val splits out as float32,
+  which is everything train.main needs before model.fit;
+- the CSV hash alone and the size of the cache entry.
+Run from the backend directory:
+    python -m benchmarks.bench_dataset_cache [--rows 0 1000000] [--repeats 3]
+(0 stands for dataset/geotextile.csv itself.)
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import numpy as np
+from benchmarks.bench_training_data import make_synthetic_csv
+from benchmarks.suite import median_seconds
+from preprocessors.dataset_cache import file_sha256, load_encoded_dataset
+from dataset.constants import DATASET_PATH, CLUSTER_COLUMNS
+
+
+def pandas_preprocess(csv_path):
+    """The train.py preprocessing before the cache, on an arbitrary CSV."""
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+    from preprocessors.data_preprocessor import DataPreprocessor
+
+    preprocessor = DataPreprocessor()
+    df = preprocessor.assign_clusters(pd.read_csv(csv_path))
+    y = preprocessor.encode_labels(df[preprocessor.target_column].values)
+    X = pd.get_dummies(df[CLUSTER_COLUMNS], columns=CLUSTER_COLUMNS)
+    X_train, X_temp, y_train, y_temp = train_test_split(X, y, test_size=0.3, random_state=42)
+    X_val, X_test, y_val, y_test = train_test_split(X_temp, y_temp, test_size=0.5, random_state=42)
+    return X_train.to_numpy(dtype=np.float32), X_val.to_numpy(dtype=np.float32), y_train, y_val
+
+
+def cached_splits(csv_path, cache_dir):
+    dataset = load_encoded_dataset(csv_path, cache_dir)
+    return dataset.split("train"), dataset.split("val")
+
+
+def run_size(csv_path, repeats, workdir):
+    cache_dir = os.path.join(workdir, "cache")
+
+    def miss():
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        load_encoded_dataset(csv_path, cache_dir)
+
+    result = {
+        "pandas_s": median_seconds(lambda: pandas_preprocess(csv_path), repeats),
+        "miss_s": median_seconds(miss, repeats),
+        "hit_s": median_seconds(lambda: load_encoded_dataset(csv_path, cache_dir), repeats),
+        "hit_splits_s": median_seconds(lambda: cached_splits(csv_path, cache_dir), repeats),
+        "hash_s": median_seconds(lambda: file_sha256(csv_path), repeats),
+    }
+    dataset = load_encoded_dataset(csv_path, cache_dir)
+    entry = os.path.join(cache_dir, dataset.key)
+    result["rows"] = len(dataset)
+    result["csv_mb"] = os.path.getsize(csv_path) / 1e6
+    result["cache_mb"] = sum(os.path.getsize(os.path.join(entry, name)) for name in os.listdir(entry)) / 1e6
+
+    # The cached arrays are what the pandas path computes
+    (X_train, y_train), (X_val, y_val) = cached_splits(csv_path, cache_dir)
+    expected = pandas_preprocess(csv_path)
+    result["identical"] = all(np.array_equal(a, b) for a, b in zip((X_train, X_val, y_train, y_val), expected))
+    return result
+
+
+def main(row_counts, repeats):
+    results = []
+    with tempfile.TemporaryDirectory(prefix="geotextile-dataset-cache-") as workdir:
+        for rows in row_counts:
+            csv_path = DATASET_PATH
+            if rows:
+                csv_path = os.path.join(workdir, f"synthetic_{rows}.csv")
+                make_synthetic_csv(rows, csv_path)
+            results.append(run_size(csv_path, repeats, workdir))
+            shutil.rmtree(os.path.join(workdir, "cache"), ignore_errors=True)
+
+    print(f"{'rows':>9} {'CSV MB':>7} {'cache MB':>9} {'pandas s':>9} {'miss s':>8} {'hit s':>8} "
+          f"{'hit+splits s':>12} {'hash s':>8} {'identical':>9}")
+    for r in results:
+        print(f"{r['rows']:>9,} {r['csv_mb']:>7.1f} {r['cache_mb']:>9.1f} {r['pandas_s']:>9.3f} {r['miss_s']:>8.3f} "
+              f"{r['hit_s']:>8.4f} {r['hit_splits_s']:>12.3f} {r['hash_s']:>8.4f} {str(r['identical']):>9}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the encoded dataset cache")
+    parser.add_argument("--rows", type=int, nargs="+", default=[0, 1_000_000],
+                        help="Synthetic row counts (0 = the dataset CSV itself)")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    main(args.rows, args.repeats)
@@ -0,0 +1,172 @@
+"""Swap latency and request errors while the API hot-reloads a new model version.
+
+Two versions are prepared in a temporary versions directory: a copy of the
+current models/ artifacts and one with perturbed output weights. The app is
+started on the first one and driven through an in-process ASGI client by
+concurrent /predict clients (prediction cache off, so every request reaches
+the model). LATEST is then flipped between the versions several times.
+Each swap reports the time from publishing to serving the new version, the
+load and swap times from the app, and the latency of requests in flight
+around it; any non-200 response or exception is counted as an error.
+Run from the backend directory:
+    python -m benchmarks.bench_hot_reload [--swaps 5] [--concurrency 16]
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Serving artifacts copied into each version directory
+ARTIFACT_FILES = [
+    "geotextile_ann.npz", "platt_params.npz", "scaler.npz", "feature_schema.json",
+    "class_names.json", "training_clusters.npy", "serving_bundle.npy"
+]
+
+
+def prepare_versions(versions_dir):
+    """Write version "v1" (current artifacts) and "v2" (perturbed output layer); publish v1."""
+    from models.serving_bundle import write_serving_bundle
+    from utils.loaders import load_serving_artifacts
+    from utils.versions import publish_version
+
+    models_dir = os.path.join(BACKEND_DIR, "models")
+    for version in ("v1", "v2"):
+        os.makedirs(os.path.join(versions_dir, version))
+        for name in ARTIFACT_FILES:
+            shutil.copy(os.path.join(models_dir, name), os.path.join(versions_dir, version, name))
+
+    v2 = os.path.join(versions_dir, "v2")
+    weights_path = os.path.join(v2, "geotextile_ann.npz")
+    with np.load(weights_path) as data:
+        arrays = dict(data)
+    last = int(arrays["num_layers"]) - 1
+    rng = np.random.default_rng(42)
+    arrays[f"kernel_{last}"] = arrays[f"kernel_{last}"] + rng.normal(0, 0.05, arrays[f"kernel_{last}"].shape).astype(np.float32)
+    np.savez(weights_path, **arrays)
+    artifacts = load_serving_artifacts(backend="numpy", shared=False, directory=v2)
+    write_serving_bundle(
+        os.path.join(v2, "serving_bundle.npy"), artifacts.model, artifacts.scaler,
+        artifacts.feature_schema, artifacts.class_names
+    )
+    publish_version(os.path.join(versions_dir, "v1"), versions_dir)
+
+
+async def child(args):
+    import httpx
+    import app as app_module
+    from utils.versions import publish_version
+    from dataset.constants import CLUSTER_COLUMNS, CLUSTER_LEVELS, MODEL_VERSIONS_DIR
+
+    app = app_module.app
+    rng = np.random.default_rng(42)
+    payloads = [
+        {"clusters": {column: CLUSTER_LEVELS[rng.integers(len(CLUSTER_LEVELS))] for column in CLUSTER_COLUMNS}}
+        for _ in range(1000)
+    ]
+    requests, errors = [], []
+    stop = asyncio.Event()
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            async def worker(worker_id):
+                i = worker_id
+                while not stop.is_set():
+                    start = time.perf_counter()
+                    try:
+                        response = await client.post("/predict", json=payloads[i % len(payloads)])
+                        if response.status_code != 200:
+                            errors.append(f"{response.status_code}: {response.text[:200]}")
+                    except Exception as exc:
+                        errors.append(repr(exc))
+                    requests.append((start, time.perf_counter()))
+                    i += args.concurrency
+
+            workers = [asyncio.create_task(worker(w)) for w in range(args.concurrency)]
+            swaps = []
+            await asyncio.sleep(args.settle)
+            for _ in range(args.swaps):
+                target = "v1" if app.state.artifacts.version == "v2" else "v2"
+                reloads_before = len(app.state.reloads)
+                published = time.perf_counter()
+                publish_version(os.path.join(MODEL_VERSIONS_DIR, target), MODEL_VERSIONS_DIR)
+                while len(app.state.reloads) == reloads_before:
+                    await asyncio.sleep(0.001)
+                served = time.perf_counter()
+                reload = app.state.reloads[-1]
+                assert app.state.artifacts.version == target
+                swaps.append({
+                    "to_version": target, "published": published, "served": served,
+                    "publish_to_serve_ms": (served - published) * 1000,
+                    "load_ms": reload["load_ms"], "swap_ms": reload["swap_ms"]
+                })
+                await asyncio.sleep(args.settle)
+            stop.set()
+            await asyncio.gather(*workers)
+
+    # Latency of requests that overlapped each publish -> serve window vs. all others
+    during, outside = [], []
+    for start, end in requests:
+        overlaps = any(start <= swap["served"] and end >= swap["published"] for swap in swaps)
+        (during if overlaps else outside).append((end - start) * 1000)
+    print(json.dumps({
+        "swaps": [{k: v for k, v in swap.items() if k not in ("published", "served")} for swap in swaps],
+        "requests": len(requests),
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "p50_outside_ms": float(np.percentile(outside, 50)),
+        "p99_outside_ms": float(np.percentile(outside, 99)),
+        "p50_during_ms": float(np.percentile(during, 50)) if during else None,
+        "p99_during_ms": float(np.percentile(during, 99)) if during else None,
+        "max_during_ms": float(np.max(during)) if during else None
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--swaps", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--interval", type=float, default=0.05, help="Reload poll interval in seconds")
+    parser.add_argument("--settle", type=float, default=1.0, help="Seconds of load before and after each swap")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        asyncio.run(child(args))
+        return
+
+    with tempfile.TemporaryDirectory(prefix="geotextile-versions-") as versions_dir:
+        prepare_versions(versions_dir)
+        for batching, shared in (("0", "0"), ("1", "0"), ("0", "1")):
+            env = dict(
+                os.environ, GEOTEXTILE_MODEL_VERSIONS_DIR=versions_dir, GEOTEXTILE_PREDICTION_CACHE_SIZE="0",
+                GEOTEXTILE_MODEL_RELOAD_INTERVAL_S=str(args.interval), GEOTEXTILE_MICRO_BATCHING=batching,
+                GEOTEXTILE_SHARED_ARTIFACTS=shared
+            )
+            command = [sys.executable, "-m", "benchmarks.bench_hot_reload", "--child", "--swaps", str(args.swaps),
+                       "--concurrency", str(args.concurrency), "--settle", str(args.settle)]
+            output = subprocess.run(command, cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True)
+            result = json.loads(output.stdout.strip().splitlines()[-1])
+
+            swap_ms = np.array([swap["publish_to_serve_ms"] for swap in result["swaps"]])
+            load_ms = np.array([swap["load_ms"] for swap in result["swaps"]])
+            print(f"micro-batching {'on' if batching == '1' else 'off'}, shared bundle {'on' if shared == '1' else 'off'}:")
+            print(f"  {len(swap_ms)} swaps  publish->serve median={np.median(swap_ms):.1f} ms max={swap_ms.max():.1f} ms  "
+                  f"load median={np.median(load_ms):.1f} ms  swap max={max(s['swap_ms'] for s in result['swaps']):.3f} ms")
+            print(f"  {result['requests']} requests, {result['errors']} errors  "
+                  f"p50/p99 outside swaps={result['p50_outside_ms']:.2f}/{result['p99_outside_ms']:.2f} ms  "
+                  f"during swaps={result['p50_during_ms']:.2f}/{result['p99_during_ms']:.2f} ms")
+            for sample in result["error_samples"]:
+                print(f"    error: {sample}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Per-request cost of Platt-calibrated inference, before and after caching.
+
+Run from the backend directory:
+    python -m benchmarks.bench_platt
+"""
+import time
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from tensorflow.keras import Model
+from tensorflow.keras.layers import Dense
+from models.ann_model import ANNModel
+from dataset.constants import MODEL_SAVE_PATH, VAL_LOGITS_PATH, VAL_LABELS_PATH, PLATT_PARAMS_PATH
+
+
+def legacy_predict_with_platt_scaling(keras_model, num_classes, X, val_logits, val_labels):
+    """Previous implementation: rebuild the logits model and run 9 sklearn scalers per call."""
+    platt_scalers = []
+    val_labels_indices = np.argmax(val_labels, axis=1) if val_labels.ndim > 1 else val_labels
+    for class_idx in range(num_classes):
+        scaler = LogisticRegression(random_state=42)
+        scaler.fit(val_logits[:, class_idx].reshape(-1, 1), (val_labels_indices == class_idx).astype(int))
+        platt_scalers.append(scaler)
+
+    def run(X):
+        x = keras_model.layers[-2].output
+        logits_output = Dense(num_classes, activation=None, name="logits_output")(x)
+        logits_model = Model(inputs=keras_model.input, outputs=logits_output)
+        logits_model.set_weights(keras_model.get_weights())
+        new_logits = logits_model.predict(X, verbose=0)
+        calibrated_probs = np.zeros_like(new_logits)
+        for class_idx in range(num_classes):
+            prob = platt_scalers[class_idx].predict_proba(new_logits[:, class_idx].reshape(-1, 1))[:, 1]
+            calibrated_probs[:, class_idx] = prob
+        return calibrated_probs / np.sum(calibrated_probs, axis=1, keepdims=True)
+
+    return run
+
+
+def time_per_call(fn, X, repeats):
+    fn(X)  # warm up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(X)
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    val_logits = np.load(VAL_LOGITS_PATH)
+    val_labels = np.load(VAL_LABELS_PATH)
+
+    ann_model = ANNModel(input_dim=42, num_classes=val_logits.shape[1])
+    ann_model.load_model(MODEL_SAVE_PATH)
+    ann_model.load_platt_scaling(PLATT_PARAMS_PATH)
+    legacy = legacy_predict_with_platt_scaling(ann_model.model, ann_model.num_classes, None, val_logits, val_labels)
+
+    rng = np.random.default_rng(42)
+    for batch_size in (1, 256):
+        X = np.zeros((batch_size, ann_model.model.input_shape[1]), dtype=np.float32)
+        X[np.arange(batch_size)[:, None], rng.integers(0, X.shape[1], size=(batch_size, 9))] = 1.0
+
+        max_diff = float(np.max(np.abs(legacy(X) - ann_model.predict_with_platt_scaling(X))))
+        before = time_per_call(legacy, X, repeats=10)
+        after = time_per_call(ann_model.predict_with_platt_scaling, X, repeats=200)
+        print(f"batch={batch_size:4d}  before={before:8.2f} ms  after={after:7.3f} ms  "
+              f"speedup={before / after:6.1f}x  max|dp|={max_diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Cost of a /predict/sensitivity sweep compared with one prediction and 36 separate ones.
+
+The model-only numbers cover encoding, the forward pass and Platt
+calibration. The end-to-end numbers go through the in-process test client
+with the prediction cache disabled, so every /predict call runs the model.
+Run from the backend directory:
+    python -m benchmarks.bench_sensitivity
+"""
+import os
+import numpy as np
+from benchmarks.suite import median_seconds
+
+os.environ.setdefault("GEOTEXTILE_PREDICTION_CACHE_SIZE", "0")
+os.environ.setdefault("GEOTEXTILE_LOG_SAMPLE_RATE", "0")
+
+
+def main(repeats=200):
+    from fastapi.testclient import TestClient
+    import app
+    from utils.sensitivity import perturbation_codes, analyze_perturbations
+
+    rng = np.random.default_rng(42)
+    with TestClient(app.app) as client:
+        artifacts = app.app.state.artifacts
+        schema = artifacts.feature_schema
+        codes = rng.integers(0, len(schema.levels), size=len(schema.cluster_columns))
+        clusters = {column: schema.levels[code] for column, code in zip(schema.cluster_columns, codes)}
+        matrix, columns, levels = perturbation_codes(codes, len(schema.levels))
+        variants = [
+            {column: schema.levels[code] for column, code in zip(schema.cluster_columns, row)} for row in matrix[1:]
+        ]
+
+        def sweep():
+            probabilities = artifacts.predict_probabilities(schema.encode_codes(matrix))
+            analyze_perturbations(probabilities, codes, columns, levels)
+
+        rows = [
+            ("model: 1 prediction", median_seconds(lambda: artifacts.predict_probabilities(schema.encode(clusters)), repeats)),
+            (f"model: {len(matrix)}-row sweep", median_seconds(sweep, repeats)),
+            (f"model: {len(variants)} separate predictions", median_seconds(
+                lambda: [artifacts.predict_probabilities(schema.encode(variant)) for variant in variants], repeats // 10
+            )),
+            ("http: POST /predict", median_seconds(lambda: client.post("/predict", json={"clusters": clusters}), repeats)),
+            ("http: POST /predict/sensitivity", median_seconds(
+                lambda: client.post("/predict/sensitivity", json={"clusters": clusters}), repeats
+            )),
+            (f"http: {len(variants)} x POST /predict", median_seconds(
+                lambda: [client.post("/predict", json={"clusters": variant}) for variant in variants], repeats // 10
+            )),
+        ]
+
+    print(f"{'scenario':<36} {'median ms':>10}")
+    for name, seconds in rows:
+        print(f"{name:<36} {seconds * 1000:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
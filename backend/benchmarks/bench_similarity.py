@@ -0,0 +1,86 @@
+"""Build time, size and query latency of the similar-products index at catalog scale.
+
+For each size, synthetic property rows spanning every cluster bin (see
+bench_clustering) are indexed with `SimilarityIndex.build`, saved and loaded
+memory-mapped. Reported per size:
+- build and save time;
+- file size and resident memory after loading and querying;
+- load time, excluding the one-time scikit-learn import;
+- single-row and batched query latency for raw properties and cluster codes.
+Run from the backend directory:
+    python -m benchmarks.bench_similarity [--rows 2000 10000000] [--k 5]
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from benchmarks.bench_clustering import synthetic_properties
+from benchmarks.suite import median_seconds
+from models.similarity_index import SimilarityIndex
+from utils.metrics import resident_memory_bytes
+from dataset.constants import PROPERTY_COLUMNS, CLUSTER_COLUMNS, CLUSTER_LEVELS
+
+
+def run_size(rows, k, workdir, rng):
+    values = synthetic_properties(rows, rng)[PROPERTY_COLUMNS].to_numpy(dtype=np.float64)
+    types = rng.integers(0, 9, size=rows)
+    path = os.path.join(workdir, f"similarity_{rows}.joblib")
+
+    start = time.perf_counter()
+    index = SimilarityIndex.build(values, [f"type {i}" for i in range(9)], types)
+    build_s = time.perf_counter() - start
+    start = time.perf_counter()
+    index.save(path)
+    save_s = time.perf_counter() - start
+    del index
+
+    queries = values[rng.integers(0, rows, size=1000)] * rng.uniform(0.9, 1.1, size=(1000, len(PROPERTY_COLUMNS)))
+    codes = rng.integers(0, len(CLUSTER_LEVELS), size=(1000, len(CLUSTER_COLUMNS)))
+    del values, types
+
+    rss_before = resident_memory_bytes()
+    load_s = median_seconds(lambda: SimilarityIndex.load(path), 5)
+    index = SimilarityIndex.load(path)
+    result = {
+        "rows": rows,
+        "build_s": build_s,
+        "save_s": save_s,
+        "file_mb": os.path.getsize(path) / 1e6,
+        "load_ms": load_s * 1000,
+        "properties_us": median_seconds(lambda: index.query_properties(queries[:1], k), 200) * 1e6,
+        "codes_us": median_seconds(lambda: index.query_codes(codes[:1], k), 200) * 1e6,
+        "batch_us_per_row": median_seconds(lambda: index.query_properties(queries, k), 5) * 1e6 / len(queries),
+        "format_us": median_seconds(lambda: index.neighbors(*index.query_properties(queries[:1], k)), 200) * 1e6,
+    }
+    # Pages touched by the queries above, not the whole mapped file
+    result["resident_mb"] = (resident_memory_bytes() - rss_before) / 1e6
+    return result
+
+
+def main(sizes, k):
+    # Pay the scikit-learn import once, outside the load timings
+    import sklearn.neighbors  # noqa: F401
+
+    rng = np.random.default_rng(42)
+    results = []
+    with tempfile.TemporaryDirectory(prefix="geotextile-similarity-") as workdir:
+        for rows in sizes:
+            results.append(run_size(rows, k, workdir, rng))
+            print(f"indexed {rows:,} rows in {results[-1]['build_s']:.1f} s")
+
+    print(f"{'rows':>11} {'build s':>8} {'save s':>7} {'file MB':>8} {'load ms':>8} {'RSS MB':>7} "
+          f"{'props us':>9} {'codes us':>9} {'batch us/row':>12} {'+format us':>10}")
+    for r in results:
+        print(f"{r['rows']:>11,} {r['build_s']:>8.2f} {r['save_s']:>7.2f} {r['file_mb']:>8.1f} {r['load_ms']:>8.2f} "
+              f"{r['resident_mb']:>7.1f} {r['properties_us']:>9.1f} {r['codes_us']:>9.1f} "
+              f"{r['batch_us_per_row']:>12.2f} {r['format_us']:>10.1f}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the similar-products index")
+    parser.add_argument("--rows", type=int, nargs="+", default=[2000, 10_000_000])
+    parser.add_argument("--k", type=int, default=5, help="Neighbors per query")
+    args = parser.parse_args()
+    main(args.rows, args.k)
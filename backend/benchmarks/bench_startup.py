@@ -0,0 +1,62 @@
+"""Cold-start time of the API: fresh interpreter -> import app -> startup -> first prediction.
+
+Each run uses a new Python process so module imports and artifact loading
+are measured from scratch; creating the in-process test client is excluded.
+Run from the backend directory:
+    python -m benchmarks.bench_startup [--runs 5]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Executed in a child interpreter; prints stage timings as JSON
+CHILD_SCRIPT = r"""
+import json, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+client = TestClient(app.app)
+t_client = time.perf_counter()
+client.__enter__()
+t2 = time.perf_counter()
+from dataset.constants import CLUSTER_COLUMNS
+clusters = {column: "C3" for column in CLUSTER_COLUMNS}
+response = client.post("/predict", json={"clusters": clusters})
+assert response.status_code == 200, response.text
+t3 = time.perf_counter()
+client.__exit__(None, None, None)
+print(json.dumps({
+    "import": t1 - t0, "startup": t2 - t_client, "first_prediction": t3 - t2,
+    "total": (t1 - t0) + (t3 - t_client)
+}))
+"""
+
+
+def run_once(env):
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    runs = [run_once(env) for _ in range(args.runs)]
+    for stage in ("import", "startup", "first_prediction", "total"):
+        values = np.array([run[stage] for run in runs]) * 1000
+        print(f"{stage:>16}: median={np.median(values):8.1f} ms  min={values.min():8.1f} ms  max={values.max():8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
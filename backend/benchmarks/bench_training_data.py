@@ -0,0 +1,115 @@
+"""Peak memory and throughput of the two training data paths.
+
+"dataframe" is the `train.main` path: pandas clustering, `pd.get_dummies`
+features and a float64 one-hot label matrix, all in memory and passed to
+`model.fit`. "sharded" is the `train.main_sharded` path: the CSV is streamed
+into uint8 code / integer label shards, then fed through the prefetching
+tf.data pipeline with a sparse categorical loss.
+
+Each path runs in a fresh process on a synthetic dataset (rows resampled
+from geotextile.csv with measurement noise) for a fixed number of epochs
+without early stopping. Reports data preparation time, training samples/s
+and peak RSS. Run from the backend directory:
+    python -m benchmarks.bench_training_data [--rows 200000 1000000] [--epochs 1]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+from dataset.constants import DATASET_PATH, PROPERTY_COLUMNS
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Executed in a child interpreter; prints timings and peak RSS as JSON
+CHILD_SCRIPT = r"""
+import json, os, resource, sys, time
+path, epochs, batch_size, shards_dir = sys.argv[1], int(sys.argv[2]), int(sys.argv[3]), sys.argv[4]
+import numpy as np, pandas as pd, tensorflow as tf
+from sklearn.model_selection import train_test_split
+from models.ann_model import ANNModel
+from preprocessors.data_preprocessor import DataPreprocessor
+from preprocessors.feature_schema import FeatureSchema
+from preprocessors.shards import write_shards, make_dataset
+from dataset.constants import CLUSTER_COLUMNS, DATASET_PATH
+tf.keras.utils.set_random_seed(42)
+
+t0 = time.perf_counter()
+if path == "dataframe":
+    preprocessor = DataPreprocessor()
+    df = preprocessor.assign_clusters(preprocessor.load_data())
+    y = preprocessor.encode_labels(df[preprocessor.target_column].values)
+    X = pd.get_dummies(df[CLUSTER_COLUMNS], columns=CLUSTER_COLUMNS)
+    X_train, X_temp, y_train, y_temp = train_test_split(X, y, test_size=0.3, random_state=42)
+    X_val, X_test, y_val, y_test = train_test_split(X_temp, y_temp, test_size=0.5, random_state=42)
+    train_rows, num_features, num_classes = len(X_train), X.shape[1], y.shape[1]
+    fit_args = dict(x=X_train, y=y_train, validation_data=(X_val, y_val), batch_size=batch_size)
+    sparse = False
+else:
+    manifest = write_shards(DATASET_PATH, shards_dir)
+    schema = FeatureSchema.from_level_counts(manifest["level_counts"])
+    train_rows, num_features, num_classes = manifest["splits"]["train"]["rows"], schema.num_features, len(manifest["class_names"])
+    fit_args = dict(
+        x=make_dataset(shards_dir, "train", schema, batch_size),
+        validation_data=make_dataset(shards_dir, "val", schema, batch_size, shuffle=False)
+    )
+    sparse = True
+t1 = time.perf_counter()
+
+ann_model = ANNModel(input_dim=num_features, num_classes=num_classes)
+ann_model.build_model()
+ann_model.compile_model(sparse_labels=sparse)
+ann_model.model.fit(epochs=epochs, verbose=0, **fit_args)
+t2 = time.perf_counter()
+print(json.dumps({
+    "prepare_s": t1 - t0, "fit_s": t2 - t1, "train_rows": train_rows,
+    "samples_per_s": train_rows * epochs / (t2 - t1),
+    "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+}))
+"""
+
+
+def make_synthetic_csv(rows, path, seed=42):
+    """Resample the dataset to `rows` rows, jittering each measurement by up to +/-10%."""
+    rng = np.random.default_rng(seed)
+    base = pd.read_csv(DATASET_PATH)
+    sample = base.iloc[rng.integers(0, len(base), rows)].reset_index(drop=True)
+    noise = rng.uniform(0.9, 1.1, size=(rows, len(PROPERTY_COLUMNS)))
+    sample[PROPERTY_COLUMNS] = np.round(sample[PROPERTY_COLUMNS].to_numpy() * noise, 3)
+    sample.to_csv(path, index=False)
+
+
+def run_path(path, csv_path, epochs, batch_size, workdir):
+    env = dict(os.environ, GEOTEXTILE_DATASET_PATH=csv_path, TF_CPP_MIN_LOG_LEVEL="2")
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT, path, str(epochs), str(batch_size), os.path.join(workdir, "shards")],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[200000, 1000000])
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'path':>9} {'prepare s':>10} {'fit s':>8} {'samples/s':>10} {'peak RSS':>10}")
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory(prefix="geotextile-bench-") as workdir:
+            csv_path = os.path.join(workdir, "synthetic.csv")
+            make_synthetic_csv(rows, csv_path)
+            for path in ("dataframe", "sharded"):
+                result = run_path(path, csv_path, args.epochs, args.batch_size, workdir)
+                print(
+                    f"{rows:>9} {path:>9} {result['prepare_s']:>10.1f} {result['fit_s']:>8.1f} "
+                    f"{result['samples_per_s']:>10,.0f} {result['peak_rss_mb']:>7.0f} MB"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Cost and usefulness of Monte Carlo dropout uncertainty.
+
+Reported:
+- latency of `predict_uncertainty` (all samples in one stacked forward) vs.
+  one deterministic `predict_probabilities` call and vs. a loop of separate
+  stochastic passes, per batch size and sample count;
+- end-to-end /predict p50 with and without "uncertainty" through the
+  in-process test client;
+- mutual information on the dataset rows vs. random cluster combinations
+  never seen in training, and the share of each flagged for review at
+  UNCERTAINTY_REVIEW_THRESHOLD.
+Run from the backend directory:
+    python -m benchmarks.bench_uncertainty [--batch-sizes 1 100 1000] [--samples 8 32 64]
+"""
+import argparse
+import os
+import time
+import numpy as np
+from benchmarks.suite import median_seconds
+
+os.environ.setdefault("GEOTEXTILE_LOG_SAMPLE_RATE", "0")
+
+
+def looped_uncertainty(artifacts, X_input, samples, rng):
+    """The same estimate from `samples` separate single-sample passes."""
+    from utils.uncertainty import predictive_uncertainty
+
+    X_scaled = artifacts.scaler.transform(X_input)
+    return predictive_uncertainty(np.stack([
+        artifacts.model.calibrator.transform(artifacts.model.predict_logits_mc(X_scaled, 1, rng)[0])
+        for _ in range(samples)
+    ]))
+
+
+def model_latency(artifacts, codes, batch_sizes, sample_counts, rng):
+    rows = []
+    for batch_size in batch_sizes:
+        X_input = artifacts.feature_schema.encode_codes(codes[:batch_size])
+        repeats = max(5, 2000 // batch_size)
+        single = median_seconds(lambda: artifacts.predict_probabilities(X_input), repeats) * 1000
+        for samples in sample_counts:
+            stacked = median_seconds(lambda: artifacts.predict_uncertainty(X_input, samples, rng=rng), repeats) * 1000
+            looped = median_seconds(lambda: looped_uncertainty(artifacts, X_input, samples, rng), max(3, repeats // 10)) * 1000
+            rows.append((batch_size, samples, single, stacked, looped))
+    return rows
+
+
+def http_latency(codes, requests):
+    from fastapi.testclient import TestClient
+    import app
+    from dataset.constants import CLUSTER_COLUMNS, CLUSTER_LEVELS
+
+    bodies = [{"clusters": dict(zip(CLUSTER_COLUMNS, (CLUSTER_LEVELS[c] for c in row)))} for row in codes[:requests].tolist()]
+    results = {}
+    with TestClient(app.app) as client:
+        for uncertainty in (False, True):
+            times = []
+            for body in bodies:
+                start = time.perf_counter()
+                response = client.post("/predict", json={**body, "uncertainty": uncertainty})
+                times.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.text[:200]
+            results[uncertainty] = (np.percentile(times, 50) * 1000, np.percentile(times, 99) * 1000)
+    return results
+
+
+def separation(artifacts, dataset_codes, rng, unseen_rows=20000):
+    """Mutual information on dataset rows vs. cluster combinations absent from the dataset."""
+    seen = set(map(tuple, np.unique(dataset_codes, axis=0).tolist()))
+    candidates = rng.integers(0, len(artifacts.feature_schema.levels), size=(unseen_rows, dataset_codes.shape[1]))
+    unseen = candidates[[tuple(row) not in seen for row in candidates.tolist()]]
+    _, _, dataset_mi = artifacts.predict_uncertainty(artifacts.feature_schema.encode_codes(dataset_codes), rng=rng)
+    _, _, unseen_mi = artifacts.predict_uncertainty(artifacts.feature_schema.encode_codes(unseen), rng=rng)
+    return dataset_mi, unseen_mi
+
+
+def main(batch_sizes, sample_counts, requests):
+    from utils.loaders import load_serving_artifacts
+    from preprocessors.dataset_cache import load_encoded_dataset
+    from dataset.constants import UNCERTAINTY_REVIEW_THRESHOLD
+
+    rng = np.random.default_rng(42)
+    artifacts = load_serving_artifacts()
+    dataset_codes = np.asarray(load_encoded_dataset().codes)
+    codes = dataset_codes[rng.integers(0, len(dataset_codes), size=max(max(batch_sizes), requests))]
+
+    print(f"{'batch':>6} {'samples':>8} {'1 pass ms':>10} {'stacked ms':>11} {'x 1 pass':>9} {'looped ms':>10}")
+    for batch_size, samples, single, stacked, looped in model_latency(artifacts, codes, batch_sizes, sample_counts, rng):
+        print(f"{batch_size:>6} {samples:>8} {single:>10.3f} {stacked:>11.3f} {stacked / single:>9.1f} {looped:>10.3f}")
+
+    results = http_latency(codes, requests)
+    print(f"\n/predict p50 / p99: {results[False][0]:.3f} / {results[False][1]:.3f} ms without uncertainty, "
+          f"{results[True][0]:.3f} / {results[True][1]:.3f} ms with it")
+
+    dataset_mi, unseen_mi = separation(artifacts, dataset_codes, rng)
+    print(f"\n{'inputs':<22} {'rows':>7} {'MI p50':>7} {'MI p90':>7} {'MI p99':>7} {'flagged':>8}")
+    for name, mi in (("dataset rows", dataset_mi), ("unseen combinations", unseen_mi)):
+        p50, p90, p99 = np.percentile(mi, [50, 90, 99])
+        print(f"{name:<22} {len(mi):>7} {p50:>7.3f} {p90:>7.3f} {p99:>7.3f} "
+              f"{np.mean(mi > UNCERTAINTY_REVIEW_THRESHOLD):>8.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Monte Carlo dropout uncertainty")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--samples", type=int, nargs="+", default=[8, 32, 64])
+    parser.add_argument("--requests", type=int, default=1000, help="/predict requests per measurement")
+    args = parser.parse_args()
+    main(args.batch_sizes, args.samples, args.requests)
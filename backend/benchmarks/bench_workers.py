@@ -0,0 +1,143 @@
+"""Memory of the API served by 1, 4 and 16 uvicorn workers.
+
+Starts `python app.py --workers N` for each worker count, waits until every
+worker answers, then reads RSS and PSS (proportional set size: shared pages
+split between the processes mapping them) from /proc for the supervisor and
+each worker. Total RSS double-counts shared pages; total PSS is the node's
+actual footprint. Linux only. Run from the backend directory:
+    python -m benchmarks.bench_workers [--workers 1 4 16] [--shared 0 1]
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import httpx
+from dataset.constants import CLUSTER_COLUMNS, SERVING_BUNDLE_PATH
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def child_pids(pid):
+    """Direct children of `pid`, found by scanning /proc."""
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces; fields resume after its closing ")"
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    return children
+
+
+def worker_pids(server_pid, workers):
+    """The processes serving requests: the server itself for one worker, else its spawned children."""
+    if workers == 1:
+        return [server_pid]
+    pids = []
+    for pid in child_pids(server_pid):
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                cmdline = f.read()
+        except OSError:
+            continue
+        # Skip helpers such as multiprocessing's resource tracker
+        if b"spawn_main" in cmdline:
+            pids.append(pid)
+    return pids
+
+
+def memory_kb(pid):
+    """RSS and PSS of a process, plus PSS of its mapping of the serving bundle, in kB."""
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        rollup = {line.split(":")[0]: int(line.split()[1]) for line in f if line.split()[-1] == "kB"}
+    bundle_pss = 0
+    with open(f"/proc/{pid}/smaps") as f:
+        in_bundle = False
+        for line in f:
+            if "-" in line.split()[0]:
+                in_bundle = line.rstrip().endswith(SERVING_BUNDLE_PATH)
+            elif in_bundle and line.startswith("Pss:"):
+                bundle_pss += int(line.split()[1])
+    return rollup["Rss"], rollup["Pss"], bundle_pss
+
+
+def measure(workers, shared, timeout):
+    port = free_port()
+    env = dict(os.environ, GEOTEXTILE_SHARED_ARTIFACTS="1" if shared else "0")
+    server = subprocess.Popen(
+        [sys.executable, "app.py", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        clusters = {column: "C3" for column in CLUSTER_COLUMNS}
+        deadline = time.perf_counter() + timeout
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+            while True:
+                if time.perf_counter() > deadline:
+                    raise RuntimeError(f"{workers} workers did not start within {timeout}s")
+                try:
+                    client.get("/welcome")
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.2)
+            # Wait for all workers to finish their lifespan startup, then touch them with traffic
+            while len(worker_pids(server.pid, workers)) < workers and time.perf_counter() < deadline:
+                time.sleep(0.2)
+            time.sleep(1.0)
+            for _ in range(8 * workers):
+                client.post("/predict", json={"clusters": clusters}).raise_for_status()
+
+        pids = worker_pids(server.pid, workers)
+        per_worker = [memory_kb(pid) for pid in pids]
+        # Everything else in the process tree (supervisor, resource tracker) counts towards the node total
+        others = [memory_kb(pid) for pid in [server.pid, *child_pids(server.pid)] if pid not in pids]
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    total_rss = sum(rss for rss, _, _ in per_worker + others)
+    total_pss = sum(pss for _, pss, _ in per_worker + others)
+    n = max(len(per_worker), 1)
+    return {
+        "workers": workers,
+        "processes": len(per_worker),
+        "worker_rss_mb": sum(rss for rss, _, _ in per_worker) / n / 1024,
+        "worker_pss_mb": sum(pss for _, pss, _ in per_worker) / n / 1024,
+        "bundle_pss_kb": sum(bundle for _, _, bundle in per_worker),
+        "total_rss_mb": total_rss / 1024,
+        "total_pss_mb": total_pss / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--shared", type=int, nargs="+", default=[0, 1], help="1 maps the serving bundle")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    print(f"{'shared':>6} {'workers':>7} {'RSS/worker':>11} {'PSS/worker':>11} {'bundle PSS':>11} {'total RSS':>10} {'total PSS':>10}")
+    for shared in args.shared:
+        for workers in args.workers:
+            result = measure(workers, bool(shared), args.timeout)
+            print(
+                f"{shared:>6} {result['processes']:>7} {result['worker_rss_mb']:>8.1f} MB {result['worker_pss_mb']:>8.1f} MB "
+                f"{result['bundle_pss_kb']:>8d} kB {result['total_rss_mb']:>7.1f} MB {result['total_pss_mb']:>7.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Load test for /predict with and without micro-batching.
+
+Drives the app in-process through an ASGI client at several concurrency
+levels and reports throughput and p50/p99 latency. Each mode runs in a fresh
+interpreter because serving options are read from the environment at import.
+The prediction cache is disabled so every request reaches the model.
+Run from the backend directory:
+    python -m benchmarks.load_test [--requests 2000] [--concurrency 1 16 128]
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def run_level(app, concurrency, total_requests, payloads):
+    import httpx
+
+    latencies = []
+    per_client = max(1, total_requests // concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        async def worker(worker_id):
+            for i in range(per_client):
+                payload = payloads[(worker_id * per_client + i) % len(payloads)]
+                start = time.perf_counter()
+                response = await client.post("/predict", json=payload)
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.text
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(w) for w in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies = np.array(latencies) * 1000
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99))
+    }
+
+
+async def child(args):
+    import app as app_module
+    from dataset.constants import CLUSTER_COLUMNS, CLUSTER_LEVELS
+
+    rng = np.random.default_rng(42)
+    payloads = [
+        {"clusters": {column: CLUSTER_LEVELS[rng.integers(len(CLUSTER_LEVELS))] for column in CLUSTER_COLUMNS}}
+        for _ in range(1000)
+    ]
+    results = []
+    async with app_module.app.router.lifespan_context(app_module.app):
+        batcher = app_module.app.state.batcher
+        for concurrency in args.concurrency:
+            before = batcher.stats() if batcher is not None else None
+            result = await run_level(app_module.app, concurrency, args.requests, payloads)
+            if batcher is not None:
+                after = batcher.stats()
+                result["mean_batch_size"] = (after["items"] - before["items"]) / max(1, after["batches"] - before["batches"])
+            results.append(result)
+    print(json.dumps(results))
+
+
+def run_mode(batching, requests, concurrency):
+    """Run every concurrency level in a fresh interpreter with micro-batching on ("1") or off ("0")."""
+    env = dict(os.environ, GEOTEXTILE_MICRO_BATCHING=batching, GEOTEXTILE_PREDICTION_CACHE_SIZE="0")
+    command = [sys.executable, "-m", "benchmarks.load_test", "--child", "--requests", str(requests),
+               "--concurrency", *map(str, concurrency)]
+    output = subprocess.run(command, cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 128])
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        asyncio.run(child(args))
+        return
+
+    for batching in ("0", "1"):
+        results = run_mode(batching, args.requests, args.concurrency)
+        print(f"micro-batching {'on' if batching == '1' else 'off'}:")
+        for result in results:
+            line = (f"  clients={result['concurrency']:4d}  {result['throughput_rps']:8.1f} req/s  "
+                    f"p50={result['p50_ms']:7.2f} ms  p99={result['p99_ms']:7.2f} ms")
+            if "mean_batch_size" in result:
+                line += f"  mean batch={result['mean_batch_size']:5.1f}"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
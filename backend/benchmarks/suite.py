@@ -0,0 +1,300 @@
+"""Repeatable benchmark suite for preprocessing, inference, serving and training.
+
+Scenarios (all offline and CPU-only, on synthetic rows derived from the
+dataset's cluster thresholds and geotextile.csv):
+    clustering  `assign_clusters`, `cluster_codes`, `pd.get_dummies` and
+                `encode_codes` one-hot encoding at several row counts
+    inference   `predict_with_platt_scaling` for one row and for batches,
+                with the NumPy and Keras engines
+    startup     cold start of the API in a fresh interpreter (see bench_startup)
+    serving     end-to-end /predict through an in-process ASGI client at
+                several concurrency levels, micro-batching off and on (see load_test)
+    training    one epoch of the in-memory and the sharded training paths
+                (see bench_training_data)
+
+Every metric is the median of `--repeats` runs and records whether lower
+or higher is better. `run` writes the results and the environment they were
+measured on to JSON; `compare` flags every metric that got worse than a
+stored baseline by more than `--threshold` (relative) and exits with status
+1 if any did. Baselines are machine-specific: record one on the machine
+that will run the comparison. Run from the backend directory:
+    python -m benchmarks.suite run --output results.json [--quick] [--only clustering inference]
+    python -m benchmarks.suite compare results.json baseline.json [--threshold 0.15]
+    python -m benchmarks.suite run --output results.json --baseline baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = ("clustering", "inference", "startup", "serving", "training")
+
+# Sizes per scenario; --quick trades coverage for a run of about a minute
+FULL = {
+    "clustering_rows": [10_000, 100_000, 1_000_000],
+    "inference_batches": [1, 64, 1024],
+    "startup_runs": 5,
+    "serving_requests": 2000,
+    "serving_concurrency": [1, 16, 64],
+    "training_rows": 200_000,
+}
+QUICK = {
+    "clustering_rows": [10_000, 100_000],
+    "inference_batches": [1, 64],
+    "startup_runs": 3,
+    "serving_requests": 500,
+    "serving_concurrency": [1, 16],
+    "training_rows": 20_000,
+}
+
+
+def metric(name, values, unit, better="lower"):
+    """Summarize repeated measurements of one metric; `value` (the median) is what gets compared."""
+    values = np.asarray(values, dtype=np.float64)
+    return {
+        "name": name, "unit": unit, "better": better, "value": float(np.median(values)),
+        "min": float(values.min()), "max": float(values.max()), "repeats": int(values.size)
+    }
+
+
+def time_repeats(fn, repeats, warmup=1):
+    """Wall-clock seconds of `repeats` calls to `fn`, after `warmup` untimed calls."""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def median_seconds(fn, repeats, warmup=0):
+    """Median wall-clock seconds of one call to `fn` over `repeats` timed calls."""
+    return float(np.median(time_repeats(fn, repeats, warmup)))
+
+
+# =====================
+# Scenarios
+# =====================
+def bench_clustering(sizes, repeats):
+    import pandas as pd
+    from benchmarks.bench_clustering import synthetic_properties
+    from preprocessors.data_preprocessor import DataPreprocessor
+    from preprocessors.feature_schema import FeatureSchema
+    from dataset.constants import CLUSTER_COLUMNS, FEATURE_SCHEMA_PATH
+
+    rng = np.random.default_rng(42)
+    preprocessor = DataPreprocessor()
+    schema = FeatureSchema.load(FEATURE_SCHEMA_PATH)
+    results = []
+    for rows in sizes["clustering_rows"]:
+        df = synthetic_properties(rows, rng)
+        values = df[preprocessor.feature_columns].to_numpy()
+        codes = preprocessor.cluster_codes(values)
+        clustered = preprocessor.assign_clusters(df.copy())[CLUSTER_COLUMNS]
+        for name, fn in (
+            ("assign_clusters", lambda: preprocessor.assign_clusters(df.copy())),
+            ("cluster_codes", lambda: preprocessor.cluster_codes(values)),
+            ("get_dummies", lambda: pd.get_dummies(clustered, columns=CLUSTER_COLUMNS)),
+            ("encode_codes", lambda: schema.encode_codes(codes)),
+        ):
+            times = time_repeats(fn, repeats)
+            results.append(metric(f"clustering.{name}.rows={rows}", [rows / t for t in times], "rows/s", "higher"))
+    return results
+
+
+def bench_inference(sizes, repeats):
+    from utils.loaders import load_serving_artifacts
+
+    rng = np.random.default_rng(42)
+    results = []
+    for backend in ("numpy", "keras"):
+        artifacts = load_serving_artifacts(backend=backend, shared=False)
+        codes = rng.integers(0, len(artifacts.feature_schema.levels), size=(max(sizes["inference_batches"]), 9))
+        X = artifacts.scaler.transform(artifacts.feature_schema.encode_codes(codes))
+        for batch_size in sizes["inference_batches"]:
+            batch = X[:batch_size]
+            # Enough calls per timing that sub-millisecond batches are not dominated by timer noise
+            calls = max(1, 2000 // batch_size) if backend == "numpy" else max(1, 200 // batch_size)
+
+            def run():
+                for _ in range(calls):
+                    artifacts.model.predict_with_platt_scaling(batch)
+
+            times = time_repeats(run, repeats)
+            results.append(metric(
+                f"inference.{backend}.batch={batch_size}", [t / calls * 1000 for t in times], "ms/call"
+            ))
+    return results
+
+
+def bench_startup(sizes, repeats):
+    from benchmarks.bench_startup import run_once
+
+    env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL="2")
+    runs = [run_once(env) for _ in range(sizes["startup_runs"])]
+    return [
+        metric(f"startup.{stage}", [run[stage] * 1000 for run in runs], "ms")
+        for stage in ("import", "startup", "first_prediction", "total")
+    ]
+
+
+def bench_serving(sizes, repeats):
+    from benchmarks.load_test import run_mode
+
+    results = []
+    for batching in ("0", "1"):
+        mode = "batched" if batching == "1" else "unbatched"
+        runs = [run_mode(batching, sizes["serving_requests"], sizes["serving_concurrency"]) for _ in range(repeats)]
+        for level, _ in enumerate(sizes["serving_concurrency"]):
+            level_runs = [run[level] for run in runs]
+            concurrency = level_runs[0]["concurrency"]
+            prefix = f"serving.{mode}.clients={concurrency}"
+            results.append(metric(f"{prefix}.throughput", [r["throughput_rps"] for r in level_runs], "req/s", "higher"))
+            results.append(metric(f"{prefix}.p50", [r["p50_ms"] for r in level_runs], "ms"))
+            results.append(metric(f"{prefix}.p99", [r["p99_ms"] for r in level_runs], "ms"))
+    return results
+
+
+def bench_training(sizes, repeats):
+    from benchmarks.bench_training_data import make_synthetic_csv, run_path
+
+    rows = sizes["training_rows"]
+    results = []
+    with tempfile.TemporaryDirectory(prefix="geotextile-suite-") as workdir:
+        csv_path = os.path.join(workdir, "synthetic.csv")
+        make_synthetic_csv(rows, csv_path)
+        for path in ("dataframe", "sharded"):
+            runs = [run_path(path, csv_path, 1, 256, workdir) for _ in range(repeats)]
+            prefix = f"training.{path}.rows={rows}"
+            results.append(metric(f"{prefix}.samples_per_s", [r["samples_per_s"] for r in runs], "samples/s", "higher"))
+            results.append(metric(f"{prefix}.prepare", [r["prepare_s"] for r in runs], "s"))
+            results.append(metric(f"{prefix}.peak_rss", [r["peak_rss_mb"] for r in runs], "MB"))
+    return results
+
+
+BENCHMARKS = {
+    "clustering": bench_clustering,
+    "inference": bench_inference,
+    "startup": bench_startup,
+    "serving": bench_serving,
+    "training": bench_training,
+}
+
+
+# =====================
+# Results
+# =====================
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    import pandas as pd
+    import sklearn
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print per-metric changes against `baseline`; return the names of regressed metrics."""
+    baseline_metrics = {m["name"]: m for m in baseline["metrics"]}
+    regressions = []
+    print(f"{'metric':<52} {'baseline':>12} {'current':>12} {'change':>8}")
+    for m in results["metrics"]:
+        base = baseline_metrics.get(m["name"])
+        if base is None or base["value"] == 0:
+            print(f"{m['name']:<52} {'-':>12} {m['value']:>12.4g} {'new':>8}")
+            continue
+        change = (m["value"] - base["value"]) / base["value"]
+        # Positive `worse` means the metric moved in its bad direction
+        worse = change if m["better"] == "lower" else -change
+        flag = ""
+        if worse > threshold:
+            regressions.append(m["name"])
+            flag = "  REGRESSION"
+        print(f"{m['name']:<52} {base['value']:>12.4g} {m['value']:>12.4g} {change:>+8.1%}{flag}")
+    missing = sorted(set(baseline_metrics) - {m["name"] for m in results["metrics"]})
+    for name in missing:
+        print(f"{name:<52} {baseline_metrics[name]['value']:>12.4g} {'-':>12} {'missing':>8}")
+    print(f"{len(regressions)} regression(s) beyond {threshold:.0%}")
+    return regressions
+
+
+def run(args):
+    sizes = QUICK if args.quick else FULL
+    results = {"environment": environment(), "quick": args.quick, "repeats": args.repeats, "metrics": []}
+    for scenario in args.only or SCENARIOS:
+        start = time.perf_counter()
+        metrics = BENCHMARKS[scenario](sizes, args.repeats)
+        results["metrics"].extend(metrics)
+        print(f"{scenario}: {len(metrics)} metrics in {time.perf_counter() - start:.1f} s")
+        for m in metrics:
+            print(f"  {m['name']:<50} {m['value']:>12.4g} {m['unit']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.output}")
+    return results
+
+
+def main():
+    os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+    parser = argparse.ArgumentParser(description="Benchmark suite with JSON results and baseline comparison")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks and write results to JSON")
+    run_parser.add_argument("--output", help="Results JSON path")
+    run_parser.add_argument("--only", nargs="+", choices=SCENARIOS, help="Run only these scenarios")
+    run_parser.add_argument("--quick", action="store_true", help="Smaller sizes for a fast smoke run")
+    run_parser.add_argument("--repeats", type=int, default=5, help="Runs per metric (median is reported)")
+    run_parser.add_argument("--baseline", help="Compare against this results JSON after running")
+    run_parser.add_argument("--threshold", type=float, default=0.15, help="Relative slowdown flagged as a regression")
+
+    compare_parser = subparsers.add_parser("compare", help="Compare a results JSON against a baseline")
+    compare_parser.add_argument("results")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("--threshold", type=float, default=0.15, help="Relative slowdown flagged as a regression")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        results = run(args)
+        if not args.baseline:
+            return
+    else:
+        with open(args.results, "r") as f:
+            results = json.load(f)
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f)
+    if baseline.get("quick") != results.get("quick"):
+        print("Warning: results and baseline were measured with different --quick settings")
+    if compare(results, baseline, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Precompute predictions for every cluster combination and report what the table costs.
+
+The inputs are 9 cluster columns with 5 levels each, so the whole input
+space is 5^9 = 1,953,125 tuples. Every tuple is scored once with the served
+model and Platt calibration. The scores go into models/prediction_table.npy,
+indexed by the base-5 encoding of the tuple (see models/prediction_table.py).
+The modes are:
+    full  float16 probability vector per row (~35 MB); /predict and /recommend
+          read one row instead of running the model
+    top1  uint8 class + float16 confidence per row (~5.9 MB); /predict only
+Blocks are scored in a process pool that writes straight into the mapped
+output file. Serving uses the table only with GEOTEXTILE_PREDICTION_TABLE=1
+and only while the loaded artifacts match the version the table was built
+from. Rebuild after train.py or when changing GEOTEXTILE_INFERENCE_BACKEND.
+
+The report covers build time, file size, and table agreement with live
+inference on sampled rows. It also compares single-request lookup latency
+with a live encode + forward pass.
+
+Usage (from the backend directory):
+    python build_prediction_table.py [--mode full|top1] [--workers 4] [--version-dir models/versions/<name>]
+"""
+import argparse
+import os
+import time
+import numpy as np
+from models.prediction_table import MODES, PredictionTable, build_prediction_table, decode_indices
+from utils.loaders import load_serving_artifacts
+from utils.versions import artifact_path
+from benchmarks.suite import median_seconds
+from dataset.constants import PREDICTION_TABLE_PATH, PREDICTION_TABLE_META_PATH
+
+
+def report(table, artifacts, path, meta_path, build_s, samples=20000, lookups=2000):
+    """Print build cost, footprint, agreement with live inference and per-request latency."""
+    schema = artifacts.feature_schema
+    rng = np.random.default_rng(42)
+    indices = rng.choice(len(table.table), size=min(samples, len(table.table)), replace=False)
+    codes = decode_indices(indices, len(schema.cluster_columns), len(schema.levels))
+    live = artifacts.predict_probabilities(schema.encode_codes(codes))
+    live_class = np.argmax(live, axis=1)
+    table_class, table_confidence = zip(*(table.top1(int(i)) for i in indices))
+    confidence_delta = np.abs(np.array(table_confidence) - live[np.arange(len(indices)), live_class])
+
+    clusters = [
+        {column: schema.levels[code] for column, code in zip(schema.cluster_columns, row)}
+        for row in codes[:lookups]
+    ]
+
+    def table_lookups():
+        for row in clusters:
+            table.top1(table.index(row))
+
+    def live_predictions():
+        for row in clusters:
+            np.argmax(artifacts.predict_probabilities(schema.encode(row))[0])
+
+    load_ms = median_seconds(lambda: PredictionTable.load(path, meta_path), 20) * 1000
+    lookup_us = median_seconds(table_lookups, 5) / len(clusters) * 1e6
+    live_us = median_seconds(live_predictions, 5) / len(clusters) * 1e6
+
+    print(f"Mode:                {table.mode} ({len(table.table):,} rows, version {table.version})")
+    print(f"Build time:          {build_s:.1f} s ({len(table.table) / build_s:,.0f} rows/s)")
+    print(f"File size:           {os.path.getsize(path) / 1e6:.1f} MB")
+    print(f"Map time:            {load_ms:.2f} ms")
+    print(f"Top-1 agreement:     {np.mean(np.array(table_class) == live_class):.4%} of {len(indices):,} sampled rows")
+    print(f"Max |confidence dp|: {confidence_delta.max():.2e} (float16 storage)")
+    print(f"Lookup latency:      {lookup_us:.2f} us/request (index + top-1 read)")
+    print(f"Live latency:        {live_us:.2f} us/request (encode + forward + calibrate)")
+    print(f"Speedup:             {live_us / lookup_us:.0f}x")
+
+
+def main(mode, workers, block_size, version_dir=None):
+    path = artifact_path(PREDICTION_TABLE_PATH, version_dir)
+    meta_path = artifact_path(PREDICTION_TABLE_META_PATH, version_dir)
+
+    start = time.perf_counter()
+    meta = build_prediction_table(path, meta_path, mode, workers, block_size, directory=version_dir)
+    build_s = time.perf_counter() - start
+    print(f"✅ Saved {meta['rows']:,}-row {mode} prediction table to {path}")
+
+    artifacts = load_serving_artifacts(directory=version_dir, prediction_table=False)
+    report(PredictionTable.load(path, meta_path), artifacts, path, meta_path, build_s)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute predictions for all cluster combinations")
+    parser.add_argument("--mode", choices=MODES, default="full")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Scoring processes (1 scores inline)")
+    parser.add_argument("--block-size", type=int, default=65536, help="Rows scored per task")
+    parser.add_argument("--version-dir", help="Build for a published version directory instead of models/")
+    args = parser.parse_args()
+    main(args.mode, args.workers, args.block_size, args.version_dir)
@@ -0,0 +1,334 @@
+"""Score large CSV/Parquet catalogs of raw property measurements offline.
+
+Each chunk goes through the same steps as /predict/properties: chunked read ->
+vectorized clustering and one-hot encoding (`FeatureSchema.encode_properties`)
+-> batched NumPy forward pass -> Platt calibration. Chunks are scored in a
+process pool with a bounded number in flight, so memory stays flat however
+large the input is, and results are appended to the output CSV in input order.
+
+After every written chunk a checkpoint is saved next to the output; rerunning
+the same command resumes from the last completed chunk.
+
+Usage (from the backend directory):
+    python bulk_predict.py catalog.csv predictions.csv [--chunk-size 100000] [--workers 4]
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import numpy as np
+import pandas as pd
+from utils.loaders import load_serving_artifacts
+from dataset.constants import PROPERTY_COLUMNS, BULK_CHUNK_SIZE
+
+# Artifacts loaded once per worker process by `init_worker`
+_artifacts = None
+
+
+def init_worker():
+    global _artifacts
+    _artifacts = load_serving_artifacts()
+
+
+def read_csv_records(file, count):
+    """Bytes of the next `count` records of a binary CSV file; quoted fields may span lines."""
+    data = b"".join(islice(file, count))
+    if b'"' not in data:
+        return data
+    # A line with an odd number of quotes opens or closes a multi-line field
+    records, quoted = 0, False
+    for line in data.splitlines(keepends=True):
+        quoted ^= line.count(b'"') % 2 == 1
+        records += not quoted
+    while quoted or records < count:
+        line = file.readline()
+        if not line:
+            break
+        data += line
+        quoted ^= line.count(b'"') % 2 == 1
+        records += not quoted
+    return data
+
+
+def csv_frames(path, columns, chunk_size, skip_chunks=0, input_offset=None):
+    """Yield (frame, input_offset) per chunk of a CSV, with the byte offset just past the chunk.
+
+    Resuming seeks straight to `input_offset`; without one, the first
+    `skip_chunks` chunks are read and discarded a chunk at a time.
+    """
+    with open(path, "rb") as f:
+        header = next(csv.reader([f.readline().decode("utf-8-sig")]))
+        if input_offset is not None:
+            f.seek(input_offset)
+        else:
+            for _ in range(skip_chunks):
+                read_csv_records(f, chunk_size)
+        while True:
+            data = read_csv_records(f, chunk_size)
+            if not data:
+                return
+            if not data.strip():
+                continue
+            frame = pd.read_csv(io.BytesIO(data), header=None, names=header, usecols=columns)
+            yield frame, f.tell()
+
+
+def read_chunks(path, chunk_size, id_column=None, skip_chunks=0, input_offset=None):
+    """Yield (chunk_index, ids, values, input_offset) with values an (n, 9) float64 array in PROPERTY_COLUMNS order.
+
+    Non-numeric or missing measurements become NaN. Every chunk but the last
+    has exactly `chunk_size` rows. The first `skip_chunks` chunks are skipped:
+    a CSV resumes at the byte `input_offset` recorded after the last chunk
+    (None for Parquet), and Parquet row groups that end before the resume
+    point are never decoded.
+    """
+    columns = PROPERTY_COLUMNS + ([id_column] if id_column else [])
+    if os.path.splitext(path)[1].lower() in (".parquet", ".pq"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Reading Parquet input requires pyarrow (pip install pyarrow)")
+
+        parquet = pq.ParquetFile(path)
+        # Row groups that end before the resume point are never decoded
+        skip_rows = skip_chunks * chunk_size
+        row_groups = []
+        for group in range(parquet.num_row_groups):
+            group_rows = parquet.metadata.row_group(group).num_rows
+            if skip_rows >= group_rows and not row_groups:
+                skip_rows -= group_rows
+            else:
+                row_groups.append(group)
+        batches = parquet.iter_batches(batch_size=chunk_size, row_groups=row_groups, columns=columns) if row_groups else ()
+        frames = ((table.to_pandas(), None) for table in exact_chunks(batches, chunk_size, skip_rows))
+    else:
+        frames = csv_frames(path, columns, chunk_size, skip_chunks, input_offset)
+
+    for index, (frame, offset) in enumerate(frames, start=skip_chunks):
+        values = np.column_stack([
+            pd.to_numeric(frame[column], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            for column in PROPERTY_COLUMNS
+        ])
+        ids = frame[id_column].to_numpy() if id_column else None
+        yield index, ids, values, offset
+
+
+def exact_chunks(batches, chunk_size, skip_rows=0):
+    """Regroup Arrow record batches into tables of exactly `chunk_size` rows (the last may be shorter).
+
+    `iter_batches` never spans row groups, so its batches come up short at
+    every row group boundary; chunk indices, row numbers and resume offsets
+    all assume full chunks. The first `skip_rows` rows are dropped.
+    """
+    import pyarrow as pa
+
+    buffered, buffered_rows = [], 0
+    for batch in batches:
+        if skip_rows:
+            dropped = min(skip_rows, batch.num_rows)
+            batch, skip_rows = batch.slice(dropped), skip_rows - dropped
+        buffered.append(batch)
+        buffered_rows += batch.num_rows
+        while buffered_rows >= chunk_size:
+            # Zero-copy slices of the buffered batches
+            table = pa.Table.from_batches(buffered)
+            yield table.slice(0, chunk_size)
+            rest = table.slice(chunk_size)
+            buffered, buffered_rows = rest.to_batches(), rest.num_rows
+    if buffered_rows:
+        yield pa.Table.from_batches(buffered)
+
+
+def output_header(class_names, id_column=None):
+    columns = (["id"] if id_column else []) + ["row", "predicted_type", "confidence"] + list(class_names)
+    return pd.DataFrame(columns=columns).to_csv(index=False)
+
+
+def csv_field(value):
+    """Quote a text field for CSV output if it needs it."""
+    value = str(value)
+    if any(char in value for char in ',"\r\n'):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def score_chunk(first_row, ids, values):
+    """Score one chunk and return it formatted as CSV lines (run inside a worker)."""
+    artifacts = _artifacts
+    class_names = np.asarray([csv_field(name) for name in artifacts.class_names], dtype=object)
+    n = len(values)
+
+    # Rows with missing measurements are reported without a prediction
+    valid = np.isfinite(values).all(axis=1)
+    probabilities = np.zeros((n, len(class_names)))
+    if valid.any():
+        predictions = artifacts.predict_probabilities(artifacts.feature_schema.encode_properties(values[valid]))
+        probabilities[valid] = np.round(predictions.astype(np.float64) * 100, 2)
+    predicted = np.argmax(probabilities, axis=1)
+
+    # %-formatting row tuples is several times faster than DataFrame.to_csv
+    columns = [np.arange(first_row, first_row + n).tolist(), class_names[predicted].tolist(),
+               probabilities[np.arange(n), predicted].tolist(), *probabilities.T.tolist()]
+    line = "%d,%s,%.2f" + ",%.2f" * len(class_names)
+    empty = "%d," + "," * (len(class_names) + 1)
+    if ids is not None:
+        columns.insert(0, [csv_field(value) for value in ids.tolist()])
+        line, empty = "%s," + line, "%s," + empty
+    lines = [line % fields for fields in zip(*columns)]
+    for i in np.flatnonzero(~valid).tolist():
+        lines[i] = empty % (columns[0][i], columns[1][i]) if ids is not None else empty % columns[0][i]
+    return n, int(valid.sum()), "\n".join(lines) + "\n"
+
+
+class Checkpoint:
+    """Progress of one bulk run, saved atomically as JSON next to the output file."""
+
+    def __init__(self, path, input_path, chunk_size):
+        self.path = path
+        self.state = {
+            "input": os.path.abspath(input_path),
+            "input_size": os.path.getsize(input_path),
+            "chunk_size": chunk_size,
+            "completed_chunks": 0,
+            "rows": 0,
+            "output_bytes": 0,
+            "input_offset": None
+        }
+
+    def resume(self):
+        """Load a previous checkpoint for the same input and chunk size; return True if found."""
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, "r") as f:
+            saved = json.load(f)
+        if any(saved.get(key) != self.state[key] for key in ("input", "input_size", "chunk_size")):
+            return False
+        self.state = saved
+        return True
+
+    def save(self, **updates):
+        self.state.update(updates)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __getitem__(self, key):
+        return self.state[key]
+
+
+class _Done:
+    """Already-computed result with the `Future.result()` interface."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def result(self):
+        return self.value
+
+
+def _run_inline(fn, *args):
+    return _Done(fn(*args))
+
+
+def run(input_path, output_path, chunk_size=BULK_CHUNK_SIZE, workers=None, max_in_flight=None,
+        id_column=None, fresh=False):
+    """Score `input_path` into `output_path` and return (rows, seconds)."""
+    workers = os.cpu_count() if workers is None else workers
+    max_in_flight = max_in_flight or 2 * max(workers, 1)
+
+    checkpoint = Checkpoint(output_path + ".checkpoint", input_path, chunk_size)
+    resumed = not fresh and checkpoint.resume() and os.path.exists(output_path)
+
+    if workers > 0:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker)
+        submit = executor.submit
+    else:
+        # Score in this process (no pool)
+        executor = None
+        init_worker()
+        submit = _run_inline
+
+    if resumed:
+        # Drop anything written after the last checkpoint
+        output = open(output_path, "r+b")
+        output.truncate(checkpoint["output_bytes"])
+        output.seek(checkpoint["output_bytes"])
+        print(f"Resuming after chunk {checkpoint['completed_chunks']} ({checkpoint['rows']} rows)")
+    else:
+        output = open(output_path, "wb")
+        output.write(output_header(load_serving_artifacts().class_names, id_column).encode("utf-8"))
+        checkpoint.save(completed_chunks=0, rows=0, output_bytes=output.tell(), input_offset=None)
+
+    start = time.perf_counter()
+    rows_done = 0
+    pending = deque()
+
+    def write_oldest():
+        nonlocal rows_done
+        index, input_offset, future = pending.popleft()
+        rows, valid_rows, text = future.result()
+        output.write(text.encode("utf-8"))
+        output.flush()
+        os.fsync(output.fileno())
+        rows_done += rows
+        checkpoint.save(
+            completed_chunks=index + 1, rows=checkpoint["rows"] + rows, output_bytes=output.tell(),
+            input_offset=input_offset
+        )
+        elapsed = time.perf_counter() - start
+        skipped = f", {rows - valid_rows} with missing values" if valid_rows < rows else ""
+        print(f"chunk {index}: {rows} rows{skipped} | {rows_done / elapsed:,.0f} rows/s", file=sys.stderr)
+
+    try:
+        chunks = read_chunks(
+            input_path, chunk_size, id_column, checkpoint["completed_chunks"], checkpoint.state.get("input_offset")
+        )
+        # Row numbers follow the rows actually read, not chunk_index * chunk_size
+        first_row = checkpoint["rows"]
+        for index, ids, values, input_offset in chunks:
+            pending.append((index, input_offset, submit(score_chunk, first_row, ids, values)))
+            first_row += len(values)
+            # Bound the number of chunks held in memory
+            while len(pending) >= max_in_flight:
+                write_oldest()
+        while pending:
+            write_oldest()
+    finally:
+        output.close()
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    checkpoint.remove()
+    return rows_done, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-classify raw geotextile property measurements")
+    parser.add_argument("input", help="CSV or Parquet file with the nine property columns")
+    parser.add_argument("output", help="CSV file to write predictions to")
+    parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count, 0 = in-process)")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="Chunks queued at once (default: 2 x workers)")
+    parser.add_argument("--id-column", default=None, help="Input column copied to the output to identify rows")
+    parser.add_argument("--fresh", action="store_true", help="Ignore any checkpoint and start over")
+    args = parser.parse_args()
+
+    rows, seconds = run(
+        args.input, args.output, args.chunk_size, args.workers, args.max_in_flight, args.id_column, args.fresh
+    )
+    print(f"✅ Scored {rows} rows in {seconds:.1f} s ({rows / max(seconds, 1e-9):,.0f} rows/s) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,16 @@
 import os
 
-DATASET_PATH = os.path.join(os.path.dirname(__file__), 'geotextile.csv')
+DATASET_PATH = os.environ.get('GEOTEXTILE_DATASET_PATH', os.path.join(os.path.dirname(__file__), 'geotextile.csv'))
+
+# Sharded uint8 cluster codes / integer labels for the tf.data training path (see preprocessors/shards.py)
+TRAINING_SHARDS_DIR = os.environ.get('GEOTEXTILE_SHARDS_DIR', os.path.join(os.path.dirname(__file__), 'shards'))
+SHARD_SIZE = int(os.environ.get('GEOTEXTILE_SHARD_SIZE', 1000000))
+# Rows sampled from the CSV for the similarity index and type costs on the sharded path (bounds their memory)
+SHARDED_SAMPLE_ROWS = int(os.environ.get('GEOTEXTILE_SHARDED_SAMPLE_ROWS', 1000000))
+
+# Clustered, one-hot encoded and split dataset, cached per CSV content and threshold hash (see preprocessors/dataset_cache.py)
+DATASET_CACHE = os.environ.get('GEOTEXTILE_DATASET_CACHE', '1') == '1'
+DATASET_CACHE_DIR = os.environ.get('GEOTEXTILE_DATASET_CACHE_DIR', os.path.join(os.path.dirname(__file__), 'cache'))
 
 # Hyperparameters
 TRAIN_SPLIT = 0.7
@@ -12,9 +22,170 @@ EPOCHS = 150
 BATCH_SIZE = 16
 EARLY_STOPPING_PATIENCE = 10
 
+# Hidden layer widths and dropout rates of the ANN
+HIDDEN_UNITS = [64, 32]
+DROPOUT_RATES = [0.3, 0.2]
+
+# Hyperparameter search run by tune.py (every combination, scored with k-fold CV)
+CV_FOLDS = 5
+TUNING_GRID = {
+    "hidden_units": [[64, 32], [128, 64], [32, 16]],
+    "dropout_rates": [[0.3, 0.2], [0.1, 0.1]],
+    "learning_rate": [1e-3, 3e-3],
+    "batch_size": [16, 32],
+}
+# Intra-op threads per tuning trial; trials run in parallel processes instead
+TUNING_THREADS_PER_TRIAL = int(os.environ.get('GEOTEXTILE_TUNING_THREADS_PER_TRIAL', 1))
+
+# Cluster features used as ANN input (one-hot encoded per level)
+CLUSTER_COLUMNS = [
+    "Tensile Cluster", "Puncture Cluster", "Permittivity Cluster",
+    "Filtration Cluster", "Recycled Cluster", "Biobased Cluster",
+    "UV Cluster", "Material Cost Cluster", "Install Cost Cluster"
+]
+CLUSTER_LEVELS = ["C1", "C2", "C3", "C4", "C5"]
+
+# Expert-defined cluster thresholds per raw property.
+# "edges" are the inclusive upper bounds of C1..C4 (x <= edge); anything above is C5.
+# With "zero_is_c1", C1 is exactly x == 0 and its edge only documents that.
+CLUSTER_THRESHOLDS = {
+    "Tensile Cluster": {"property": "Tensile Strength (kN/m)", "edges": [30, 60, 120, 200], "zero_is_c1": False},
+    "Puncture Cluster": {"property": "Puncture Resistance (N)", "edges": [600, 1000, 1400, 1800], "zero_is_c1": False},
+    "Permittivity Cluster": {"property": "Permittivity (s⁻¹)", "edges": [0.2, 0.5, 1.0, 1.5], "zero_is_c1": False},
+    "Filtration Cluster": {"property": "Filtration Efficiency (%)", "edges": [75, 85, 90, 95], "zero_is_c1": False},
+    "Recycled Cluster": {"property": "Recycled Content (%)", "edges": [0, 30, 60, 99], "zero_is_c1": True},
+    "Biobased Cluster": {"property": "Biobased Content (%)", "edges": [0, 30, 70, 99], "zero_is_c1": True},
+    "UV Cluster": {"property": "UV Strength Retained (% after 500h)", "edges": [30, 50, 70, 85], "zero_is_c1": False},
+    "Material Cost Cluster": {"property": "Material Cost (PHP/m²)", "edges": [100, 200, 400, 700], "zero_is_c1": False},
+    "Install Cost Cluster": {"property": "Installation Cost (PHP/m²)", "edges": [50, 100, 200, 350], "zero_is_c1": False},
+}
+
+# Raw property columns, in cluster column order
+PROPERTY_COLUMNS = [CLUSTER_THRESHOLDS[column]["property"] for column in CLUSTER_COLUMNS]
+
+# Cost columns summarized per type for /recommend (see preprocessors/type_costs.py)
+COST_COLUMNS = {
+    "material": CLUSTER_THRESHOLDS["Material Cost Cluster"]["property"],
+    "installation": CLUSTER_THRESHOLDS["Install Cost Cluster"]["property"],
+}
+
 # Model save path
 MODEL_SAVE_PATH = os.path.join(os.path.dirname(__file__), '..', 'models', 'geotextile_ann.keras')
 
+# Dense weights exported for the NumPy inference engine
+NUMPY_WEIGHTS_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'models', 'geotextile_ann.npz'))
+
+# Quantized exports of the same weights (see models/quantized_ann.py), served with the matching backend
+QUANTIZED_WEIGHTS_PATHS = {
+    'int8': os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'models', 'geotextile_ann_int8.npz')),
+    'float16': os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'models', 'geotextile_ann_fp16.npz')),
+}
+# Minimum top-1 agreement with float32 accepted by export_quantized.py
+QUANTIZATION_MIN_AGREEMENT = 0.99
+
+# Maximum number of items accepted by /predict/batch
+MAX_BATCH_SIZE = int(os.environ.get('GEOTEXTILE_MAX_BATCH_SIZE', 1000))
+
+# Maximum number of rows accepted by /predict/columnar (binary and Arrow bodies)
+COLUMNAR_MAX_ROWS = int(os.environ.get('GEOTEXTILE_COLUMNAR_MAX_ROWS', 1000000))
+
+# In-process LRU cache of /predict results (0 disables it)
+PREDICTION_CACHE_SIZE = int(os.environ.get('GEOTEXTILE_PREDICTION_CACHE_SIZE', 4096))
+# Precompute and pin predictions for every cluster combination seen in training
+PRECOMPUTE_PREDICTIONS = os.environ.get('GEOTEXTILE_PRECOMPUTE_PREDICTIONS', '0') == '1'
+# Answer /predict from the precomputed table of all 5^9 cluster combinations (see build_prediction_table.py)
+PREDICTION_TABLE = os.environ.get('GEOTEXTILE_PREDICTION_TABLE', '0') == '1'
+
+# Micro-batching of concurrent /predict requests into one forward pass.
+# A max wait of 0 batches whatever is already queued without waiting for more.
+MICRO_BATCHING = os.environ.get('GEOTEXTILE_MICRO_BATCHING', '0') == '1'
+MICRO_BATCH_MAX_SIZE = int(os.environ.get('GEOTEXTILE_MICRO_BATCH_MAX_SIZE', 64))
+MICRO_BATCH_MAX_WAIT_MS = float(os.environ.get('GEOTEXTILE_MICRO_BATCH_MAX_WAIT_MS', 0.0))
+
+# Number of types returned by /recommend unless the request sets top_k
+RECOMMEND_TOP_K = 3
+
+# Nearest catalog rows returned with predictions when requested (see models/similarity_index.py).
+# Loading the index imports scikit-learn, so it is opt-in to keep API cold start fast.
+SIMILARITY_INDEX = os.environ.get('GEOTEXTILE_SIMILARITY_INDEX', '0') == '1'
+SIMILAR_MAX_K = 20
+
+# Audit log of every served prediction, written to SQLite by a background thread (see utils/audit_log.py).
+# Requests queued beyond AUDIT_QUEUE_SIZE are dropped and counted rather than slowing responses.
+AUDIT_LOG = os.environ.get('GEOTEXTILE_AUDIT_LOG', '0') == '1'
+AUDIT_LOG_PATH = os.environ.get(
+    'GEOTEXTILE_AUDIT_LOG_PATH', os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'audit', 'predictions.sqlite'))
+)
+AUDIT_QUEUE_SIZE = int(os.environ.get('GEOTEXTILE_AUDIT_QUEUE_SIZE', 10000))
+# Maximum records written per SQLite transaction
+AUDIT_BATCH_SIZE = int(os.environ.get('GEOTEXTILE_AUDIT_BATCH_SIZE', 5000))
+
+# Monte Carlo dropout uncertainty (see utils/uncertainty.py): stochastic passes per input, stacked into one forward.
+# With UNCERTAINTY, /predict, /predict/batch and /predict/properties attach it unless the request sets "uncertainty".
+UNCERTAINTY = os.environ.get('GEOTEXTILE_UNCERTAINTY', '0') == '1'
+UNCERTAINTY_SAMPLES = int(os.environ.get('GEOTEXTILE_UNCERTAINTY_SAMPLES', 32))
+# Mutual information (nats) above which a prediction is flagged for manual review.
+# 0.2 is above the 99th percentile of the dataset rows (see benchmarks/bench_uncertainty.py).
+UNCERTAINTY_REVIEW_THRESHOLD = float(os.environ.get('GEOTEXTILE_UNCERTAINTY_REVIEW_THRESHOLD', 0.2))
+
+# Rows per chunk read by the bulk-scoring CLI (bulk_predict.py)
+BULK_CHUNK_SIZE = int(os.environ.get('GEOTEXTILE_BULK_CHUNK_SIZE', 100000))
+
+# Inference backend used for serving: "numpy" (no TensorFlow), "keras", or quantized "int8" / "float16"
+INFERENCE_BACKEND = os.environ.get('GEOTEXTILE_INFERENCE_BACKEND', 'numpy')
+
+# Serve from the single memory-mapped bundle so uvicorn workers share one read-only copy
+SHARED_ARTIFACTS = os.environ.get('GEOTEXTILE_SHARED_ARTIFACTS', '0') == '1'
+# Number of uvicorn worker processes started by `python app.py`
+SERVING_WORKERS = int(os.environ.get('GEOTEXTILE_WORKERS', 1))
+
+# Versioned artifact directories written by finetune.py; LATEST names the version to serve
+MODEL_VERSIONS_DIR = os.environ.get(
+    'GEOTEXTILE_MODEL_VERSIONS_DIR',
+    os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'models', 'versions'))
+)
+# Seconds between checks for a new published version (0 disables hot reload)
+MODEL_RELOAD_INTERVAL_S = float(os.environ.get('GEOTEXTILE_MODEL_RELOAD_INTERVAL_S', 5.0))
+
+# Prometheus-text /metrics endpoint with per-stage latency histograms (0 disables instrumentation)
+METRICS_ENABLED = os.environ.get('GEOTEXTILE_METRICS', '1') == '1'
+# Fraction of requests that write a structured log line (errors and model swaps are always logged)
+LOG_SAMPLE_RATE = float(os.environ.get('GEOTEXTILE_LOG_SAMPLE_RATE', 0.01))
+
+# Fine-tuning on new rows, warm-started from the served weights
+FINETUNE_LEARNING_RATE = 1e-4
+FINETUNE_EPOCHS = 30
+FINETUNE_VAL_SPLIT = 0.2
+
+# Preprocessing artifact paths
+LABEL_ENCODER_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'models', 'label_encoder.pkl'))
+FEATURE_COLUMNS_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'models', 'feature_columns.json'))
+FEATURE_SCHEMA_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'models', 'feature_schema.json'))
+CLASS_NAMES_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'models', 'class_names.json'))
+SCALER_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'models', 'scaler.npz'))
+
+# Weights, calibration, scaler and schema in one memory-mappable file (see models/serving_bundle.py)
+SERVING_BUNDLE_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'models', 'serving_bundle.npy'))
+
+# Per-type material / installation cost statistics computed from the dataset
+TYPE_COSTS_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'models', 'type_costs.json'))
+
+# KD-tree over the normalized raw properties of the dataset rows, memory-mapped at serving time
+SIMILARITY_INDEX_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'models', 'similarity_index.joblib'))
+
+# Predictions for every cluster combination, memory-mapped at serving time (see models/prediction_table.py)
+PREDICTION_TABLE_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'models', 'prediction_table.npy'))
+PREDICTION_TABLE_META_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'models', 'prediction_table.json'))
+
+# Unique cluster-code combinations seen in the training data (used to warm the prediction cache)
+TRAINING_CLUSTERS_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'models', 'training_clusters.npy'))
+
 # Validation data save paths for Platt scaling
 VAL_LOGITS_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'models', 'val_logits.npy'))
 VAL_LABELS_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'models', 'val_labels.npy'))
+
+# Cross-validation results of every tuning trial
+TUNING_RESULTS_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'models', 'tuning_results.csv'))
+
+# Fitted Platt scaling parameters (per-class slope and intercept)
+PLATT_PARAMS_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'models', 'platt_params.npz'))
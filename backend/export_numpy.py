@@ -0,0 +1,32 @@
+from preprocessors.feature_schema import FeatureSchema
+from models.ann_model import ANNModel
+from models.serving_bundle import write_serving_bundle
+from utils.loaders import load_serving_artifacts
+from dataset.constants import (
+    MODEL_SAVE_PATH, NUMPY_WEIGHTS_PATH, FEATURE_SCHEMA_PATH, PLATT_PARAMS_PATH,
+    SERVING_BUNDLE_PATH
+)
+
+
+def main():
+    schema = FeatureSchema.load(FEATURE_SCHEMA_PATH)
+
+    ann_model = ANNModel(input_dim=schema.num_features, num_classes=None)
+    ann_model.load_model(MODEL_SAVE_PATH)
+    ann_model.load_platt_scaling(PLATT_PARAMS_PATH)
+
+    ann_model.export_numpy_weights(NUMPY_WEIGHTS_PATH)
+    print(f"✅ Exported NumPy weights to {NUMPY_WEIGHTS_PATH}")
+
+    # Refresh the shared serving bundle with the exported weights
+    artifacts = load_serving_artifacts(backend="numpy", shared=False)
+    write_serving_bundle(
+        SERVING_BUNDLE_PATH, artifacts.model, artifacts.scaler,
+        artifacts.feature_schema, artifacts.class_names
+    )
+    print(f"✅ Wrote serving bundle to {SERVING_BUNDLE_PATH}")
+    print("Check parity against Keras with: python -m pytest -q tests/test_numpy_parity.py")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Export int8 / float16 copies of the trained model and report what quantization costs.
+
+The Dense weights are read from geotextile_ann.keras and written with the
+Platt calibration as models/geotextile_ann_int8.npz and
+models/geotextile_ann_fp16.npz. These files are served by
+GEOTEXTILE_INFERENCE_BACKEND=int8 / float16 with the NumPy-only QuantizedANN
+runtime. train.py writes the same files after every training run.
+
+The report compares each model on the held-out test split:
+- accuracy and expected calibration error (ECE) of the calibrated probabilities;
+- top-1 agreement with float32 and the max |probability delta| from float32;
+- file size, in-memory weight size and load time;
+- single-row and batched per-row latency.
+The float32 reference is the NumPy engine, which matches Keras to 1e-5.
+The Keras model is listed for size and load time. The export fails if
+top-1 agreement drops below QUANTIZATION_MIN_AGREEMENT.
+
+Usage (from the backend directory):
+    python export_quantized.py
+"""
+import argparse
+import json
+import os
+import sys
+import numpy as np
+from preprocessors.dataset_cache import load_encoded_dataset
+from preprocessors.feature_schema import FeatureSchema
+from models.ann_model import ANNModel
+from models.numpy_ann import NumpyANN
+from models.quantized_ann import PRECISIONS, QuantizedANN, save_quantized_weights
+from models.calibration import expected_calibration_error
+from scalers.scaler import DataScaler
+from benchmarks.suite import median_seconds
+from dataset.constants import (
+    MODEL_SAVE_PATH, NUMPY_WEIGHTS_PATH, PLATT_PARAMS_PATH, FEATURE_SCHEMA_PATH, SCALER_PATH,
+    CLASS_NAMES_PATH, QUANTIZED_WEIGHTS_PATHS, QUANTIZATION_MIN_AGREEMENT
+)
+
+
+def held_out_split(schema, scaler, class_names):
+    """Scaled features and class indices of the test split used by train.py."""
+    dataset = load_encoded_dataset()
+    test_idx = dataset.splits["test"]
+    # Dataset class indices -> served class indices
+    labels = np.array([class_names.index(name) for name in dataset.class_names])[dataset.labels[test_idx]]
+    return scaler.transform(schema.encode_codes(dataset.codes[test_idx])), labels
+
+
+def load_model(kind, path):
+    if kind == "keras":
+        model = ANNModel(input_dim=None, num_classes=None)
+    elif kind == "float32":
+        model = NumpyANN()
+    else:
+        model = QuantizedANN()
+    model.load_model(path)
+    # Quantized files carry their own calibration
+    if model.calibrator is None:
+        model.load_platt_scaling(PLATT_PARAMS_PATH)
+    return model
+
+
+def weight_bytes(model):
+    arrays = list(model.kernels) + list(model.biases) + [s for s in getattr(model, "scales", []) if s is not None]
+    return sum(array.nbytes for array in arrays)
+
+
+def report(X_test, y_test, precisions):
+    """Print accuracy, calibration, size and latency of float32 vs. each quantized export."""
+    rows = []
+    reference = None
+    for kind, path in [("keras", MODEL_SAVE_PATH), ("float32", NUMPY_WEIGHTS_PATH)] + [
+        (precision, QUANTIZED_WEIGHTS_PATHS[precision]) for precision in precisions
+    ]:
+        model = load_model(kind, path)
+        load_ms = median_seconds(lambda: load_model(kind, path), 3 if kind == "keras" else 20) * 1000
+        row = {"model": kind, "file_kb": os.path.getsize(path) / 1024, "load_ms": load_ms}
+        if kind != "keras":
+            probabilities = model.predict_with_platt_scaling(X_test)
+            if reference is None:
+                reference = probabilities
+            single = X_test[:1]
+            row.update({
+                "weights_kb": weight_bytes(model) / 1024,
+                "accuracy": float(np.mean(probabilities.argmax(axis=1) == y_test)),
+                "ece": expected_calibration_error(probabilities, y_test),
+                "agreement": float(np.mean(probabilities.argmax(axis=1) == reference.argmax(axis=1))),
+                "max_delta": float(np.max(np.abs(probabilities - reference))),
+                "row_us": median_seconds(lambda: model.predict_with_platt_scaling(single), 2000) * 1e6,
+                "batch_row_us": median_seconds(lambda: model.predict_with_platt_scaling(X_test), 20) * 1e6 / len(X_test),
+            })
+        rows.append(row)
+
+    print(f"Held-out rows: {len(X_test)}")
+    print(f"{'model':>8} {'file KB':>8} {'weights KB':>10} {'load ms':>8} {'accuracy':>8} {'ECE':>7} "
+          f"{'agree':>7} {'max |dp|':>9} {'1-row us':>9} {'batch us/row':>12}")
+    for row in rows:
+        if row["model"] == "keras":
+            print(f"{row['model']:>8} {row['file_kb']:>8.1f} {'-':>10} {row['load_ms']:>8.2f}")
+            continue
+        print(f"{row['model']:>8} {row['file_kb']:>8.1f} {row['weights_kb']:>10.1f} {row['load_ms']:>8.2f} "
+              f"{row['accuracy']:>8.4f} {row['ece']:>7.4f} {row['agreement']:>7.2%} {row['max_delta']:>9.2e} "
+              f"{row['row_us']:>9.1f} {row['batch_row_us']:>12.3f}")
+    return rows
+
+
+def main(precisions=PRECISIONS):
+    ann_model = ANNModel(input_dim=None, num_classes=None)
+    ann_model.load_model(MODEL_SAVE_PATH)
+
+    numpy_model = NumpyANN()
+    numpy_model.kernels, numpy_model.biases, numpy_model.negative_slope = ann_model.dense_weights()
+    numpy_model.num_classes = numpy_model.kernels[-1].shape[1]
+    numpy_model.load_platt_scaling(PLATT_PARAMS_PATH)
+    for precision in precisions:
+        save_quantized_weights(QUANTIZED_WEIGHTS_PATHS[precision], numpy_model, precision)
+        print(f"✅ Exported {precision} weights to {QUANTIZED_WEIGHTS_PATHS[precision]}")
+
+    with open(CLASS_NAMES_PATH, "r") as f:
+        class_names = json.load(f)
+    scaler = DataScaler()
+    scaler.load(SCALER_PATH)
+    X_test, y_test = held_out_split(FeatureSchema.load(FEATURE_SCHEMA_PATH), scaler, class_names)
+
+    rows = report(X_test, y_test, precisions)
+    failed = [row["model"] for row in rows if row.get("agreement", 1.0) < QUANTIZATION_MIN_AGREEMENT]
+    if failed:
+        print(f"❌ Top-1 agreement below {QUANTIZATION_MIN_AGREEMENT:.0%} for: {', '.join(failed)}")
+        sys.exit(1)
+    print(f"✅ Quantized exports agree with float32 on at least {QUANTIZATION_MIN_AGREEMENT:.0%} of held-out rows")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export and evaluate quantized model weights")
+    parser.add_argument("--precision", nargs="+", choices=PRECISIONS, default=list(PRECISIONS))
+    args = parser.parse_args()
+    main(args.precision)
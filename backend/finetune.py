@@ -0,0 +1,118 @@
+"""Fine-tune the served model on new rows and publish it as a new version.
+
+Warm-starts from the currently published version (or the top-level models/
+artifacts if nothing has been published yet) and trains on the new rows only,
+with a low learning rate. The schema, scaler and class list are kept, so the
+input layout does not change; rows of an unknown type need a full train.py
+run. Every serving artifact is written into models/versions/<version>/ and
+LATEST is then pointed at it, which running API processes pick up without a
+restart (see GEOTEXTILE_MODEL_RELOAD_INTERVAL_S).
+
+Usage (from the backend directory):
+    python finetune.py new_rows.csv
+"""
+import argparse
+import json
+import os
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+import joblib
+from sklearn.model_selection import train_test_split
+from preprocessors.data_preprocessor import DataPreprocessor
+from preprocessors.feature_schema import FeatureSchema
+from models.ann_model import ANNModel
+from models.calibration import PlattCalibrator
+from models.similarity_index import SimilarityIndex
+from scalers.scaler import DataScaler
+from train import save_artifacts
+from utils.loaders import artifact_hash
+from utils.versions import artifact_path, current_version_dir, new_version_dir, publish_version
+from dataset.constants import (
+    BATCH_SIZE, FINETUNE_EPOCHS, FINETUNE_LEARNING_RATE, FINETUNE_VAL_SPLIT, PROPERTY_COLUMNS,
+    MODEL_SAVE_PATH, FEATURE_SCHEMA_PATH, CLASS_NAMES_PATH, SCALER_PATH, LABEL_ENCODER_PATH,
+    PLATT_PARAMS_PATH, TRAINING_CLUSTERS_PATH, TYPE_COSTS_PATH, SIMILARITY_INDEX_PATH
+)
+
+tf.random.set_seed(42)
+np.random.seed(42)
+
+
+def main(csv_path, epochs=FINETUNE_EPOCHS, learning_rate=FINETUNE_LEARNING_RATE, batch_size=BATCH_SIZE):
+    base_dir = current_version_dir()
+    print(f"Warm-starting from {base_dir or 'models/'}")
+
+    # Artifacts of the version being fine-tuned
+    feature_schema = FeatureSchema.load(artifact_path(FEATURE_SCHEMA_PATH, base_dir))
+    with open(artifact_path(CLASS_NAMES_PATH, base_dir), "r") as f:
+        class_names = json.load(f)
+    scaler = DataScaler()
+    scaler.load(artifact_path(SCALER_PATH, base_dir))
+    label_encoder = joblib.load(artifact_path(LABEL_ENCODER_PATH, base_dir))
+    previous_calibrator = PlattCalibrator.load(artifact_path(PLATT_PARAMS_PATH, base_dir))
+
+    ann_model = ANNModel(input_dim=feature_schema.num_features, num_classes=None)
+    ann_model.load_model(artifact_path(MODEL_SAVE_PATH, base_dir))
+
+    # New rows, clustered and encoded into the existing input layout
+    preprocessor = DataPreprocessor()
+    df = pd.read_csv(csv_path)
+    unknown = sorted(set(df[preprocessor.target_column]) - set(class_names))
+    if unknown:
+        raise SystemExit(f"Unknown types {unknown}: add them with a full train.py run instead")
+    codes = preprocessor.cluster_codes(df[PROPERTY_COLUMNS].to_numpy(dtype=np.float64))
+    X = feature_schema.encode_codes(codes)
+    y = np.eye(len(class_names), dtype=np.float32)[
+        [class_names.index(name) for name in df[preprocessor.target_column]]
+    ]
+    X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=FINETUNE_VAL_SPLIT, random_state=42)
+
+    # Continue training from the current weights
+    ann_model.compile_model(learning_rate)
+    ann_model.model.fit(
+        X_train, y_train,
+        validation_data=(X_val, y_val),
+        epochs=epochs,
+        batch_size=batch_size,
+        callbacks=[ann_model.get_early_stopping()],
+        verbose=1
+    )
+
+    # Recalibrate on the new validation rows only if every class is represented there
+    val_logits = ann_model.predict_logits(X_val)
+    calibrator = None
+    if np.all(y_val.sum(axis=0) > 0):
+        print("Refitting Platt scaling on the new validation rows")
+    else:
+        print("Not every class is in the new validation rows; keeping the previous Platt scaling")
+        calibrator = previous_calibrator
+
+    previous_codes = np.load(artifact_path(TRAINING_CLUSTERS_PATH, base_dir))
+    # Cost statistics and the similarity index describe the full dataset, so they carry over unchanged
+    type_costs = None
+    if os.path.exists(artifact_path(TYPE_COSTS_PATH, base_dir)):
+        with open(artifact_path(TYPE_COSTS_PATH, base_dir), "r") as f:
+            type_costs = json.load(f)
+    similarity_index = None
+    if os.path.exists(artifact_path(SIMILARITY_INDEX_PATH, base_dir)):
+        similarity_index = SimilarityIndex.load(artifact_path(SIMILARITY_INDEX_PATH, base_dir))
+    training_codes = np.unique(np.concatenate([previous_codes, codes]), axis=0)
+
+    version_dir = new_version_dir(artifact_hash([csv_path])[:8])
+    save_artifacts(
+        ann_model, label_encoder, class_names, scaler, val_logits, y_val,
+        feature_schema.feature_columns, training_codes, directory=version_dir, calibrator=calibrator,
+        type_costs=type_costs, similarity_index=similarity_index
+    )
+    publish_version(version_dir)
+    print(f"✅ Published {version_dir}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fine-tune the served model on new rows")
+    parser.add_argument("csv", help="CSV with the dataset columns (Type and the nine properties)")
+    parser.add_argument("--epochs", type=int, default=FINETUNE_EPOCHS)
+    parser.add_argument("--learning-rate", type=float, default=FINETUNE_LEARNING_RATE)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+    main(args.csv, args.epochs, args.learning_rate, args.batch_size)
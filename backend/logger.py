@@ -1,11 +1,41 @@
+import json
 import logging
+import random
+from dataset.constants import LOG_SAMPLE_RATE
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and any structured `fields`."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
 
 def setup_logger():
-    """Set up the logger for the application."""
+    """Set up the logger for the application (safe to call more than once)."""
     logger = logging.getLogger('geotextile-api')
     logger.setLevel(logging.INFO)
-    handler = logging.StreamHandler()
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(JsonFormatter())
+        logger.addHandler(handler)
+        logger.propagate = False
     return logger
+
+
+def sampled(rate=LOG_SAMPLE_RATE):
+    """True for a random `rate` fraction of calls.
+
+    Guard per-request log lines with it so unsampled requests never build or
+    format the log record at all.
+    """
+    return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
@@ -4,39 +4,43 @@ from tensorflow.keras.models import Model
 from tensorflow.keras.layers import Dense, Dropout, LeakyReLU
 from tensorflow.keras.optimizers import Adam
 from tensorflow.keras.callbacks import EarlyStopping
-from sklearn.linear_model import LogisticRegression
 import numpy as np
+from models.calibration import PlattCalibrator
 
 class ANNModel:
     def __init__(self, input_dim, num_classes):
         self.input_dim = input_dim
         self.num_classes = num_classes
         self.model = None
-        self.platt_scalers = None
+        self.logits_model = None
+        self.calibrator = None
 
-    def build_model(self):
+    def build_model(self, hidden_units=(64, 32), dropout_rates=(0.3, 0.2)):
         """Build ANN model with explicit Input layer."""
         inputs = Input(shape=(self.input_dim,), name="input_layer")
 
-        x = Dense(64)(inputs)
-        x = LeakyReLU(negative_slope=0.1)(x)
-        x = Dropout(0.3)(x)
-
-        x = Dense(32)(x)
-        x = LeakyReLU(negative_slope=0.1)(x)
-        x = Dropout(0.2)(x)
+        x = inputs
+        for units, rate in zip(hidden_units, dropout_rates):
+            x = Dense(units)(x)
+            x = LeakyReLU(negative_slope=0.1)(x)
+            x = Dropout(rate)(x)
 
         outputs = Dense(self.num_classes, activation="softmax", name="softmax_output")(x)
 
         self.model = Model(inputs=inputs, outputs=outputs, name="GeotextileANN")
+        self.logits_model = None
         return self.model
 
-    def compile_model(self):
-        """Compile model."""
+    def compile_model(self, learning_rate=1e-3, sparse_labels=False):
+        """Compile model (integer class labels with `sparse_labels`, one-hot otherwise)."""
+        if sparse_labels:
+            loss, metrics = "sparse_categorical_crossentropy", ["accuracy"]
+        else:
+            loss, metrics = "categorical_crossentropy", ["accuracy", "precision", "recall"]
         self.model.compile(
-            optimizer=Adam(learning_rate=1e-3),
-            loss="categorical_crossentropy",
-            metrics=["accuracy", "precision", "recall"]
+            optimizer=Adam(learning_rate=learning_rate),
+            loss=loss,
+            metrics=metrics
         )
 
     def get_early_stopping(self):
@@ -54,6 +58,8 @@ class ANNModel:
             callbacks=[es],
             verbose=1
         )
+        # Weights changed; rebuild the logits model on next use
+        self.logits_model = None
         return history
 
     def save_model(self, path):
@@ -63,49 +69,92 @@ class ANNModel:
     def load_model(self, path):
         """Load model."""
         self.model = tf.keras.models.load_model(path)
+        self.logits_model = None
+        if self.num_classes is None:
+            self.num_classes = self.model.output_shape[-1]
 
-    def get_logits_model(self):
-        """Model that outputs logits (pre-softmax)."""
-        from tensorflow.keras import Model
+    def dense_weights(self):
+        """Float32 (kernels, biases) of every Dense layer and the LeakyReLU negative slope."""
+        if self.model is None:
+            raise ValueError("Model not built yet.")
 
+        dense_layers = [layer for layer in self.model.layers if isinstance(layer, Dense)]
+        activations = [layer for layer in self.model.layers if isinstance(layer, LeakyReLU)]
+        kernels, biases = [], []
+        for layer in dense_layers:
+            kernel, bias = layer.get_weights()
+            kernels.append(kernel.astype(np.float32))
+            biases.append(bias.astype(np.float32))
+        return kernels, biases, float(activations[0].negative_slope)
+
+    def dropout_layer_rates(self):
+        """Rate of every Dropout layer, in order (used for Monte Carlo dropout at serving time)."""
+        return [float(layer.rate) for layer in self.model.layers if isinstance(layer, Dropout)]
+
+    def export_numpy_weights(self, path):
+        """Export Dense weights to an .npz file for the NumPy inference engine."""
+        kernels, biases, negative_slope = self.dense_weights()
+        arrays = {}
+        for i, (kernel, bias) in enumerate(zip(kernels, biases)):
+            arrays[f"kernel_{i}"] = kernel
+            arrays[f"bias_{i}"] = bias
+        np.savez(
+            path,
+            num_layers=len(kernels),
+            negative_slope=negative_slope,
+            dropout_rates=np.asarray(self.dropout_layer_rates(), dtype=np.float64),
+            **arrays
+        )
+
+    def get_logits_model(self):
+        """Model that outputs logits (pre-softmax), built once and reused."""
         if self.model is None:
             raise ValueError("Model not built yet.")
 
-        # Use already-defined input tensor (safe now)
-        x = self.model.layers[-2].output  # Get layer before softmax
-        logits_output = Dense(self.num_classes, activation=None, name="logits_output")(x)
+        if self.logits_model is None:
+            # Use already-defined input tensor (safe now)
+            x = self.model.layers[-2].output  # Get layer before softmax
+            logits_output = Dense(self.num_classes, activation=None, name="logits_output")(x)
+
+            self.logits_model = Model(inputs=self.model.input, outputs=logits_output)
+            self.logits_model.set_weights(self.model.get_weights())
+        return self.logits_model
 
-        logits_model = Model(inputs=self.model.input, outputs=logits_output)
-        logits_model.set_weights(self.model.get_weights())
-        return logits_model
+    def predict(self, X):
+        """Softmax probabilities for a batch of encoded inputs."""
+        return self.model.predict_on_batch(np.asarray(X, dtype=np.float32))
 
-    def predict_with_platt_scaling(self, X, val_logits, val_labels):
+    def predict_logits(self, X):
+        """Logits for a batch of encoded inputs."""
+        return self.get_logits_model().predict_on_batch(np.asarray(X, dtype=np.float32))
+
+    def predict_logits_mc(self, X, samples, rng=None):
+        """(samples, n, num_classes) logits with dropout active, from one call on the stacked inputs.
+
+        `rng` is accepted for API parity with NumpyANN; masks come from TensorFlow's generator.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        logits = self.get_logits_model()(np.tile(X, (samples, 1)), training=True)
+        return np.asarray(logits).reshape(samples, len(X), -1)
+
+    def fit_platt_scaling(self, val_logits, val_labels):
+        """Fit Platt scalers on validation logits."""
+        self.calibrator = PlattCalibrator().fit(val_logits, val_labels)
+        return self.calibrator
+
+    def save_platt_scaling(self, path):
+        """Save fitted Platt scaling parameters."""
+        self.calibrator.save(path)
+
+    def load_platt_scaling(self, path):
+        """Load Platt scaling parameters fitted at training time."""
+        self.calibrator = PlattCalibrator.load(path)
+
+    def predict_with_platt_scaling(self, X, val_logits=None, val_labels=None):
         """Predict with Platt scaling for calibration."""
-        if self.platt_scalers is None:
-            # Fit Platt scalers on validation data
-            self.platt_scalers = []
-            # Convert one-hot labels to class indices if necessary
-            if val_labels.ndim > 1:
-                val_labels_indices = np.argmax(val_labels, axis=1)
-            else:
-                val_labels_indices = val_labels
-            for class_idx in range(self.num_classes):
-                scaler = LogisticRegression(random_state=42)
-                # Use one-vs-rest: target is 1 if this class, 0 otherwise
-                y_binary = (val_labels_indices == class_idx).astype(int)
-                scaler.fit(val_logits[:, class_idx].reshape(-1, 1), y_binary)
-                self.platt_scalers.append(scaler)
-
-        # Get logits for new data
-        logits_model = self.get_logits_model()
-        new_logits = logits_model.predict(X)
-
-        # Apply Platt scaling
-        calibrated_probs = np.zeros_like(new_logits)
-        for class_idx in range(self.num_classes):
-            prob = self.platt_scalers[class_idx].predict_proba(new_logits[:, class_idx].reshape(-1, 1))[:, 1]
-            calibrated_probs[:, class_idx] = prob
-
-        # Normalize to ensure probabilities sum to 1
-        calibrated_probs = calibrated_probs / np.sum(calibrated_probs, axis=1, keepdims=True)
-        return calibrated_probs
+        if self.calibrator is None:
+            if val_logits is None or val_labels is None:
+                raise ValueError("Platt scaling not loaded; provide validation logits and labels.")
+            self.fit_platt_scaling(val_logits, val_labels)
+
+        return self.calibrator.transform(self.predict_logits(X))
@@ -0,0 +1,92 @@
+import numpy as np
+
+
+class PlattCalibrator:
+    """One-vs-rest Platt scaling stored as per-class (slope, intercept) arrays.
+
+    Fitting uses the same per-class `LogisticRegression` as before; serving only
+    needs the fitted coefficients, so calibration is a single NumPy expression.
+    """
+
+    def __init__(self, slopes=None, intercepts=None):
+        self.slopes = None if slopes is None else np.asarray(slopes, dtype=np.float64)
+        self.intercepts = None if intercepts is None else np.asarray(intercepts, dtype=np.float64)
+
+    @property
+    def is_fitted(self):
+        return self.slopes is not None and self.intercepts is not None
+
+    def fit(self, val_logits, val_labels):
+        """Fit one logistic regression per class on validation logits."""
+        from sklearn.linear_model import LogisticRegression
+
+        # Convert one-hot labels to class indices if necessary
+        if val_labels.ndim > 1:
+            val_labels_indices = np.argmax(val_labels, axis=1)
+        else:
+            val_labels_indices = val_labels
+
+        num_classes = val_logits.shape[1]
+        slopes = np.zeros(num_classes)
+        intercepts = np.zeros(num_classes)
+        for class_idx in range(num_classes):
+            scaler = LogisticRegression(random_state=42)
+            # Use one-vs-rest: target is 1 if this class, 0 otherwise
+            y_binary = (val_labels_indices == class_idx).astype(int)
+            scaler.fit(val_logits[:, class_idx].reshape(-1, 1), y_binary)
+            slopes[class_idx] = scaler.coef_[0, 0]
+            intercepts[class_idx] = scaler.intercept_[0]
+
+        self.slopes = slopes
+        self.intercepts = intercepts
+        return self
+
+    def transform(self, logits):
+        """Calibrate a (n, num_classes) batch of logits into normalized probabilities."""
+        if not self.is_fitted:
+            raise ValueError("Platt scaling parameters not fitted or loaded.")
+        logits = np.asarray(logits)
+        probs = 1.0 / (1.0 + np.exp(-(logits * self.slopes + self.intercepts)))
+        # Keep the logits dtype, then normalize to ensure probabilities sum to 1
+        probs = probs.astype(logits.dtype, copy=False)
+        return probs / np.sum(probs, axis=1, keepdims=True)
+
+    def save(self, path):
+        """Save fitted parameters to an .npz file."""
+        np.savez(path, slopes=self.slopes, intercepts=self.intercepts)
+
+    @classmethod
+    def load(cls, path):
+        """Load parameters written by `save`."""
+        with np.load(path) as data:
+            return cls(data["slopes"], data["intercepts"])
+
+
+def expected_calibration_error(probabilities, labels, bins=15):
+    """Expected calibration error of top-1 confidence over equal-width confidence bins.
+
+    `labels` are class indices or one-hot rows. The result is the
+    row-weighted mean |accuracy - confidence| over the non-empty bins.
+    """
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    labels = np.asarray(labels)
+    if labels.ndim > 1:
+        labels = np.argmax(labels, axis=1)
+    confidence = probabilities.max(axis=1)
+    correct = (probabilities.argmax(axis=1) == labels).astype(np.float64)
+    bin_index = np.minimum((confidence * bins).astype(np.int64), bins - 1)
+    counts = np.bincount(bin_index, minlength=bins)
+    gaps = np.abs(
+        np.bincount(bin_index, weights=correct, minlength=bins)
+        - np.bincount(bin_index, weights=confidence, minlength=bins)
+    )
+    return float(np.sum(gaps) / max(1, counts.sum()))
+
+
+if __name__ == "__main__":
+    # Refit the calibration artifact from the stored validation logits
+    from dataset.constants import VAL_LOGITS_PATH, VAL_LABELS_PATH, PLATT_PARAMS_PATH
+
+    calibrator = PlattCalibrator().fit(np.load(VAL_LOGITS_PATH), np.load(VAL_LABELS_PATH))
+    calibrator.save(PLATT_PARAMS_PATH)
+    print(f"Saved Platt scaling parameters to {PLATT_PARAMS_PATH}")
@@ -0,0 +1,98 @@
+import numpy as np
+from models.calibration import PlattCalibrator
+from dataset.constants import DROPOUT_RATES
+
+
+class NumpyANN:
+    """Inference-only forward pass of the GeotextileANN in pure NumPy.
+
+    Loads the Dense weights exported from the Keras model (see
+    `ANNModel.export_numpy_weights`) and mirrors the `ANNModel` prediction API,
+    so serving does not need TensorFlow. Dropout is a no-op at inference,
+    except in `predict_logits_mc` (Monte Carlo dropout).
+    """
+
+    def __init__(self, num_classes=None):
+        self.num_classes = num_classes
+        self.kernels = []
+        self.biases = []
+        self.negative_slope = 0.1
+        # Rate of the Dropout after each hidden layer; files exported before rates were stored use the defaults
+        self.dropout_rates = list(DROPOUT_RATES)
+        self.calibrator = None
+
+    @property
+    def input_dim(self):
+        return self.kernels[0].shape[0]
+
+    def load_model(self, path):
+        """Load weights exported to an .npz file."""
+        with np.load(path) as data:
+            num_layers = int(data["num_layers"])
+            self.kernels = [np.ascontiguousarray(data[f"kernel_{i}"], dtype=np.float32) for i in range(num_layers)]
+            self.biases = [np.ascontiguousarray(data[f"bias_{i}"], dtype=np.float32) for i in range(num_layers)]
+            self.negative_slope = float(data["negative_slope"])
+            if "dropout_rates" in data:
+                self.dropout_rates = data["dropout_rates"].tolist()
+        self.num_classes = self.kernels[-1].shape[1]
+
+    def _dense(self, x, i):
+        return x @ self.kernels[i] + self.biases[i]
+
+    def predict_logits(self, X):
+        """Logits (pre-softmax) for a batch of encoded inputs."""
+        x = np.asarray(X, dtype=np.float32)
+        for kernel, bias in zip(self.kernels[:-1], self.biases[:-1]):
+            x = x @ kernel + bias
+            x = np.where(x > 0, x, x * self.negative_slope)
+        return x @ self.kernels[-1] + self.biases[-1]
+
+    def predict_logits_mc(self, X, samples, rng=None):
+        """(samples, n, num_classes) logits with dropout kept on, as in training.
+
+        All samples go through the network together as one (samples, n, units)
+        stack, with an independent dropout mask per sample and row. The first
+        layer comes before any dropout, so it is computed once and shared.
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        slope = np.float32(self.negative_slope)
+        last = len(self.kernels) - 1
+        x = self._dense(np.asarray(X, dtype=np.float32), 0)
+        x = np.where(x > 0, x, x * slope)
+        for i in range(1, last + 1):
+            rate = self.dropout_rates[i - 1] if i - 1 < len(self.dropout_rates) else 0.0
+            if rate > 0:
+                # Inverted dropout like tf.keras Dropout; zeroing by the boolean mask broadcasts
+                # the shared first layer to (samples, n, units) on the way
+                x = x * (rng.random((samples, *x.shape[-2:]), dtype=np.float32) >= rate)
+                x = self._dense(x * np.float32(1.0 / (1.0 - rate)), i)
+            else:
+                x = self._dense(np.broadcast_to(x, (samples, *x.shape[-2:])), i)
+            if i < last:
+                # max(x, slope * x) is LeakyReLU for 0 < slope < 1 and much faster than where() on large stacks
+                x = np.maximum(x, x * slope)
+        return x
+
+    def predict(self, X):
+        """Softmax probabilities, equivalent to the Keras model output."""
+        logits = self.predict_logits(X)
+        exp = np.exp(logits - np.max(logits, axis=1, keepdims=True))
+        return exp / np.sum(exp, axis=1, keepdims=True)
+
+    def fit_platt_scaling(self, val_logits, val_labels):
+        """Fit Platt scalers on validation logits."""
+        self.calibrator = PlattCalibrator().fit(val_logits, val_labels)
+        return self.calibrator
+
+    def load_platt_scaling(self, path):
+        """Load Platt scaling parameters fitted at training time."""
+        self.calibrator = PlattCalibrator.load(path)
+
+    def predict_with_platt_scaling(self, X, val_logits=None, val_labels=None):
+        """Predict with Platt scaling for calibration."""
+        if self.calibrator is None:
+            if val_logits is None or val_labels is None:
+                raise ValueError("Platt scaling not loaded; provide validation logits and labels.")
+            self.fit_platt_scaling(val_logits, val_labels)
+
+        return self.calibrator.transform(self.predict_logits(X))
@@ -0,0 +1,166 @@
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+MODES = ("full", "top1")
+# Packed (class, confidence) record of the "top1" table: 3 bytes per row
+TOP1_DTYPE = np.dtype([("class", np.uint8), ("confidence", np.float16)])
+
+
+def table_size(num_columns, num_levels):
+    return num_levels ** num_columns
+
+
+def place_values(num_columns, num_levels):
+    """Base-`num_levels` place value of each cluster column; the first column is the most significant."""
+    return num_levels ** np.arange(num_columns - 1, -1, -1, dtype=np.int64)
+
+
+def decode_indices(indices, num_columns, num_levels):
+    """(n, num_columns) uint8 cluster codes of the given table indices."""
+    indices = np.asarray(indices, dtype=np.int64)
+    return ((indices[:, None] // place_values(num_columns, num_levels)) % num_levels).astype(np.uint8)
+
+
+class PredictionTable:
+    """Calibrated predictions for every cluster combination, memory-mapped from disk.
+
+    Row i holds the prediction for the cluster tuple whose level codes are
+    the base-5 digits of i (first cluster column most significant). "full"
+    tables store the float16 probability vector; "top1" tables store only
+    the uint8 predicted class and its float16 confidence. The table is tied
+    to the artifact version it was built from.
+    """
+
+    def __init__(self, table, meta):
+        self.table = table
+        self.mode = meta["mode"]
+        self.version = meta["version"]
+        self.class_names = meta["class_names"]
+        self.cluster_columns = meta["cluster_columns"]
+        self.levels = meta["levels"]
+        self.level_codes = {level: code for code, level in enumerate(self.levels)}
+
+    @classmethod
+    def load(cls, path, meta_path):
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        # Plain ndarray view of the mapping: indexing a np.memmap costs several microseconds more
+        return cls(np.asarray(np.load(path, mmap_mode="r")), meta)
+
+    @property
+    def nbytes(self):
+        return self.table.nbytes
+
+    def index(self, clusters):
+        """Table row of a cluster dict, or None if a column is missing or a level unknown."""
+        index = 0
+        num_levels = len(self.levels)
+        for column in self.cluster_columns:
+            code = self.level_codes.get(clusters.get(column))
+            if code is None:
+                return None
+            index = index * num_levels + code
+        return index
+
+    def top1(self, index):
+        """(predicted class index, calibrated probability) of one row."""
+        if self.mode == "top1":
+            return self.table[index].item()
+        # Python floats: a 9-element argmax is faster without NumPy scalar overhead
+        row = self.table[index].tolist()
+        class_idx = row.index(max(row))
+        return class_idx, row[class_idx]
+
+    def probabilities(self, index):
+        """float32 probability vector of one row, or None for a "top1" table."""
+        if self.mode != "full":
+            return None
+        return self.table[index].astype(np.float32)
+
+    def rows(self, codes):
+        """float32 probabilities for an (n, num_columns) array of level codes ("full" tables only)."""
+        indices = np.asarray(codes, dtype=np.int64) @ place_values(len(self.cluster_columns), len(self.levels))
+        return self.table[indices].astype(np.float32)
+
+
+# =====================
+# Building
+# =====================
+_artifacts = None
+_table = None
+
+
+def _init_worker(path, loader_kwargs):
+    global _artifacts, _table
+    from utils.loaders import load_serving_artifacts
+
+    _artifacts = load_serving_artifacts(prediction_table=False, **loader_kwargs)
+    _table = np.load(path, mmap_mode="r+")
+
+
+def _score_block(start, stop):
+    """Score table rows [start, stop) and write them into the mapped table file."""
+    schema = _artifacts.feature_schema
+    codes = decode_indices(np.arange(start, stop), len(schema.cluster_columns), len(schema.levels))
+    probabilities = _artifacts.predict_probabilities(schema.encode_codes(codes))
+    if _table.dtype == TOP1_DTYPE:
+        class_idx = np.argmax(probabilities, axis=1)
+        _table["class"][start:stop] = class_idx
+        _table["confidence"][start:stop] = probabilities[np.arange(len(class_idx)), class_idx]
+    else:
+        _table[start:stop] = probabilities
+    _table.flush()
+    return stop - start
+
+
+def build_prediction_table(path, meta_path, mode="full", workers=None, block_size=65536, **loader_kwargs):
+    """Score every cluster combination in blocks across `workers` processes and write the table.
+
+    `loader_kwargs` go to `load_serving_artifacts`; the table records the
+    version they load, so it is only served with the same artifacts. Workers
+    write their blocks straight into the memory-mapped output file, so only
+    row counts are sent back. Returns the metadata written next to the table.
+    """
+    from utils.loaders import load_serving_artifacts
+
+    if mode not in MODES:
+        raise ValueError(f"Unknown table mode: {mode!r}")
+    artifacts = load_serving_artifacts(prediction_table=False, **loader_kwargs)
+    schema = artifacts.feature_schema
+    if len(artifacts.class_names) > 256:
+        raise ValueError("uint8 class indices support at most 256 classes")
+    rows = table_size(len(schema.cluster_columns), len(schema.levels))
+
+    if mode == "full":
+        table = np.lib.format.open_memmap(path, mode="w+", dtype=np.float16, shape=(rows, len(artifacts.class_names)))
+    else:
+        table = np.lib.format.open_memmap(path, mode="w+", dtype=TOP1_DTYPE, shape=(rows,))
+    del table
+
+    blocks = [(start, min(start + block_size, rows)) for start in range(0, rows, block_size)]
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        _init_worker(path, loader_kwargs)
+        for start, stop in blocks:
+            _score_block(start, stop)
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker, initargs=(path, loader_kwargs)
+        ) as pool:
+            list(pool.map(_score_block, *zip(*blocks)))
+
+    meta = {
+        "mode": mode,
+        "version": artifacts.version,
+        "rows": rows,
+        "class_names": [str(name) for name in artifacts.class_names],
+        "cluster_columns": schema.cluster_columns,
+        "levels": schema.levels,
+    }
+    with open(meta_path, "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
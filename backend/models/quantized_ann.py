@@ -0,0 +1,99 @@
+import numpy as np
+from models.numpy_ann import NumpyANN
+from models.calibration import PlattCalibrator
+
+PRECISIONS = ("int8", "float16")
+
+
+def quantize_kernel(kernel, precision):
+    """Quantize one (inputs, outputs) Dense kernel; return (stored kernel, per-output-channel scales).
+
+    int8 is symmetric per output channel: each column is divided by
+    max|column| / 127 and rounded, so the largest weight of every unit keeps
+    full resolution. float16 is a plain cast and needs no scales.
+    """
+    kernel = np.asarray(kernel, dtype=np.float32)
+    if precision == "float16":
+        return kernel.astype(np.float16), None
+    if precision != "int8":
+        raise ValueError(f"Unknown precision: {precision!r}")
+    max_abs = np.max(np.abs(kernel), axis=0)
+    scales = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+    quantized = np.clip(np.round(kernel / scales), -127, 127).astype(np.int8)
+    return quantized, scales
+
+
+def save_quantized_weights(path, model, precision):
+    """Write a NumpyANN's weights and Platt calibration as an int8 or float16 .npz file.
+
+    Biases and scales stay float32 and the calibration float64; together they
+    are a few hundred values.
+    """
+    arrays = {}
+    for i, (kernel, bias) in enumerate(zip(model.kernels, model.biases)):
+        arrays[f"kernel_{i}"], scales = quantize_kernel(kernel, precision)
+        if scales is not None:
+            arrays[f"scale_{i}"] = scales
+        arrays[f"bias_{i}"] = np.asarray(bias, dtype=np.float32)
+    if model.calibrator is not None:
+        arrays["platt_slopes"] = np.asarray(model.calibrator.slopes, dtype=np.float64)
+        arrays["platt_intercepts"] = np.asarray(model.calibrator.intercepts, dtype=np.float64)
+    np.savez(
+        path,
+        precision=precision,
+        num_layers=len(model.kernels),
+        negative_slope=float(model.negative_slope),
+        dropout_rates=np.asarray(model.dropout_rates, dtype=np.float64),
+        **arrays
+    )
+
+
+class QuantizedANN(NumpyANN):
+    """NumpyANN forward pass over int8 or float16 weights.
+
+    Kernels stay in their stored precision in memory. Each layer computes
+    `(x @ kernel) * scale + bias` in float32, which equals multiplying by the
+    dequantized kernel because the scales are per output channel. Logits,
+    softmax and Platt calibration follow the NumpyANN API, so serving code
+    does not need to know the model is quantized. The calibration stored in
+    the file is loaded with the weights; `load_platt_scaling` can still
+    replace it.
+    """
+
+    def __init__(self, num_classes=None):
+        super().__init__(num_classes)
+        self.precision = None
+        self.scales = []
+
+    def load_model(self, path):
+        """Load weights written by `save_quantized_weights`."""
+        with np.load(path) as data:
+            num_layers = int(data["num_layers"])
+            self.precision = str(data["precision"])
+            self.kernels = [np.ascontiguousarray(data[f"kernel_{i}"]) for i in range(num_layers)]
+            self.scales = [
+                np.ascontiguousarray(data[f"scale_{i}"]) if f"scale_{i}" in data else None
+                for i in range(num_layers)
+            ]
+            self.biases = [np.ascontiguousarray(data[f"bias_{i}"], dtype=np.float32) for i in range(num_layers)]
+            self.negative_slope = float(data["negative_slope"])
+            if "dropout_rates" in data:
+                self.dropout_rates = data["dropout_rates"].tolist()
+            if "platt_slopes" in data:
+                self.calibrator = PlattCalibrator(data["platt_slopes"], data["platt_intercepts"])
+        self.num_classes = self.kernels[-1].shape[1]
+
+    def _dense(self, x, i):
+        # float32 @ int8 / float16 promotes to float32
+        x = x @ self.kernels[i]
+        if self.scales[i] is not None:
+            x *= self.scales[i]
+        return x + self.biases[i]
+
+    def predict_logits(self, X):
+        """Logits (pre-softmax) for a batch of encoded inputs."""
+        x = np.asarray(X, dtype=np.float32)
+        for i in range(len(self.kernels) - 1):
+            x = self._dense(x, i)
+            x = np.where(x > 0, x, x * self.negative_slope)
+        return self._dense(x, len(self.kernels) - 1)
@@ -0,0 +1,87 @@
+import numpy as np
+from models.numpy_ann import NumpyANN
+from models.calibration import PlattCalibrator
+from preprocessors.feature_schema import FeatureSchema
+from scalers.scaler import DataScaler
+
+# Longest string stored for class names and feature columns
+_MAX_NAME_LENGTH = 64
+
+
+def write_serving_bundle(path, model, scaler, feature_schema, class_names):
+    """Write weights, calibration, scaler and schema into one memory-mappable .npy file.
+
+    The file holds a single record of an aligned structured dtype, so every
+    array can be mapped in place by `load_serving_bundle` and shared
+    read-only between worker processes.
+    """
+    fields = {}
+    for i, (kernel, bias) in enumerate(zip(model.kernels, model.biases)):
+        fields[f"kernel_{i}"] = np.asarray(kernel, dtype=np.float32)
+        fields[f"bias_{i}"] = np.asarray(bias, dtype=np.float32)
+    fields["negative_slope"] = np.float64(model.negative_slope)
+    fields["dropout_rates"] = np.asarray(model.dropout_rates, dtype=np.float64)
+    fields["platt_slopes"] = np.asarray(model.calibrator.slopes, dtype=np.float64)
+    fields["platt_intercepts"] = np.asarray(model.calibrator.intercepts, dtype=np.float64)
+    fields["scaler_scale"] = np.asarray(scaler.scale_, dtype=np.float64)
+    fields["scaler_min"] = np.asarray(scaler.min_, dtype=np.float64)
+    fields["class_names"] = np.asarray(class_names, dtype=f"<U{_MAX_NAME_LENGTH}")
+    fields["feature_columns"] = np.asarray(feature_schema.feature_columns, dtype=f"<U{_MAX_NAME_LENGTH}")
+    fields["cluster_columns"] = np.asarray(feature_schema.cluster_columns, dtype=f"<U{_MAX_NAME_LENGTH}")
+    fields["levels"] = np.asarray(feature_schema.levels, dtype=f"<U{_MAX_NAME_LENGTH}")
+
+    dtype = np.dtype(
+        [(name, value.dtype, value.shape) for name, value in fields.items()],
+        align=True
+    )
+    record = np.zeros(1, dtype=dtype)
+    for name, value in fields.items():
+        record[name][0] = value
+    np.save(path, record)
+
+
+def load_serving_bundle(path):
+    """Map a bundle written by `write_serving_bundle` read-only.
+
+    Returns (model, scaler, feature_schema, class_names); the numeric arrays
+    are views into the mapped file, so N workers share one physical copy.
+    """
+    bundle = np.load(path, mmap_mode="r")
+    names = bundle.dtype.names
+    # Index the field first so each array stays a view into the mapping
+    record = {name: bundle[name][0] for name in names}
+
+    model = NumpyANN()
+    num_layers = sum(1 for name in names if name.startswith("kernel_"))
+    model.kernels = [record[f"kernel_{i}"] for i in range(num_layers)]
+    model.biases = [record[f"bias_{i}"] for i in range(num_layers)]
+    model.negative_slope = float(record["negative_slope"])
+    if "dropout_rates" in names:
+        model.dropout_rates = record["dropout_rates"].tolist()
+    model.num_classes = model.kernels[-1].shape[1]
+    model.calibrator = PlattCalibrator(record["platt_slopes"], record["platt_intercepts"])
+
+    scaler = DataScaler()
+    scaler.scale_ = record["scaler_scale"]
+    scaler.min_ = record["scaler_min"]
+
+    feature_schema = FeatureSchema(
+        record["feature_columns"].tolist(),
+        record["cluster_columns"].tolist(),
+        record["levels"].tolist()
+    )
+    class_names = record["class_names"].tolist()
+    return model, scaler, feature_schema, class_names
+
+
+if __name__ == "__main__":
+    # Rebuild the bundle from the individual artifacts written by train.py
+    from dataset.constants import SERVING_BUNDLE_PATH
+    from utils.loaders import load_serving_artifacts
+
+    artifacts = load_serving_artifacts(backend="numpy", shared=False)
+    write_serving_bundle(
+        SERVING_BUNDLE_PATH, artifacts.model, artifacts.scaler,
+        artifacts.feature_schema, artifacts.class_names
+    )
+    print(f"Saved serving bundle to {SERVING_BUNDLE_PATH}")
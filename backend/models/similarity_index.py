@@ -0,0 +1,134 @@
+import numpy as np
+import joblib
+from dataset.constants import (
+    DATASET_PATH, PROPERTY_COLUMNS, CLUSTER_COLUMNS, CLUSTER_LEVELS, CLUSTER_THRESHOLDS, SIMILARITY_INDEX_PATH
+)
+
+
+def level_centers(values, normalized):
+    """(columns, levels) normalized stand-in value of each cluster level, for cluster-only queries.
+
+    A level is represented by the median of the catalog rows in it. Levels
+    without rows use the middle of their bin, clipped to the catalog's range.
+    """
+    from preprocessors.clustering import column_cluster_codes
+
+    centers = np.empty((len(CLUSTER_COLUMNS), len(CLUSTER_LEVELS)), dtype=np.float64)
+    for j, column in enumerate(CLUSTER_COLUMNS):
+        low, high = values[:, j].min(), values[:, j].max()
+        edges = np.asarray(CLUSTER_THRESHOLDS[column]["edges"], dtype=np.float64)
+        bounds = np.clip((np.concatenate([[low], edges, [high]]) - low) / ((high - low) or 1.0), 0.0, 1.0)
+        codes = column_cluster_codes(column, values[:, j])
+        for k in range(len(CLUSTER_LEVELS)):
+            in_level = normalized[codes == k, j]
+            centers[j, k] = np.median(in_level) if in_level.size else (bounds[k] + bounds[k + 1]) / 2
+    return centers
+
+
+class SimilarityIndex:
+    """KD-tree over the nine raw properties of the catalog, min-max normalized.
+
+    Built once from the dataset at training time and saved with joblib
+    uncompressed, so `load` memory-maps the tree's arrays read-only instead
+    of copying them. Property queries are normalized like the catalog;
+    cluster queries use the per-level centers from `level_centers`.
+    Distances are Euclidean in normalized units (each property spans 0..1).
+    """
+
+    def __init__(self, tree, offset, scale, types, type_names, rows, centers):
+        self.tree = tree
+        self.offset = offset
+        self.scale = scale
+        # Type of each catalog row as an index into type_names
+        self.types = types
+        self.type_names = type_names
+        # Data row number (0-based, header excluded) of each indexed row in the CSV
+        self.rows = rows
+        self.centers = centers
+
+    @classmethod
+    def build(cls, values, type_names, types, rows=None, leaf_size=40):
+        """Index an (n, 9) array of raw properties in PROPERTY_COLUMNS order."""
+        from sklearn.neighbors import KDTree
+
+        values = np.asarray(values, dtype=np.float64)
+        offset = values.min(axis=0)
+        scale = values.max(axis=0) - offset
+        scale[scale == 0] = 1.0
+        normalized = (values - offset) / scale
+        if rows is None:
+            rows = np.arange(len(values))
+        return cls(
+            KDTree(normalized, leaf_size=leaf_size), offset, scale, np.asarray(types, dtype=np.int16),
+            [str(name) for name in type_names], np.asarray(rows, dtype=np.int64),
+            level_centers(values, normalized)
+        )
+
+    @classmethod
+    def from_csv(cls, csv_path=DATASET_PATH, chunk_size=1_000_000, max_rows=None):
+        """Index every dataset row with all nine properties present, read in chunks.
+
+        With `max_rows`, only a uniform random sample of that many rows is
+        read and indexed (see `read_complete_rows`).
+        """
+        # Training-time only; serving loads the saved index without pandas
+        from preprocessors.data_preprocessor import DataPreprocessor
+        from preprocessors.csv_sample import read_complete_rows
+
+        target = DataPreprocessor().target_column
+        values, types, rows = [], [], []
+        for chunk in read_complete_rows(csv_path, [target, *PROPERTY_COLUMNS], chunk_size, max_rows):
+            values.append(chunk[PROPERTY_COLUMNS].to_numpy(dtype=np.float64))
+            types.append(chunk[target].astype(str).to_numpy())
+            rows.append(chunk.index.to_numpy())
+        type_names, types = np.unique(np.concatenate(types), return_inverse=True)
+        return cls.build(np.concatenate(values), type_names, types, np.concatenate(rows))
+
+    def save(self, path=SIMILARITY_INDEX_PATH):
+        joblib.dump({
+            "tree": self.tree, "offset": self.offset, "scale": self.scale, "types": self.types,
+            "type_names": self.type_names, "rows": self.rows, "centers": self.centers
+        }, path)
+
+    @classmethod
+    def load(cls, path=SIMILARITY_INDEX_PATH):
+        return cls(**joblib.load(path, mmap_mode="r"))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def query_properties(self, values, k):
+        """(distances, indices), each (n, k), of the nearest catalog rows to raw property rows."""
+        normalized = (np.asarray(values, dtype=np.float64).reshape(-1, len(PROPERTY_COLUMNS)) - self.offset) / self.scale
+        return self.tree.query(normalized, k=min(k, len(self)))
+
+    def query_codes(self, codes, k):
+        """(distances, indices) of the nearest catalog rows to rows of cluster codes."""
+        codes = np.asarray(codes, dtype=np.int64).reshape(-1, len(CLUSTER_COLUMNS))
+        return self.tree.query(self.centers[np.arange(len(CLUSTER_COLUMNS)), codes], k=min(k, len(self)))
+
+    def neighbors(self, distances, indices):
+        """Per query row, the neighbors as {"row", "type", "distance", "properties"} dicts."""
+        data = self.tree.get_arrays()[0]
+        values = np.round(np.asarray(data[indices.ravel()]) * self.scale + self.offset, 4).reshape(*indices.shape, -1)
+        return [
+            [
+                {
+                    "row": int(self.rows[i]),
+                    "type": self.type_names[self.types[i]],
+                    "distance": round(distance, 4),
+                    "properties": dict(zip(PROPERTY_COLUMNS, row_values))
+                }
+                for i, distance, row_values in zip(query_indices, query_distances, query_values)
+            ]
+            for query_indices, query_distances, query_values in zip(
+                indices.tolist(), distances.tolist(), values.tolist()
+            )
+        ]
+
+
+if __name__ == "__main__":
+    # Rebuild the similarity index artifact from the dataset
+    index = SimilarityIndex.from_csv()
+    index.save()
+    print(f"Saved a {len(index)}-row similarity index to {SIMILARITY_INDEX_PATH}")
@@ -1,8 +1,17 @@
 import numpy as np
-import pandas as pd
-import tensorflow as tf
 import joblib
-import json
+from functools import lru_cache
+from preprocessors.feature_schema import FeatureSchema
+from utils.loaders import load_inference_model
+from dataset.constants import LABEL_ENCODER_PATH, FEATURE_SCHEMA_PATH
+
+@lru_cache(maxsize=None)
+def load_predictor():
+    """Load model, encoder, and feature metadata once per process."""
+    encoder = joblib.load(LABEL_ENCODER_PATH)
+    model = load_inference_model(encoder.categories_[0].shape[0])
+    feature_schema = FeatureSchema.load(FEATURE_SCHEMA_PATH)
+    return model, encoder, feature_schema
 
 def predict_cluster_input(input_clusters):
     """
@@ -21,27 +30,11 @@ def predict_cluster_input(input_clusters):
     }
     """
 
-    # Load model, encoder, and feature metadata
-    model = tf.keras.models.load_model("models/geotextile_ann.keras")
-    encoder = joblib.load("models/label_encoder.pkl")
+    # Model, encoder, and feature metadata (loaded on the first call only)
+    model, encoder, feature_schema = load_predictor()
 
-    with open("models/feature_columns.json", "r") as f:
-        feature_columns = json.load(f)
-
-    # Convert input into DataFrame
-    df_input = pd.DataFrame([input_clusters])
-
-    # One-hot encode using same cluster columns
-    df_encoded = pd.get_dummies(df_input)
-
-    # Add missing columns and align order
-    for col in feature_columns:
-        if col not in df_encoded.columns:
-            df_encoded[col] = 0
-    df_encoded = df_encoded[feature_columns]
-
-    # Convert to numeric numpy array
-    X_input = df_encoded.to_numpy(dtype=np.float32)
+    # One-hot encode into the training feature layout
+    X_input = feature_schema.encode(input_clusters)
 
     # Predict
     y_pred = model.predict(X_input)
@@ -0,0 +1,25 @@
+import numpy as np
+from dataset.constants import CLUSTER_THRESHOLDS
+
+# Bin edges as float arrays, ready for np.searchsorted
+_EDGES = {
+    column: np.asarray(
+        threshold["edges"][1:] if threshold["zero_is_c1"] else threshold["edges"], dtype=np.float64
+    )
+    for column, threshold in CLUSTER_THRESHOLDS.items()
+}
+
+
+def column_cluster_codes(column, x):
+    """Map raw values of one property to cluster codes (0 = C1 ... 4 = C5).
+
+    Follows CLUSTER_THRESHOLDS: x <= edge upper bounds, and x == 0 is C1 for
+    the recycled/biobased content properties.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    if CLUSTER_THRESHOLDS[column]["zero_is_c1"]:
+        codes = np.searchsorted(_EDGES[column], x, side="left") + 1
+        codes[x == 0] = 0
+    else:
+        codes = np.searchsorted(_EDGES[column], x, side="left")
+    return codes
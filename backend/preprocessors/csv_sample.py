@@ -0,0 +1,29 @@
+import numpy as np
+
+
+def read_complete_rows(csv_path, columns, chunk_size=1_000_000, max_rows=None, seed=42):
+    """Yield DataFrame chunks of the rows of `columns` with no missing value, keeping the CSV row index.
+
+    With `max_rows`, a single frame is yielded instead: a uniform random
+    sample of at most `max_rows` of those rows, in file order. Every row gets
+    a random key and the `max_rows` smallest keys are kept while streaming,
+    so memory stays bounded by `max_rows` plus one chunk however long the
+    file is, and the total row count is not needed up front.
+    """
+    import pandas as pd
+
+    chunks = (chunk.dropna() for chunk in pd.read_csv(csv_path, usecols=columns, chunksize=chunk_size))
+    if max_rows is None:
+        yield from chunks
+        return
+
+    rng = np.random.default_rng(seed)
+    sample, keys = None, np.empty(0)
+    for chunk in chunks:
+        sample = chunk if sample is None else pd.concat([sample, chunk])
+        keys = np.concatenate([keys, rng.random(len(chunk))])
+        if len(keys) > max_rows:
+            keep = np.argpartition(keys, max_rows - 1)[:max_rows]
+            sample, keys = sample.iloc[keep], keys[keep]
+    if sample is not None:
+        yield sample.sort_index()
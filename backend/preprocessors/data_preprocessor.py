@@ -2,16 +2,17 @@ import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import OneHotEncoder
 import numpy as np
-from dataset.constants import DATASET_PATH, TRAIN_SPLIT, VAL_SPLIT, TEST_SPLIT
+from dataset.constants import (
+    DATASET_PATH, TRAIN_SPLIT, VAL_SPLIT, TEST_SPLIT,
+    CLUSTER_COLUMNS, CLUSTER_LEVELS, PROPERTY_COLUMNS
+)
+from preprocessors.clustering import column_cluster_codes
+from preprocessors.dataset_cache import load_encoded_dataset
 
 class DataPreprocessor:
     def __init__(self):
         self.encoder = OneHotEncoder(sparse_output=False)
-        self.feature_columns = [
-            'Tensile Strength (kN/m)', 'Puncture Resistance (N)', 'Permittivity (s⁻¹)',
-            'Filtration Efficiency (%)', 'Recycled Content (%)', 'Biobased Content (%)',
-            'UV Strength Retained (% after 500h)', 'Material Cost (PHP/m²)', 'Installation Cost (PHP/m²)'
-        ]
+        self.feature_columns = list(PROPERTY_COLUMNS)
         self.target_column = 'Type'
 
     # =====================
@@ -25,82 +26,24 @@ class DataPreprocessor:
     # =====================
     # Cluster Mapping
     # =====================
+    def cluster_codes(self, values):
+        """Map raw property values to integer cluster codes (0 = C1 ... 4 = C5).
+
+        `values` is an (n, 9) array with columns in `feature_columns` order.
+        Bins follow CLUSTER_THRESHOLDS (see `column_cluster_codes`).
+        """
+        values = np.asarray(values, dtype=np.float64).reshape(-1, len(CLUSTER_COLUMNS))
+        codes = np.empty(values.shape, dtype=np.uint8)
+        for j, column in enumerate(CLUSTER_COLUMNS):
+            codes[:, j] = column_cluster_codes(column, values[:, j])
+        return codes
+
     def assign_clusters(self, df):
         """Assign expert-defined clusters (C1–C5) for each numeric property."""
-
-        def tensile_cluster(x):
-            if x <= 30: return "C1"
-            elif x <= 60: return "C2"
-            elif x <= 120: return "C3"
-            elif x <= 200: return "C4"
-            else: return "C5"
-
-        def puncture_cluster(x):
-            if x <= 600: return "C1"
-            elif x <= 1000: return "C2"
-            elif x <= 1400: return "C3"
-            elif x <= 1800: return "C4"
-            else: return "C5"
-
-        def permittivity_cluster(x):
-            if x <= 0.2: return "C1"
-            elif x <= 0.5: return "C2"
-            elif x <= 1.0: return "C3"
-            elif x <= 1.5: return "C4"
-            else: return "C5"
-
-        def filtration_cluster(x):
-            if x <= 75: return "C1"
-            elif x <= 85: return "C2"
-            elif x <= 90: return "C3"
-            elif x <= 95: return "C4"
-            else: return "C5"
-
-        def recycled_cluster(x):
-            if x == 0: return "C1"
-            elif x <= 30: return "C2"
-            elif x <= 60: return "C3"
-            elif x <= 99: return "C4"
-            else: return "C5"
-
-        def biobased_cluster(x):
-            if x == 0: return "C1"
-            elif x <= 30: return "C2"
-            elif x <= 70: return "C3"
-            elif x <= 99: return "C4"
-            else: return "C5"
-
-        def uv_cluster(x):
-            if x <= 30: return "C1"
-            elif x <= 50: return "C2"
-            elif x <= 70: return "C3"
-            elif x <= 85: return "C4"
-            else: return "C5"
-
-        def material_cost_cluster(x):
-            if x <= 100: return "C1"
-            elif x <= 200: return "C2"
-            elif x <= 400: return "C3"
-            elif x <= 700: return "C4"
-            else: return "C5"
-
-        def install_cost_cluster(x):
-            if x <= 50: return "C1"
-            elif x <= 100: return "C2"
-            elif x <= 200: return "C3"
-            elif x <= 350: return "C4"
-            else: return "C5"
-
-        # Apply clusters
-        df["Tensile Cluster"] = df["Tensile Strength (kN/m)"].apply(tensile_cluster)
-        df["Puncture Cluster"] = df["Puncture Resistance (N)"].apply(puncture_cluster)
-        df["Permittivity Cluster"] = df["Permittivity (s⁻¹)"].apply(permittivity_cluster)
-        df["Filtration Cluster"] = df["Filtration Efficiency (%)"].apply(filtration_cluster)
-        df["Recycled Cluster"] = df["Recycled Content (%)"].apply(recycled_cluster)
-        df["Biobased Cluster"] = df["Biobased Content (%)"].apply(biobased_cluster)
-        df["UV Cluster"] = df["UV Strength Retained (% after 500h)"].apply(uv_cluster)
-        df["Material Cost Cluster"] = df["Material Cost (PHP/m²)"].apply(material_cost_cluster)
-        df["Install Cost Cluster"] = df["Installation Cost (PHP/m²)"].apply(install_cost_cluster)
+        codes = self.cluster_codes(df[self.feature_columns].to_numpy(dtype=np.float64))
+        levels = np.array(CLUSTER_LEVELS, dtype=object)
+        for j, column in enumerate(CLUSTER_COLUMNS):
+            df[column] = levels[codes[:, j]]
 
         return df
 
@@ -129,17 +72,25 @@ class DataPreprocessor:
     # =====================
     # Main Preprocessing Pipeline
     # =====================
-    def preprocess(self):
-        """Full preprocessing pipeline with cluster mapping and clean numeric encoding."""
+    def preprocess(self, use_cache=True):
+        """Full preprocessing pipeline with cluster mapping and clean numeric encoding.
+
+        The encoded, split dataset is read from the dataset cache when the CSV
+        and cluster thresholds are unchanged (see preprocessors/dataset_cache.py).
+        """
+        if use_cache:
+            dataset = load_encoded_dataset()
+            self.encoder.fit(np.array(dataset.class_names, dtype=object).reshape(-1, 1))
+            X_train, y_train = dataset.split("train", np.float64)
+            X_val, y_val = dataset.split("val", np.float64)
+            X_test, y_test = dataset.split("test", np.float64)
+            return X_train, X_val, X_test, y_train, y_val, y_test
+
         self.load_data()
         self.df = self.assign_clusters(self.df)
 
         # One-hot encode the cluster labels for ANN input
-        cluster_columns = [
-            "Tensile Cluster", "Puncture Cluster", "Permittivity Cluster",
-            "Filtration Cluster", "Recycled Cluster", "Biobased Cluster",
-            "UV Cluster", "Material Cost Cluster", "Install Cost Cluster"
-        ]
+        cluster_columns = CLUSTER_COLUMNS
 
         # Get only cluster columns + target
         df_clusters = self.df[cluster_columns + [self.target_column]].copy()
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from dataset.constants import (
+    DATASET_PATH, DATASET_CACHE, DATASET_CACHE_DIR, TRAIN_SPLIT, VAL_SPLIT, TEST_SPLIT,
+    CLUSTER_COLUMNS, CLUSTER_LEVELS, CLUSTER_THRESHOLDS, PROPERTY_COLUMNS
+)
+
+# Bump when the cached arrays change meaning, so old entries stop matching
+CACHE_FORMAT = 1
+META_NAME = "meta.json"
+SPLITS = ("train", "val", "test")
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_key(csv_path=DATASET_PATH, target_column="Type"):
+    """Hash of the CSV content and everything that shapes its encoding.
+
+    Changing a row of the data, a cluster threshold, the level names or the
+    split proportions gives a new key, so a stale entry is never reused.
+    """
+    definition = json.dumps({
+        "format": CACHE_FORMAT,
+        "csv_sha256": file_sha256(csv_path),
+        "target_column": target_column,
+        "cluster_columns": CLUSTER_COLUMNS,
+        "cluster_levels": CLUSTER_LEVELS,
+        "thresholds": CLUSTER_THRESHOLDS,
+        "splits": [TRAIN_SPLIT, VAL_SPLIT, TEST_SPLIT],
+    }, sort_keys=True)
+    return hashlib.sha256(definition.encode("utf-8")).hexdigest()[:16]
+
+
+class EncodedDataset:
+    """The dataset clustered, one-hot encoded and split, as train.py uses it.
+
+    `X` is the (n, num_features) uint8 one-hot matrix in `feature_columns`
+    order (the `pd.get_dummies` layout), `labels` the class index of each
+    row into the sorted `class_names`, `codes` the (n, 9) uint8 cluster
+    codes, and `splits` the train/val/test row indices of `split_data`.
+    Loaded from the cache, the arrays are read-only memory maps.
+    """
+
+    def __init__(self, X, labels, codes, splits, feature_columns, class_names, key=None, cached=False):
+        self.X = X
+        self.labels = labels
+        self.codes = codes
+        self.splits = splits
+        self.feature_columns = feature_columns
+        self.class_names = class_names
+        self.key = key
+        self.cached = cached
+
+    def __len__(self):
+        return len(self.labels)
+
+    def split(self, name, dtype=np.float32):
+        """(features, one-hot labels) of one split, copied out as `dtype`."""
+        rows = self.splits[name]
+        return np.asarray(self.X[rows], dtype=dtype), self.one_hot(self.labels[rows], dtype)
+
+    def one_hot(self, labels, dtype=np.float64):
+        return np.eye(len(self.class_names), dtype=dtype)[labels]
+
+    # =====================
+    # Encoding and persistence
+    # =====================
+    @classmethod
+    def encode(cls, csv_path=DATASET_PATH, key=None):
+        """Read, cluster, encode and split the CSV from scratch."""
+        import pandas as pd
+        from preprocessors.data_preprocessor import DataPreprocessor
+        from preprocessors.feature_schema import FeatureSchema
+
+        preprocessor = DataPreprocessor()
+        target = preprocessor.target_column
+        df = pd.read_csv(csv_path, usecols=[target, *PROPERTY_COLUMNS])
+        codes = preprocessor.cluster_codes(df[PROPERTY_COLUMNS].to_numpy(dtype=np.float64))
+
+        # Same levels and column order as pd.get_dummies, same sorted classes as OneHotEncoder
+        level_counts = np.stack([np.bincount(codes[:, j], minlength=len(CLUSTER_LEVELS)) for j in range(codes.shape[1])])
+        schema = FeatureSchema.from_level_counts(level_counts)
+        X = schema.encode_codes(codes).astype(np.uint8)
+        class_names, labels = np.unique(df[target].astype(str).to_numpy(), return_inverse=True)
+        labels = labels.astype(np.min_scalar_type(len(class_names) - 1))
+
+        train_idx, val_idx, test_idx, _, _, _ = preprocessor.split_data(np.arange(len(labels)), labels)
+        splits = {"train": train_idx, "val": val_idx, "test": test_idx}
+        return cls(X, labels, codes, splits, schema.feature_columns, [str(name) for name in class_names], key)
+
+    def save(self, directory, csv_path=DATASET_PATH):
+        """Write the arrays and metadata into a new `directory`, atomically."""
+        parent = os.path.dirname(os.path.abspath(directory))
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=parent)
+        try:
+            np.save(os.path.join(staging, "X.npy"), self.X)
+            np.save(os.path.join(staging, "labels.npy"), self.labels)
+            np.save(os.path.join(staging, "codes.npy"), self.codes)
+            for name in SPLITS:
+                np.save(os.path.join(staging, f"{name}_idx.npy"), self.splits[name])
+            with open(os.path.join(staging, META_NAME), "w") as f:
+                json.dump({
+                    "key": self.key,
+                    "source": os.path.abspath(csv_path),
+                    "rows": len(self),
+                    "feature_columns": self.feature_columns,
+                    "class_names": self.class_names,
+                    "created_at": time.time(),
+                }, f, indent=2)
+            # Readers only ever see a complete entry; a concurrent writer of the same key wins or loses whole
+            os.rename(staging, directory)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            if not os.path.exists(os.path.join(directory, META_NAME)):
+                raise
+
+    @classmethod
+    def load(cls, directory):
+        """Memory-map a cache entry written by `save`."""
+        with open(os.path.join(directory, META_NAME), "r") as f:
+            meta = json.load(f)
+
+        def array(name):
+            return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+
+        return cls(
+            array("X"), array("labels"), array("codes"), {name: array(f"{name}_idx") for name in SPLITS},
+            meta["feature_columns"], meta["class_names"], meta["key"], cached=True
+        )
+
+
+def load_encoded_dataset(csv_path=DATASET_PATH, cache_dir=DATASET_CACHE_DIR, use_cache=DATASET_CACHE):
+    """The encoded dataset, from the cache when its key matches, else encoded and cached.
+
+    With `use_cache=False` (or no `cache_dir`) the CSV is always encoded and nothing is written.
+    """
+    if not use_cache or not cache_dir:
+        return EncodedDataset.encode(csv_path)
+    key = cache_key(csv_path)
+    directory = os.path.join(cache_dir, key)
+    if os.path.exists(os.path.join(directory, META_NAME)):
+        return EncodedDataset.load(directory)
+    dataset = EncodedDataset.encode(csv_path, key)
+    dataset.save(directory, csv_path)
+    return dataset
+
+
+def prune_cache(cache_dir=DATASET_CACHE_DIR, keep=()):
+    """Delete cache entries whose key is not in `keep`; return the removed keys."""
+    if not os.path.isdir(cache_dir):
+        return []
+    removed = []
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        # Staging directories of builds in progress start with a dot
+        if name not in keep and not name.startswith(".") and os.path.isdir(path):
+            shutil.rmtree(path)
+            removed.append(name)
+    return removed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the encoded dataset cache for the current CSV and thresholds")
+    parser.add_argument("--csv", default=DATASET_PATH)
+    parser.add_argument("--prune", action="store_true", help="Delete entries for other data or thresholds")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    dataset = load_encoded_dataset(args.csv)
+    print(f"{'Loaded' if dataset.cached else 'Built'} cache entry {dataset.key}: {len(dataset)} rows, "
+          f"{len(dataset.feature_columns)} features, {len(dataset.class_names)} classes "
+          f"in {time.perf_counter() - start:.3f} s")
+    if args.prune:
+        print(f"Removed {len(prune_cache(keep={dataset.key}))} stale entries")
@@ -0,0 +1,168 @@
+import json
+import numpy as np
+from dataset.constants import CLUSTER_COLUMNS, CLUSTER_LEVELS
+from preprocessors.clustering import column_cluster_codes
+
+
+class FeatureSchema:
+    """Fixed mapping from (cluster column, level) pairs to ANN input indices.
+
+    Built once from the one-hot column names produced at training time, so
+    serving can encode cluster dicts without re-reading the dataset.
+    """
+
+    def __init__(self, feature_columns, cluster_columns=None, levels=None):
+        self.feature_columns = list(feature_columns)
+        self.cluster_columns = list(cluster_columns or CLUSTER_COLUMNS)
+        self.levels = list(levels or CLUSTER_LEVELS)
+        self.num_features = len(self.feature_columns)
+
+        # (cluster column, level) -> column index in the model input
+        self.index = {}
+        for idx, name in enumerate(self.feature_columns):
+            column, level = name.rsplit("_", 1)
+            self.index[(column, level)] = idx
+
+        # (cluster column position, level code) -> column index, -1 if unseen in training
+        self.code_index = np.full((len(self.cluster_columns), len(self.levels)), -1, dtype=np.int64)
+        for (column, level), idx in self.index.items():
+            if column in self.cluster_columns and level in self.levels:
+                self.code_index[self.cluster_columns.index(column), self.levels.index(level)] = idx
+
+    # =====================
+    # Persistence
+    # =====================
+    def to_dict(self):
+        """Serializable representation of the schema."""
+        index = {column: {} for column in self.cluster_columns}
+        for (column, level), idx in self.index.items():
+            index.setdefault(column, {})[level] = idx
+        return {
+            "cluster_columns": self.cluster_columns,
+            "levels": self.levels,
+            "feature_columns": self.feature_columns,
+            "index": index,
+        }
+
+    def save(self, path):
+        """Save schema to a JSON file."""
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def from_level_counts(cls, level_counts, cluster_columns=None, levels=None):
+        """Schema for the levels seen in training, given a (columns, levels) count matrix.
+
+        Columns come out in the same order as `pd.get_dummies` on the cluster labels.
+        """
+        cluster_columns = list(cluster_columns or CLUSTER_COLUMNS)
+        levels = list(levels or CLUSTER_LEVELS)
+        level_counts = np.asarray(level_counts)
+        feature_columns = [
+            f"{column}_{level}"
+            for j, column in enumerate(cluster_columns)
+            for level in sorted(level for k, level in enumerate(levels) if level_counts[j, k] > 0)
+        ]
+        return cls(feature_columns, cluster_columns, levels)
+
+    @classmethod
+    def load(cls, path):
+        """Load schema from a JSON file written by `save`."""
+        with open(path, "r") as f:
+            data = json.load(f)
+        return cls(data["feature_columns"], data["cluster_columns"], data["levels"])
+
+    # =====================
+    # Validation
+    # =====================
+    def validate(self, clusters):
+        """Return an error message for an invalid cluster dict, or None if it is valid."""
+        missing = [column for column in self.cluster_columns if column not in clusters]
+        if missing:
+            return f"Missing cluster columns: {', '.join(missing)}"
+        unknown = [column for column in clusters if column not in self.cluster_columns]
+        if unknown:
+            return f"Unknown cluster columns: {', '.join(unknown)}"
+        invalid = [column for column in self.cluster_columns if clusters[column] not in self.levels]
+        if invalid:
+            return f"Invalid cluster levels for: {', '.join(invalid)} (expected one of {', '.join(self.levels)})"
+        return None
+
+    # =====================
+    # Encoding
+    # =====================
+    def encode(self, clusters, out=None):
+        """One-hot encode a single cluster dict into a (1, num_features) float32 array.
+
+        Pairs that were never seen during training (unknown columns or levels)
+        are ignored, matching `pd.get_dummies` followed by column alignment.
+        """
+        if out is None:
+            out = np.zeros((1, self.num_features), dtype=np.float32)
+        else:
+            out.fill(0.0)
+        row = out.reshape(-1)
+        for column, level in clusters.items():
+            idx = self.index.get((column, level))
+            if idx is not None:
+                row[idx] = 1.0
+        return out
+
+    def cache_key(self, clusters):
+        """Canonical key for a cluster dict: sorted tuple of its active feature indices."""
+        return tuple(sorted(
+            idx for idx in (self.index.get((column, level)) for column, level in clusters.items())
+            if idx is not None
+        ))
+
+    def encode_batch(self, clusters_list, out=None):
+        """One-hot encode a list of cluster dicts into a (n, num_features) float32 array."""
+        n = len(clusters_list)
+        if out is None:
+            out = np.zeros((n, self.num_features), dtype=np.float32)
+        else:
+            out.fill(0.0)
+        for i, clusters in enumerate(clusters_list):
+            for column, level in clusters.items():
+                idx = self.index.get((column, level))
+                if idx is not None:
+                    out[i, idx] = 1.0
+        return out
+
+    def encode_codes(self, codes, out=None):
+        """One-hot encode an (n, 9) array of integer cluster codes (0 = C1 ... 4 = C5).
+
+        Codes are scattered straight into a (n, num_features) float32 matrix;
+        levels never seen during training leave their feature group all zero.
+        """
+        codes = np.asarray(codes).reshape(-1, len(self.cluster_columns))
+        n = codes.shape[0]
+        if out is None:
+            out = np.zeros((n, self.num_features), dtype=np.float32)
+        else:
+            out.fill(0.0)
+        idx = self.code_index[np.arange(len(self.cluster_columns)), codes]
+        flat = idx + (np.arange(n) * self.num_features)[:, None]
+        out.reshape(-1)[flat[idx >= 0]] = 1.0
+        return out
+
+    def encode_properties(self, values, out=None):
+        """Cluster and one-hot encode raw property values in one pass.
+
+        `values` is an (n, 9) array of raw properties in cluster column order.
+        Each column is binned and scattered straight into the (n, num_features)
+        float32 matrix, without building cluster labels or a DataFrame.
+        """
+        values = np.asarray(values, dtype=np.float64).reshape(-1, len(self.cluster_columns))
+        n = values.shape[0]
+        if out is None:
+            out = np.zeros((n, self.num_features), dtype=np.float32)
+        else:
+            out.fill(0.0)
+        flat_out = out.reshape(-1)
+        row_offsets = np.arange(n) * self.num_features
+        for j, column in enumerate(self.cluster_columns):
+            idx = self.code_index[j, column_cluster_codes(column, values[:, j])]
+            seen = idx >= 0
+            flat_out[row_offsets[seen] + idx[seen]] = 1.0
+        return out
@@ -0,0 +1,165 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from dataset.constants import (
+    DATASET_PATH, TRAIN_SPLIT, VAL_SPLIT, CLUSTER_COLUMNS, CLUSTER_LEVELS, PROPERTY_COLUMNS,
+    TRAINING_SHARDS_DIR, SHARD_SIZE
+)
+from preprocessors.data_preprocessor import DataPreprocessor
+
+MANIFEST_NAME = "manifest.json"
+SPLITS = ("train", "val", "test")
+
+
+class ShardWriter:
+    """Buffers (codes, labels) rows of one split and writes them as fixed-size .npy shards."""
+
+    def __init__(self, directory, split, shard_size, label_dtype):
+        self.directory = directory
+        self.split = split
+        self.shard_size = shard_size
+        self.label_dtype = label_dtype
+        self.codes, self.labels = [], []
+        self.buffered = 0
+        self.rows = 0
+        self.shards = []
+
+    def append(self, codes, labels):
+        self.codes.append(codes)
+        self.labels.append(labels)
+        self.buffered += len(codes)
+        while self.buffered >= self.shard_size:
+            self._write(self.shard_size)
+
+    def close(self):
+        if self.buffered:
+            self._write(self.buffered)
+
+    def _write(self, size):
+        codes, labels = np.concatenate(self.codes), np.concatenate(self.labels)
+        name = f"{self.split}-{len(self.shards):05d}"
+        np.save(os.path.join(self.directory, f"{name}-codes.npy"), codes[:size])
+        np.save(os.path.join(self.directory, f"{name}-labels.npy"), labels[:size].astype(self.label_dtype))
+        self.shards.append({"name": name, "rows": size})
+        self.rows += size
+        self.codes, self.labels = [codes[size:]], [labels[size:]]
+        self.buffered = len(codes) - size
+
+
+def write_shards(csv_path=DATASET_PATH, directory=TRAINING_SHARDS_DIR, shard_size=SHARD_SIZE,
+                 chunk_size=1_000_000, seed=42):
+    """Stream a dataset CSV into sharded uint8 cluster codes and integer class labels.
+
+    Rows are read in chunks, so memory does not grow with the file. Each row
+    is assigned to train/val/test at random (TRAIN_SPLIT/VAL_SPLIT/TEST_SPLIT
+    proportions, seeded). The manifest records the class names, the shards
+    of each split and the per-level counts of the training split.
+    """
+    preprocessor = DataPreprocessor()
+    target = preprocessor.target_column
+    os.makedirs(directory, exist_ok=True)
+
+    # First pass over the label column only: sorted class names, as OneHotEncoder orders them
+    class_names = set()
+    for chunk in pd.read_csv(csv_path, usecols=[target], chunksize=chunk_size):
+        class_names.update(chunk[target].unique().tolist())
+    class_names = np.array(sorted(class_names), dtype=object)
+    label_dtype = np.min_scalar_type(len(class_names) - 1)
+
+    rng = np.random.default_rng(seed)
+    writers = {split: ShardWriter(directory, split, shard_size, label_dtype) for split in SPLITS}
+    level_counts = np.zeros((len(CLUSTER_COLUMNS), len(CLUSTER_LEVELS)), dtype=np.int64)
+    unique_codes = []
+    columns = [target] + PROPERTY_COLUMNS
+    for chunk in pd.read_csv(csv_path, usecols=columns, chunksize=chunk_size):
+        codes = preprocessor.cluster_codes(chunk[PROPERTY_COLUMNS].to_numpy(dtype=np.float64))
+        labels = np.searchsorted(class_names, chunk[target].to_numpy(dtype=object))
+        unique_codes.append(np.unique(codes, axis=0))
+
+        draw = rng.random(len(codes))
+        split_index = (draw >= TRAIN_SPLIT).astype(np.int8) + (draw >= TRAIN_SPLIT + VAL_SPLIT)
+        for i, split in enumerate(SPLITS):
+            mask = split_index == i
+            writers[split].append(codes[mask], labels[mask])
+            if split == "train":
+                for j in range(len(CLUSTER_COLUMNS)):
+                    level_counts[j] += np.bincount(codes[mask, j], minlength=len(CLUSTER_LEVELS))
+
+    for writer in writers.values():
+        writer.close()
+    np.save(os.path.join(directory, "unique_codes.npy"), np.unique(np.concatenate(unique_codes), axis=0))
+
+    manifest = {
+        "source": os.path.abspath(csv_path),
+        "class_names": [str(name) for name in class_names],
+        "label_dtype": np.dtype(label_dtype).name,
+        "level_counts": level_counts.tolist(),
+        "splits": {split: {"rows": writer.rows, "shards": writer.shards} for split, writer in writers.items()}
+    }
+    with open(os.path.join(directory, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_manifest(directory=TRAINING_SHARDS_DIR):
+    with open(os.path.join(directory, MANIFEST_NAME), "r") as f:
+        return json.load(f)
+
+
+def iter_shards(directory, split, mmap_mode=None):
+    """Yield (codes, labels) arrays of every shard in one split."""
+    for shard in load_manifest(directory)["splits"][split]["shards"]:
+        yield (
+            np.load(os.path.join(directory, f"{shard['name']}-codes.npy"), mmap_mode=mmap_mode),
+            np.load(os.path.join(directory, f"{shard['name']}-labels.npy"), mmap_mode=mmap_mode)
+        )
+
+
+def make_dataset(directory, split, feature_schema, batch_size, shuffle=True, seed=42):
+    """Prefetching tf.data pipeline of (one-hot features, class index) batches from one split.
+
+    Shards are visited in a new random order every epoch and rows are shuffled
+    within each shard; only the current shard is held in memory. One-hot
+    encoding happens inside the pipeline, straight from the uint8 codes.
+    """
+    import tensorflow as tf
+
+    manifest = load_manifest(directory)
+    num_columns = len(feature_schema.cluster_columns)
+    rng = np.random.default_rng(seed)
+
+    def batches():
+        shards = list(iter_shards(directory, split, mmap_mode="r"))
+        order = rng.permutation(len(shards)) if shuffle else range(len(shards))
+        for i in order:
+            codes, labels = np.asarray(shards[i][0]), np.asarray(shards[i][1])
+            if shuffle:
+                permutation = rng.permutation(len(codes))
+                codes, labels = codes[permutation], labels[permutation]
+            for start in range(0, len(codes), batch_size):
+                yield codes[start:start + batch_size], labels[start:start + batch_size]
+
+    # (column, level code) -> feature index, flattened; unseen levels are -1 and encode to all zeros
+    flat_index = tf.constant(feature_schema.code_index.reshape(-1), dtype=tf.int32)
+    offsets = tf.constant(np.arange(num_columns) * feature_schema.code_index.shape[1], dtype=tf.int32)
+
+    def encode(codes, labels):
+        idx = tf.gather(flat_index, tf.cast(codes, tf.int32) + offsets)
+        features = tf.reduce_sum(tf.one_hot(idx, feature_schema.num_features, dtype=tf.float32), axis=1)
+        return features, labels
+
+    dataset = tf.data.Dataset.from_generator(
+        batches,
+        output_signature=(
+            tf.TensorSpec(shape=(None, num_columns), dtype=tf.uint8),
+            tf.TensorSpec(shape=(None,), dtype=tf.as_dtype(manifest["label_dtype"]))
+        )
+    )
+    return dataset.map(encode, num_parallel_calls=tf.data.AUTOTUNE).prefetch(tf.data.AUTOTUNE)
+
+
+if __name__ == "__main__":
+    manifest = write_shards()
+    rows = {split: info["rows"] for split, info in manifest["splits"].items()}
+    print(f"✅ Wrote shards to {TRAINING_SHARDS_DIR}: {rows}")
@@ -0,0 +1,113 @@
+import json
+import numpy as np
+from dataset.constants import DATASET_PATH, COST_COLUMNS, TYPE_COSTS_PATH
+
+STATISTICS = ("median", "mean", "p25", "p75", "min", "max")
+# Per-row material + installation cost, summarized like the two columns
+TOTAL = "total"
+RANKINGS = ("probability", "cost")
+
+
+def _summarize(values):
+    values = np.asarray(values, dtype=np.float64)
+    p25, median, p75 = np.percentile(values, [25, 50, 75])
+    return {
+        "median": float(median), "mean": float(values.mean()), "p25": float(p25), "p75": float(p75),
+        "min": float(values.min()), "max": float(values.max())
+    }
+
+
+def compute_type_costs(csv_path=DATASET_PATH, chunk_size=1_000_000, max_rows=None):
+    """Per-type statistics of the material, installation and total cost columns.
+
+    Only the type and cost columns are read, in chunks. Rows with a missing
+    cost are skipped. With `max_rows`, the statistics are estimated from a
+    uniform random sample of that many rows (see `read_complete_rows`).
+    """
+    # Training-time only; serving loads the saved statistics without pandas
+    from preprocessors.data_preprocessor import DataPreprocessor
+    from preprocessors.csv_sample import read_complete_rows
+
+    target = DataPreprocessor().target_column
+    values = {}
+    for chunk in read_complete_rows(csv_path, [target, *COST_COLUMNS.values()], chunk_size, max_rows):
+        for type_name, group in chunk.groupby(target):
+            values.setdefault(type_name, []).append(group[list(COST_COLUMNS.values())].to_numpy(dtype=np.float64))
+
+    types = {}
+    for type_name, blocks in sorted(values.items()):
+        costs = np.concatenate(blocks)
+        summary = {"rows": int(len(costs))}
+        for i, cost in enumerate(COST_COLUMNS):
+            summary[cost] = _summarize(costs[:, i])
+        summary[TOTAL] = _summarize(costs.sum(axis=1))
+        types[str(type_name)] = summary
+    return {"columns": dict(COST_COLUMNS), "types": types}
+
+
+def save_type_costs(type_costs, path=TYPE_COSTS_PATH):
+    with open(path, "w") as f:
+        json.dump(type_costs, f, indent=2)
+
+
+class TypeCosts:
+    """Per-type cost statistics as arrays aligned with the model's class order.
+
+    Loaded once at startup, so ranking a prediction only indexes into small
+    (num_classes,) arrays. Types without cost data get NaN costs and never
+    pass a budget filter.
+    """
+
+    def __init__(self, type_costs, class_names):
+        self.costs = tuple(COST_COLUMNS) + (TOTAL,)
+        # (cost, statistic) -> (num_classes,) array
+        self.table = {
+            (cost, statistic): np.array([
+                type_costs["types"].get(str(name), {}).get(cost, {}).get(statistic, np.nan) for name in class_names
+            ], dtype=np.float64)
+            for cost in self.costs for statistic in STATISTICS
+        }
+
+    @classmethod
+    def load(cls, path, class_names):
+        with open(path, "r") as f:
+            return cls(json.load(f), class_names)
+
+    def lookup(self, class_indices, statistic="median"):
+        """{cost: values} for the given classes."""
+        return {cost: self.table[(cost, statistic)][class_indices] for cost in self.costs}
+
+    def recommend(self, probabilities, top_k, min_probability=0.0, budgets=None, statistic="median",
+                  rank_by="probability"):
+        """Rank classes for one (num_classes,) probability vector; return (class indices, excluded counts).
+
+        Classes below `min_probability` (a fraction) or above any budget in
+        `budgets` ({cost: max value}) are dropped. The rest are ordered by
+        probability (highest first) or by `statistic` of the total cost
+        (cheapest first, ties broken by probability), and the first `top_k`
+        are returned.
+        """
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        likely = probabilities >= min_probability
+        affordable = np.ones(len(probabilities), dtype=bool)
+        for cost, limit in (budgets or {}).items():
+            if limit is not None:
+                # NaN (no cost data) compares False, so unknown costs fail the budget
+                affordable &= self.table[(cost, statistic)] <= limit
+        candidates = np.flatnonzero(likely & affordable)
+
+        if rank_by == "cost":
+            order = np.lexsort((-probabilities[candidates], self.table[(TOTAL, statistic)][candidates]))
+        else:
+            order = np.argsort(-probabilities[candidates], kind="stable")
+        excluded = {
+            "below_min_probability": int(np.sum(~likely)),
+            "over_budget": int(np.sum(likely & ~affordable)),
+        }
+        return candidates[order][:top_k], excluded
+
+
+if __name__ == "__main__":
+    # Recompute the cost statistics artifact from the dataset
+    save_type_costs(compute_type_costs())
+    print(f"Saved per-type cost statistics to {TYPE_COSTS_PATH}")
@@ -1,22 +1,52 @@
-from sklearn.preprocessing import MinMaxScaler
 import numpy as np
 
+
 class DataScaler:
+    """Min-max feature scaler.
+
+    Fitting uses sklearn's MinMaxScaler; the fitted scale/offset are kept as
+    plain arrays so a saved scaler can be loaded and applied without sklearn.
+    """
+
     def __init__(self):
-        self.scaler = MinMaxScaler()
+        self.scaler = None
+        self.scale_ = None
+        self.min_ = None
 
     def fit(self, X_train):
         """Fit the scaler on training data."""
+        from sklearn.preprocessing import MinMaxScaler
+
+        self.scaler = MinMaxScaler()
         self.scaler.fit(X_train)
+        self.scale_ = self.scaler.scale_
+        self.min_ = self.scaler.min_
 
     def transform(self, X):
         """Transform data using the fitted scaler."""
-        return self.scaler.transform(X)
+        X = np.array(X, dtype=np.result_type(np.asarray(X).dtype, np.float32), copy=True)
+        X *= self.scale_
+        X += self.min_
+        return X
 
     def fit_transform(self, X):
         """Fit and transform data."""
-        return self.scaler.fit_transform(X)
+        self.fit(X)
+        return self.transform(X)
 
     def inverse_transform(self, X_scaled):
         """Inverse transform scaled data back to original scale."""
-        return self.scaler.inverse_transform(X_scaled)
+        X = np.array(X_scaled, dtype=np.result_type(np.asarray(X_scaled).dtype, np.float32), copy=True)
+        X -= self.min_
+        X /= self.scale_
+        return X
+
+    def save(self, path):
+        """Save the fitted scale and offset to an .npz file."""
+        np.savez(path, scale=self.scale_, min=self.min_)
+
+    def load(self, path):
+        """Load a scaler fitted at training time."""
+        with np.load(path) as data:
+            self.scale_ = data["scale"]
+            self.min_ = data["min"]
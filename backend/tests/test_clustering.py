@@ -0,0 +1,74 @@
+"""Golden cases for the vectorized cluster assignment.
+
+Hand-written bins at and around every threshold, zeros and negatives in the
+content columns where 0 is its own cluster, and NaN; then the dataset and
+random values against the previous per-row implementation.
+"""
+import numpy as np
+import pytest
+from preprocessors.data_preprocessor import DataPreprocessor
+from preprocessors.clustering import column_cluster_codes
+from benchmarks.bench_clustering import legacy_assign_clusters, synthetic_properties
+from dataset.constants import CLUSTER_COLUMNS, CLUSTER_LEVELS
+
+# (value, cluster) per column: upper bounds are inclusive
+GOLDEN = {
+    "Tensile Cluster": [(-5, "C1"), (0, "C1"), (30, "C1"), (30.001, "C2"), (60, "C2"), (120, "C3"), (120.5, "C4"),
+                        (200, "C4"), (200.001, "C5"), (1e9, "C5")],
+    "Puncture Cluster": [(0, "C1"), (600, "C1"), (601, "C2"), (1000, "C2"), (1400, "C3"), (1800, "C4"), (1801, "C5")],
+    "Permittivity Cluster": [(0, "C1"), (0.2, "C1"), (0.21, "C2"), (0.5, "C2"), (1.0, "C3"), (1.5, "C4"), (1.51, "C5")],
+    "Filtration Cluster": [(75, "C1"), (75.01, "C2"), (85, "C2"), (90, "C3"), (95, "C4"), (95.01, "C5"), (100, "C5")],
+    "Recycled Cluster": [(0, "C1"), (-0.0, "C1"), (-1, "C2"), (0.001, "C2"), (30, "C2"), (60, "C3"), (99, "C4"),
+                         (99.5, "C5"), (100, "C5")],
+    "Biobased Cluster": [(0, "C1"), (-10, "C2"), (1e-9, "C2"), (30, "C2"), (70, "C3"), (70.1, "C4"), (99, "C4"),
+                         (100, "C5")],
+    "UV Cluster": [(30, "C1"), (50, "C2"), (50.1, "C3"), (70, "C3"), (85, "C4"), (85.1, "C5")],
+    "Material Cost Cluster": [(100, "C1"), (200, "C2"), (400, "C3"), (700, "C4"), (700.01, "C5")],
+    "Install Cost Cluster": [(50, "C1"), (100, "C2"), (200, "C3"), (350, "C4"), (351, "C5")],
+}
+
+
+def levels(codes):
+    return [CLUSTER_LEVELS[code] for code in np.asarray(codes).tolist()]
+
+
+@pytest.mark.parametrize("column", CLUSTER_COLUMNS)
+def test_golden_bins(column):
+    values, expected = zip(*GOLDEN[column])
+    assert levels(column_cluster_codes(column, np.array(values, dtype=np.float64))) == list(expected)
+
+
+@pytest.mark.parametrize("column", CLUSTER_COLUMNS)
+def test_nan_is_c5(column):
+    assert levels(column_cluster_codes(column, np.array([np.nan, 0.0]))) == ["C5", "C1"]
+
+
+def test_cluster_codes_matches_golden_row_by_row():
+    """DataPreprocessor.cluster_codes bins an (n, 9) array with the same golden results per column."""
+    preprocessor = DataPreprocessor()
+    rows = max(len(cases) for cases in GOLDEN.values())
+    values = np.full((rows, len(CLUSTER_COLUMNS)), np.nan)
+    expected = np.full((rows, len(CLUSTER_COLUMNS)), "C5", dtype=object)
+    for j, column in enumerate(CLUSTER_COLUMNS):
+        for i, (value, level) in enumerate(GOLDEN[column]):
+            values[i, j], expected[i, j] = value, level
+    actual = np.array(CLUSTER_LEVELS, dtype=object)[preprocessor.cluster_codes(values)]
+    assert (actual == expected).all()
+
+
+def test_dataset_matches_legacy():
+    preprocessor = DataPreprocessor()
+    df = preprocessor.load_data()
+    expected = legacy_assign_clusters(df.copy())[CLUSTER_COLUMNS]
+    actual = preprocessor.assign_clusters(df.copy())[CLUSTER_COLUMNS]
+    assert (expected.astype(str).to_numpy() == actual.astype(str).to_numpy()).all()
+
+
+def test_random_values_match_legacy():
+    """Values across every bin, with exact edges and zeros mixed in, plus an all-NaN row."""
+    preprocessor = DataPreprocessor()
+    df = synthetic_properties(20_000, np.random.default_rng(42))
+    df.iloc[0, :] = np.nan
+    expected = legacy_assign_clusters(df.copy())[CLUSTER_COLUMNS]
+    actual = preprocessor.assign_clusters(df.copy())[CLUSTER_COLUMNS]
+    assert (expected.astype(str).to_numpy() == actual.astype(str).to_numpy()).all()
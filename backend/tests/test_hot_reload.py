@@ -0,0 +1,94 @@
+"""Hot reload under load: swapping model versions must not fail a single request.
+
+Two versions are prepared in a temporary versions directory (see
+benchmarks.bench_hot_reload.prepare_versions) and the app is driven in
+process through httpx.ASGITransport by concurrent /predict clients while
+LATEST is flipped between them.
+"""
+import asyncio
+import time
+import httpx
+import numpy as np
+import pytest
+import app as app_module
+from benchmarks.bench_hot_reload import prepare_versions
+from utils.versions import publish_version
+from dataset.constants import CLUSTER_COLUMNS, CLUSTER_LEVELS
+
+SWAPS = 4
+CONCURRENCY = 8
+# Upper bound for publish -> serve; the poll interval is 20 ms and a load takes tens of ms
+SWAP_TIMEOUT_S = 10.0
+TEST_TIMEOUT_S = 120.0
+
+
+@pytest.fixture
+def versions_dir(tmp_path, monkeypatch):
+    prepare_versions(str(tmp_path))
+    # app.py reads these constants at call time; the environment is only read at import
+    monkeypatch.setattr(app_module, "MODEL_VERSIONS_DIR", str(tmp_path))
+    monkeypatch.setattr(app_module, "MODEL_RELOAD_INTERVAL_S", 0.02)
+    # Every request reaches the model, so a half-swapped version would show up as an error
+    monkeypatch.setattr(app_module, "PREDICTION_CACHE_SIZE", 0)
+    return str(tmp_path)
+
+
+async def swap_under_load(versions_dir):
+    app = app_module.app
+    rng = np.random.default_rng(42)
+    payloads = [
+        {"clusters": {column: CLUSTER_LEVELS[rng.integers(len(CLUSTER_LEVELS))] for column in CLUSTER_COLUMNS}}
+        for _ in range(200)
+    ]
+    errors, served_versions, requests = [], [], 0
+    stop = asyncio.Event()
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            async def worker(worker_id):
+                nonlocal requests
+                i = worker_id
+                while not stop.is_set():
+                    try:
+                        response = await client.post("/predict", json=payloads[i % len(payloads)])
+                        if response.status_code != 200:
+                            errors.append(f"{response.status_code}: {response.text[:200]}")
+                    except Exception as exc:
+                        errors.append(repr(exc))
+                    requests += 1
+                    i += CONCURRENCY
+                    # A request that fails without suspending must not starve the swap loop
+                    await asyncio.sleep(0)
+
+            workers = [asyncio.create_task(worker(w)) for w in range(CONCURRENCY)]
+            try:
+                for swap in range(SWAPS):
+                    target = "v2" if swap % 2 == 0 else "v1"
+                    publish_version(f"{versions_dir}/{target}", versions_dir)
+                    deadline = time.perf_counter() + SWAP_TIMEOUT_S
+                    while True:
+                        version = (await client.get("/model/version")).json()["version"]
+                        if version == target or time.perf_counter() > deadline:
+                            break
+                        await asyncio.sleep(0.01)
+                    served_versions.append(version)
+                    # Keep requests running on the new version before the next swap
+                    await asyncio.sleep(0.1)
+            finally:
+                stop.set()
+                await asyncio.gather(*workers)
+            reloads = (await client.get("/model/version")).json()["reloads"]
+    return errors, served_versions, reloads, requests
+
+
+@pytest.mark.parametrize("micro_batching", [False, True], ids=["direct", "micro-batching"])
+def test_swaps_serve_new_version_without_errors(versions_dir, monkeypatch, micro_batching):
+    monkeypatch.setattr(app_module, "MICRO_BATCHING", micro_batching)
+    errors, served_versions, reloads, requests = asyncio.run(
+        asyncio.wait_for(swap_under_load(versions_dir), TEST_TIMEOUT_S)
+    )
+
+    assert errors == []
+    assert served_versions == ["v2", "v1"] * (SWAPS // 2)
+    assert [reload["to_version"] for reload in reloads] == served_versions
+    assert requests > SWAPS * CONCURRENCY
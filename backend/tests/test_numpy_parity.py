@@ -0,0 +1,61 @@
+"""The served NumPy engine against the Keras model, on every row of the dataset.
+
+Only the committed artifacts are read: geotextile_ann.keras, the exported
+NumPy weights, the Platt parameters and the shared serving bundle.
+"""
+import numpy as np
+import pytest
+from preprocessors.data_preprocessor import DataPreprocessor
+from preprocessors.feature_schema import FeatureSchema
+from models.numpy_ann import NumpyANN
+from utils.loaders import load_serving_artifacts
+from dataset.constants import (
+    MODEL_SAVE_PATH, NUMPY_WEIGHTS_PATH, FEATURE_SCHEMA_PATH, PLATT_PARAMS_PATH, CLUSTER_COLUMNS
+)
+
+# Maximum allowed absolute difference between Keras and NumPy probabilities
+PARITY_TOLERANCE = 1e-5
+
+
+@pytest.fixture(scope="module")
+def dataset_inputs():
+    """Scaled one-hot inputs of every dataset row, encoded the way /predict encodes them."""
+    preprocessor = DataPreprocessor()
+    df = preprocessor.assign_clusters(preprocessor.load_data())
+    schema = FeatureSchema.load(FEATURE_SCHEMA_PATH)
+    X_input = schema.encode_batch(df[CLUSTER_COLUMNS].to_dict(orient="records"))
+    return X_input, load_serving_artifacts(backend="numpy", shared=False).scaler.transform(X_input)
+
+
+@pytest.fixture(scope="module")
+def keras_model():
+    pytest.importorskip("tensorflow")
+    from models.ann_model import ANNModel
+
+    ann_model = ANNModel(input_dim=FeatureSchema.load(FEATURE_SCHEMA_PATH).num_features, num_classes=None)
+    ann_model.load_model(MODEL_SAVE_PATH)
+    ann_model.load_platt_scaling(PLATT_PARAMS_PATH)
+    return ann_model
+
+
+def assert_matches(expected, actual):
+    assert actual.shape == expected.shape
+    assert float(np.max(np.abs(expected - actual))) <= PARITY_TOLERANCE
+    assert np.array_equal(np.argmax(expected, axis=1), np.argmax(actual, axis=1))
+
+
+def test_numpy_weights_match_keras(dataset_inputs, keras_model):
+    _, X_scaled = dataset_inputs
+    numpy_model = NumpyANN()
+    numpy_model.load_model(NUMPY_WEIGHTS_PATH)
+    numpy_model.load_platt_scaling(PLATT_PARAMS_PATH)
+
+    assert_matches(keras_model.model.predict_on_batch(X_scaled), numpy_model.predict(X_scaled))
+    assert_matches(keras_model.predict_with_platt_scaling(X_scaled), numpy_model.predict_with_platt_scaling(X_scaled))
+
+
+def test_serving_bundle_matches_keras(dataset_inputs, keras_model):
+    X_input, X_scaled = dataset_inputs
+    artifacts = load_serving_artifacts(backend="numpy", shared=True)
+
+    assert_matches(keras_model.predict_with_platt_scaling(X_scaled), artifacts.predict_probabilities(X_input))
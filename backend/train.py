@@ -1,50 +1,54 @@
+import argparse
+import os
 import numpy as np
 import tensorflow as tf
 import random
-import pandas as pd   # ✅ Added this line
 import json
 from sklearn.metrics import f1_score, mean_squared_error
-from sklearn.model_selection import train_test_split
-from preprocessors.data_preprocessor import DataPreprocessor
+from preprocessors.dataset_cache import load_encoded_dataset
+from preprocessors.feature_schema import FeatureSchema
+from preprocessors.shards import MANIFEST_NAME, write_shards, load_manifest, iter_shards, make_dataset
+from preprocessors.type_costs import compute_type_costs, save_type_costs
 from models.ann_model import ANNModel
-from dataset.constants import MODEL_SAVE_PATH, EPOCHS, BATCH_SIZE, VAL_LOGITS_PATH, VAL_LABELS_PATH
+from models.numpy_ann import NumpyANN
+from models.serving_bundle import write_serving_bundle
+from models.quantized_ann import save_quantized_weights
+from models.similarity_index import SimilarityIndex
+from scalers.scaler import DataScaler
+from utils.versions import artifact_path
+from dataset.constants import (
+    MODEL_SAVE_PATH, EPOCHS, BATCH_SIZE, LEARNING_RATE, HIDDEN_UNITS, DROPOUT_RATES,
+    VAL_LOGITS_PATH, VAL_LABELS_PATH,
+    LABEL_ENCODER_PATH, FEATURE_COLUMNS_PATH, FEATURE_SCHEMA_PATH,
+    PLATT_PARAMS_PATH, NUMPY_WEIGHTS_PATH, CLASS_NAMES_PATH, SCALER_PATH,
+    TRAINING_CLUSTERS_PATH, SERVING_BUNDLE_PATH, DATASET_PATH, TRAINING_SHARDS_DIR, QUANTIZED_WEIGHTS_PATHS,
+    TYPE_COSTS_PATH, SIMILARITY_INDEX_PATH, SHARDED_SAMPLE_ROWS
+)
 from tensorflow.keras.callbacks import ReduceLROnPlateau
+from sklearn.preprocessing import OneHotEncoder
 import joblib
 
+# Rows encoded at a time when computing validation logits from shards
+PREDICT_BLOCK_SIZE = 65536
+
 # ======= Reproducibility =======
 tf.random.set_seed(42)
 np.random.seed(42)
 random.seed(42)
 
-def main():
-    # Initialize preprocessor with clustering
-    preprocessor = DataPreprocessor()
-    df = preprocessor.load_data()
-    df = preprocessor.assign_clusters(df)
-
-    # Define the cluster columns
-    cluster_columns = [
-        "Tensile Cluster", "Puncture Cluster", "Permittivity Cluster",
-        "Filtration Cluster", "Recycled Cluster", "Biobased Cluster",
-        "UV Cluster", "Material Cost Cluster", "Install Cost Cluster"
-    ]
-
-    # Prepare features and labels
-    X = df[cluster_columns]
-    y = preprocessor.encode_labels(df[preprocessor.target_column].values)
-
-    # One-hot encode cluster columns
-    X = pd.get_dummies(X, columns=cluster_columns)
-
-    # Split into train/val/test
-    X_train, X_temp, y_train, y_temp = train_test_split(X, y, test_size=0.3, random_state=42)
-    X_val, X_test, y_val, y_test = train_test_split(X_temp, y_temp, test_size=0.5, random_state=42)
+def main(hidden_units=HIDDEN_UNITS, dropout_rates=DROPOUT_RATES, learning_rate=LEARNING_RATE, batch_size=BATCH_SIZE):
+    # Clustered, one-hot encoded and split data; a memory-mapped cache hit unless the CSV or thresholds changed
+    dataset = load_encoded_dataset(DATASET_PATH)
+    label_encoder = OneHotEncoder(sparse_output=False).fit(np.array(dataset.class_names, dtype=object).reshape(-1, 1))
+    X_train, y_train = dataset.split("train")
+    X_val, y_val = dataset.split("val")
+    y_val = y_val.astype(np.float64)
 
     # Build and compile model
-    num_classes = len(preprocessor.get_class_names())
+    num_classes = len(dataset.class_names)
     ann_model = ANNModel(input_dim=X_train.shape[1], num_classes=num_classes)
-    ann_model.build_model()
-    ann_model.compile_model()
+    ann_model.build_model(hidden_units, dropout_rates)
+    ann_model.compile_model(learning_rate)
 
     # Train model
     early_stopping = ann_model.get_early_stopping()
@@ -54,22 +58,159 @@ def main():
         X_train, y_train,
         validation_data=(X_val, y_val),
         epochs=EPOCHS,
-        batch_size=BATCH_SIZE,
+        batch_size=batch_size,
         callbacks=[early_stopping, lr_scheduler],
         verbose=1
     )
 
+    # Feature scaler applied at serving time, fitted on the training split
+    scaler = DataScaler()
+    scaler.fit(X_train.astype(np.float64))
+
+    val_logits = ann_model.predict_logits(X_val)
+    save_artifacts(
+        ann_model, label_encoder, dataset.class_names, scaler,
+        val_logits, y_val, dataset.feature_columns, np.unique(dataset.codes, axis=0),
+        type_costs=compute_type_costs(DATASET_PATH),
+        similarity_index=SimilarityIndex.from_csv(DATASET_PATH)
+    )
+
+
+def main_sharded(shards_dir=TRAINING_SHARDS_DIR, hidden_units=HIDDEN_UNITS, dropout_rates=DROPOUT_RATES,
+                 learning_rate=LEARNING_RATE, batch_size=BATCH_SIZE, rebuild=False, sample_rows=SHARDED_SAMPLE_ROWS):
+    """Train from sharded uint8 codes / integer labels through a tf.data pipeline.
+
+    Memory stays bounded by the shard size, so this path scales to datasets
+    far larger than the DataFrame path in `main`. Shards are built from
+    DATASET_PATH first if they do not exist yet. The shards hold cluster
+    codes only, so the similarity index and type costs are built from the
+    raw CSV, from a uniform sample of at most SHARDED_SAMPLE_ROWS rows.
+    """
+    if rebuild or not os.path.exists(os.path.join(shards_dir, MANIFEST_NAME)):
+        write_shards(DATASET_PATH, shards_dir)
+    manifest = load_manifest(shards_dir)
+    class_names = np.array(manifest["class_names"], dtype=object)
+    feature_schema = FeatureSchema.from_level_counts(manifest["level_counts"])
+
+    # Build and compile model with integer labels
+    ann_model = ANNModel(input_dim=feature_schema.num_features, num_classes=len(class_names))
+    ann_model.build_model(hidden_units, dropout_rates)
+    ann_model.compile_model(learning_rate, sparse_labels=True)
+
+    # Train model
+    early_stopping = ann_model.get_early_stopping()
+    lr_scheduler = ReduceLROnPlateau(monitor='val_loss', factor=0.5, patience=6, min_lr=5e-5, verbose=1)
+
+    history = ann_model.model.fit(
+        make_dataset(shards_dir, "train", feature_schema, batch_size),
+        validation_data=make_dataset(shards_dir, "val", feature_schema, batch_size, shuffle=False),
+        epochs=EPOCHS,
+        callbacks=[early_stopping, lr_scheduler],
+        verbose=1
+    )
+
+    # Min-max scaler from the per-level counts: a one-hot column's min is 1 only if
+    # the level is present in every training row, its max is 1 if it is present at all
+    train_rows = manifest["splits"]["train"]["rows"]
+    level_counts = np.asarray(manifest["level_counts"])
+    column_counts = np.array([
+        level_counts[feature_schema.cluster_columns.index(column), feature_schema.levels.index(level)]
+        for column, level in (name.rsplit("_", 1) for name in feature_schema.feature_columns)
+    ])
+    scaler = DataScaler()
+    scaler.fit(np.vstack([column_counts == train_rows, column_counts > 0]).astype(np.float64))
+
+    # Validation logits shard by shard, in blocks that bound the one-hot matrix size
+    val_logits, val_labels = [], []
+    for codes, labels in iter_shards(shards_dir, "val", mmap_mode="r"):
+        for block in range(0, len(codes), PREDICT_BLOCK_SIZE):
+            X_block = feature_schema.encode_codes(codes[block:block + PREDICT_BLOCK_SIZE])
+            val_logits.append(ann_model.predict_logits(X_block))
+        val_labels.append(np.asarray(labels, dtype=np.int64))
+
+    label_encoder = OneHotEncoder(sparse_output=False).fit(class_names.reshape(-1, 1))
+    save_artifacts(
+        ann_model, label_encoder, class_names, scaler,
+        np.concatenate(val_logits), np.concatenate(val_labels),
+        feature_schema.feature_columns, np.load(os.path.join(shards_dir, "unique_codes.npy")),
+        type_costs=compute_type_costs(DATASET_PATH, max_rows=sample_rows),
+        similarity_index=SimilarityIndex.from_csv(DATASET_PATH, max_rows=sample_rows)
+    )
+
+
+def save_artifacts(ann_model, label_encoder, class_names, scaler, val_logits, val_labels,
+                   feature_columns, training_codes, directory=None, calibrator=None, type_costs=None,
+                   similarity_index=None):
+    """Save the trained model and every artifact needed for serving.
+
+    Files go to models/ or, with `directory`, into a version directory under
+    the same names. A given `calibrator` is saved instead of refitting Platt
+    scaling on the validation logits. `type_costs` (see
+    preprocessors/type_costs.py) is saved for /recommend and `similarity_index`
+    (see models/similarity_index.py) for similar-row lookups, if given.
+    """
+    class_names = [str(name) for name in class_names]
+
     # Save model and encoder
-    ann_model.save_model(MODEL_SAVE_PATH)
-    joblib.dump(preprocessor.encoder, "models/label_encoder.pkl")
+    ann_model.save_model(artifact_path(MODEL_SAVE_PATH, directory))
+    ann_model.export_numpy_weights(artifact_path(NUMPY_WEIGHTS_PATH, directory))
+    joblib.dump(label_encoder, artifact_path(LABEL_ENCODER_PATH, directory))
+    with open(artifact_path(CLASS_NAMES_PATH, directory), "w") as f:
+        json.dump(class_names, f)
+
+    # Save the feature scaler applied at serving time
+    scaler.save(artifact_path(SCALER_PATH, directory))
+
+    # Save validation logits/labels and the Platt scaling fitted on them
+    np.save(artifact_path(VAL_LOGITS_PATH, directory), val_logits)
+    np.save(artifact_path(VAL_LABELS_PATH, directory), val_labels)
+    if calibrator is None:
+        ann_model.fit_platt_scaling(val_logits, val_labels)
+    else:
+        ann_model.calibrator = calibrator
+    ann_model.save_platt_scaling(artifact_path(PLATT_PARAMS_PATH, directory))
 
     # Save feature columns for prediction alignment
-    feature_columns = list(X.columns)
-    with open("models/feature_columns.json", "w") as f:
+    with open(artifact_path(FEATURE_COLUMNS_PATH, directory), "w") as f:
         json.dump(feature_columns, f)
 
+    # Save the (cluster, level) -> index schema used for encoding at serving time
+    FeatureSchema(feature_columns).save(artifact_path(FEATURE_SCHEMA_PATH, directory))
+
+    # Save the distinct cluster combinations in the data for warming the prediction cache
+    np.save(artifact_path(TRAINING_CLUSTERS_PATH, directory), training_codes)
+
+    # Save the per-type cost statistics used to filter and rank /recommend results
+    if type_costs is not None:
+        save_type_costs(type_costs, artifact_path(TYPE_COSTS_PATH, directory))
+
+    # Save the nearest-neighbor index over the catalog's raw properties
+    if similarity_index is not None:
+        similarity_index.save(artifact_path(SIMILARITY_INDEX_PATH, directory))
+
+    # Pack weights, calibration, scaler and schema into one file for shared multi-worker serving
+    numpy_model = NumpyANN()
+    numpy_model.load_model(artifact_path(NUMPY_WEIGHTS_PATH, directory))
+    numpy_model.load_platt_scaling(artifact_path(PLATT_PARAMS_PATH, directory))
+    write_serving_bundle(
+        artifact_path(SERVING_BUNDLE_PATH, directory), numpy_model, scaler, FeatureSchema(feature_columns), class_names
+    )
+
+    # Quantized copies of the weights for the "int8" / "float16" serving backends
+    for precision, path in QUANTIZED_WEIGHTS_PATHS.items():
+        save_quantized_weights(artifact_path(path, directory), numpy_model, precision)
+
     print("\n✅ Model and encoder saved successfully!")
     print(f"Feature columns: {len(feature_columns)} total")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Train the geotextile ANN")
+    parser.add_argument("--shards", nargs="?", const=TRAINING_SHARDS_DIR, default=None,
+                        help="Train from sharded uint8 codes through tf.data (default dir: dataset/shards)")
+    parser.add_argument("--rebuild-shards", action="store_true", help="Rewrite the shards from the dataset CSV")
+    args = parser.parse_args()
+
+    if args.shards:
+        main_sharded(args.shards, rebuild=args.rebuild_shards)
+    else:
+        main()
@@ -0,0 +1,190 @@
+"""Parallel hyperparameter search with k-fold cross-validation.
+
+Every combination in TUNING_GRID is scored with stratified k-fold CV on the
+train+validation rows of the usual 70/15/15 split (the test rows are never
+used). The encoded data comes from the dataset cache and is written to .npy
+files that each worker maps read-only, so trials share one copy. Each
+(trial, fold) fit runs in its own process, pinned to
+TUNING_THREADS_PER_TRIAL intra-op threads.
+
+Results are written to models/tuning_results.csv. With --export, the best
+configuration is retrained by train.py and saved as the serving artifacts.
+
+Usage (from the backend directory):
+    python tune.py [--workers 4] [--export]
+    python tune.py --scaling 1 2 4 --limit 2 --epochs 20   # wall-clock scaling report
+"""
+import argparse
+import itertools
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import StratifiedKFold
+from preprocessors.dataset_cache import load_encoded_dataset
+from dataset.constants import (
+    CV_FOLDS, EPOCHS, TUNING_GRID, TUNING_THREADS_PER_TRIAL, TUNING_RESULTS_PATH
+)
+
+# Encoded data mapped by `init_worker` in each worker process
+_shared = {}
+
+
+def encode_dataset(data_dir):
+    """Write the encoded dataset (from the dataset cache) once; return the CV row indices and their labels."""
+    dataset = load_encoded_dataset()
+    np.save(os.path.join(data_dir, "X.npy"), np.asarray(dataset.X, dtype=np.float32))
+    np.save(os.path.join(data_dir, "y.npy"), dataset.one_hot(dataset.labels, np.float32))
+
+    # Same split as train.py; only the train and validation rows take part in CV
+    cv_idx = np.sort(np.concatenate([dataset.splits["train"], dataset.splits["val"]]))
+    return cv_idx, np.asarray(dataset.labels[cv_idx], dtype=np.int64)
+
+
+def init_worker(data_dir, threads):
+    # Thread limits must be set before TensorFlow creates its thread pools
+    os.environ["TF_NUM_INTRAOP_THREADS"] = str(threads)
+    os.environ["TF_NUM_INTEROP_THREADS"] = "1"
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["TF_CPP_MIN_LOG_LEVEL"] = "2"
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    _shared["X"] = np.load(os.path.join(data_dir, "X.npy"), mmap_mode="r")
+    _shared["y"] = np.load(os.path.join(data_dir, "y.npy"), mmap_mode="r")
+
+
+def run_trial(trial, config, fold, train_idx, val_idx, epochs):
+    """Train one configuration on one fold and return its validation metrics."""
+    import tensorflow as tf
+    from tensorflow.keras.callbacks import ReduceLROnPlateau
+    from sklearn.metrics import f1_score
+    from models.ann_model import ANNModel
+
+    start = time.perf_counter()
+    tf.keras.utils.set_random_seed(42)
+    X, y = _shared["X"], _shared["y"]
+    X_train, y_train, X_val, y_val = X[train_idx], y[train_idx], X[val_idx], y[val_idx]
+
+    ann_model = ANNModel(input_dim=X.shape[1], num_classes=y.shape[1])
+    ann_model.build_model(config["hidden_units"], config["dropout_rates"])
+    ann_model.compile_model(config["learning_rate"])
+    lr_scheduler = ReduceLROnPlateau(monitor='val_loss', factor=0.5, patience=6, min_lr=5e-5)
+    history = ann_model.model.fit(
+        X_train, y_train,
+        validation_data=(X_val, y_val),
+        epochs=epochs,
+        batch_size=config["batch_size"],
+        callbacks=[ann_model.get_early_stopping(), lr_scheduler],
+        verbose=0
+    )
+
+    y_pred = np.argmax(ann_model.predict(X_val), axis=1)
+    y_true = np.argmax(y_val, axis=1)
+    return {
+        "trial": trial,
+        "fold": fold,
+        "val_accuracy": float(np.mean(y_pred == y_true)),
+        "val_f1": float(f1_score(y_true, y_pred, average="macro")),
+        "val_loss": float(np.min(history.history["val_loss"])),
+        "epochs": len(history.history["val_loss"]),
+        "seconds": time.perf_counter() - start
+    }
+
+
+def grid_configs(limit=None):
+    """Every combination of TUNING_GRID, as a list of dicts."""
+    names = list(TUNING_GRID)
+    configs = [dict(zip(names, values)) for values in itertools.product(*TUNING_GRID.values())]
+    return configs[:limit] if limit else configs
+
+
+def run_search(configs, cv_idx, cv_labels, data_dir, workers, threads, folds, epochs):
+    """Run every (trial, fold) fit on a process pool; return the per-trial table and the wall time."""
+    splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=42)
+    splits = [(cv_idx[train], cv_idx[val]) for train, val in splitter.split(cv_idx, cv_labels)]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_worker, initargs=(data_dir, threads)
+    ) as executor:
+        futures = [
+            executor.submit(run_trial, trial, config, fold, train_idx, val_idx, epochs)
+            for trial, config in enumerate(configs)
+            for fold, (train_idx, val_idx) in enumerate(splits)
+        ]
+        fold_results = pd.DataFrame([future.result() for future in futures])
+    wall_seconds = time.perf_counter() - start
+
+    summary = fold_results.groupby("trial").agg(
+        val_accuracy_mean=("val_accuracy", "mean"),
+        val_accuracy_std=("val_accuracy", "std"),
+        val_f1_mean=("val_f1", "mean"),
+        val_loss_mean=("val_loss", "mean"),
+        epochs_mean=("epochs", "mean"),
+        fit_seconds=("seconds", "sum")
+    ).reset_index()
+    params = pd.DataFrame([
+        {name: "-".join(map(str, value)) if isinstance(value, list) else value for name, value in config.items()}
+        for config in configs
+    ])
+    table = pd.concat([params, summary.drop(columns="trial")], axis=1)
+    table.insert(0, "trial", summary["trial"])
+    return table.sort_values(["val_accuracy_mean", "val_loss_mean"], ascending=[False, True]), wall_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel k-fold hyperparameter search")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--threads", type=int, default=TUNING_THREADS_PER_TRIAL, help="Intra-op threads per trial")
+    parser.add_argument("--folds", type=int, default=CV_FOLDS)
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    parser.add_argument("--limit", type=int, default=None, help="Only run the first N grid combinations")
+    parser.add_argument("--scaling", type=int, nargs="+", default=None,
+                        help="Repeat the search with each worker count and report wall-clock speedup")
+    parser.add_argument("--export", action="store_true", help="Retrain the best configuration with train.py")
+    args = parser.parse_args()
+
+    configs = grid_configs(args.limit)
+    data_dir = tempfile.mkdtemp(prefix="geotextile-tune-")
+    try:
+        cv_idx, cv_labels = encode_dataset(data_dir)
+        print(f"{len(configs)} trials x {args.folds} folds on {len(cv_idx)} rows")
+
+        timings = []
+        for workers in args.scaling or [args.workers]:
+            table, wall_seconds = run_search(
+                configs, cv_idx, cv_labels, data_dir, workers, args.threads, args.folds, args.epochs
+            )
+            timings.append((workers, wall_seconds))
+            print(f"{workers} workers: {wall_seconds:.1f} s")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    table.to_csv(TUNING_RESULTS_PATH, index=False)
+    print(table.to_string(index=False, float_format=lambda value: f"{value:.4f}"))
+    print(f"\n✅ Results saved to {TUNING_RESULTS_PATH}")
+
+    if len(timings) > 1:
+        base_workers, base_seconds = timings[0]
+        print(f"\n{'workers':>7} {'wall s':>8} {'speedup':>8} {'efficiency':>10}")
+        for workers, seconds in timings:
+            speedup = base_seconds / seconds
+            print(f"{workers:>7} {seconds:>8.1f} {speedup:>7.2f}x {speedup / (workers / base_workers):>9.0%}")
+
+    if args.export:
+        import train
+
+        best = configs[int(table.iloc[0]["trial"])]
+        print(f"\nRetraining best configuration: {best}")
+        train.main(**best)
+
+
+if __name__ == "__main__":
+    main()
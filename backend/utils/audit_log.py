@@ -0,0 +1,357 @@
+"""Asynchronous audit log of served predictions, and bulk replay of logged inputs.
+
+Endpoints hand each request's inputs and calibrated probabilities to
+`AuditLog.submit`, which only appends to a bounded in-memory queue. A
+background thread drains the queue and writes whatever has accumulated as
+one SQLite transaction, so the request path never touches the disk. When
+the queue is full, new records are dropped and counted instead of blocking
+requests. `stop` writes everything still queued before returning.
+
+Replay re-scores logged inputs with another model version in chunks, e.g.
+to see which past predictions a new version would change. Run from the
+backend directory:
+    python -m utils.audit_log replay [--db audit/predictions.sqlite] [--version-dir models/versions/<name>]
+        [--since 2025-01-01] [--route /predict] [--output changes.csv]
+"""
+import argparse
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+import numpy as np
+from dataset.constants import CLUSTER_COLUMNS, CLUSTER_LEVELS, AUDIT_LOG_PATH, AUDIT_QUEUE_SIZE, AUDIT_BATCH_SIZE
+
+# Input kinds: cluster levels as uint8 codes (UNKNOWN_CODE for missing or invalid levels),
+# or raw float32 property values, both in cluster column order
+CODES = "codes"
+PROPERTIES = "properties"
+UNKNOWN_CODE = 255
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY,
+    logged_at REAL NOT NULL,
+    route TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    input_kind TEXT NOT NULL,
+    input BLOB NOT NULL,
+    predicted_type TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    probabilities BLOB
+);
+CREATE INDEX IF NOT EXISTS predictions_logged_at ON predictions (logged_at);
+CREATE TABLE IF NOT EXISTS model_classes (
+    model_version TEXT PRIMARY KEY,
+    class_names TEXT NOT NULL
+);
+"""
+
+_STOP = object()
+
+
+def clusters_to_codes(clusters_list, cluster_columns=CLUSTER_COLUMNS, levels=CLUSTER_LEVELS):
+    """(n, 9) uint8 codes of cluster dicts; missing columns and unknown levels become UNKNOWN_CODE."""
+    level_codes = {level: code for code, level in enumerate(levels)}
+    return np.array([
+        [level_codes.get(clusters.get(column), UNKNOWN_CODE) for column in cluster_columns]
+        for clusters in clusters_list
+    ], dtype=np.uint8).reshape(-1, len(cluster_columns))
+
+
+def split_rows(array):
+    """Bytes of each row of a C-contiguous 2-D array, sliced from one buffer copy."""
+    data, width = array.tobytes(), array.shape[1] * array.itemsize
+    return [data[i:i + width] for i in range(0, len(data), width)]
+
+
+def connect(path):
+    # Several uvicorn workers may append to the same file; wait for each other's transactions
+    connection = sqlite3.connect(path, timeout=30)
+    # WAL lets readers (replay) run while the server keeps appending
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+class AuditLog:
+    """Bounded queue of prediction records drained into SQLite by a background thread.
+
+    Each queued entry is one request: its route, model version, class names,
+    inputs (cluster dicts, or an (n, 9) array of codes or raw properties) and
+    (n, num_classes) probabilities. Rows are built and written in the
+    writer thread. `max_queue` bounds queued requests; a full queue drops the
+    new request and counts its records.
+    """
+
+    def __init__(self, path=AUDIT_LOG_PATH, max_queue=AUDIT_QUEUE_SIZE, batch_records=AUDIT_BATCH_SIZE):
+        self.path = path
+        self.max_queue = max_queue
+        self.batch_records = batch_records
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.thread = None
+        self.known_versions = set()
+
+        self.submitted_records = 0
+        self.dropped_requests = 0
+        self.dropped_records = 0
+        self.written_records = 0
+        self.batches = 0
+        self.write_errors = 0
+        self.last_error = None
+
+    def start(self):
+        """Open the database and start the writer thread."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        connect(self.path).close()
+        self.thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=None):
+        """Write every queued record, then stop the writer thread."""
+        if self.thread is None:
+            return
+        self.queue.put(_STOP)
+        self.thread.join(timeout)
+        self.thread = None
+
+    def submit(self, route, version, class_names, input_kind, inputs, probabilities=None, top1=None):
+        """Queue one request's records without blocking; returns False if they were dropped.
+
+        Predictions served without a probability vector (top-1 table hits)
+        pass `top1` as (class indices, confidences) instead of `probabilities`.
+        """
+        records = len(inputs)
+        try:
+            self.queue.put_nowait((time.time(), route, version, class_names, input_kind, inputs, probabilities, top1))
+        except queue.Full:
+            self.dropped_requests += 1
+            self.dropped_records += records
+            return False
+        self.submitted_records += records
+        return True
+
+    def stats(self):
+        return {
+            "queued_requests": self.queue.qsize(),
+            "max_queue": self.max_queue,
+            "submitted_records": self.submitted_records,
+            "written_records": self.written_records,
+            "dropped_requests": self.dropped_requests,
+            "dropped_records": self.dropped_records,
+            "batches": self.batches,
+            "write_errors": self.write_errors,
+            "last_error": self.last_error,
+        }
+
+    # =====================
+    # Writer thread
+    # =====================
+    def _rows(self, entry):
+        logged_at, route, version, class_names, input_kind, inputs, probabilities, top1 = entry
+        if input_kind == CODES and not isinstance(inputs, np.ndarray):
+            inputs = clusters_to_codes(inputs)
+        inputs = np.ascontiguousarray(inputs, dtype=np.uint8 if input_kind == CODES else np.float32)
+        names = [str(name) for name in class_names]
+        n = len(inputs)
+        if probabilities is not None:
+            probabilities = np.ascontiguousarray(probabilities, dtype=np.float32).reshape(n, -1)
+            class_idx = np.argmax(probabilities, axis=1)
+            confidences = probabilities[np.arange(n), class_idx]
+            blobs = split_rows(probabilities)
+        else:
+            class_idx, confidences = (np.asarray(values).reshape(-1) for values in top1)
+            blobs = [None] * n
+        types = [names[k] for k in class_idx.tolist()]
+        return names, list(zip(
+            [logged_at] * n, [route] * n, [version] * n, [input_kind] * n, split_rows(inputs), types,
+            confidences.tolist(), blobs
+        ))
+
+    def _write(self, connection, entries):
+        rows, versions = [], {}
+        try:
+            for entry in entries:
+                names, entry_rows = self._rows(entry)
+                rows.extend(entry_rows)
+                if entry[2] not in self.known_versions:
+                    versions[entry[2]] = json.dumps(names)
+            with connection:
+                connection.executemany(
+                    "INSERT OR IGNORE INTO model_classes (model_version, class_names) VALUES (?, ?)", versions.items()
+                )
+                connection.executemany(
+                    "INSERT INTO predictions (logged_at, route, model_version, input_kind, input, predicted_type, "
+                    "confidence, probabilities) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+                )
+        except Exception as error:
+            # Keep the writer alive; the batch is lost and counted
+            self.write_errors += 1
+            self.last_error = str(error)
+            return
+        self.known_versions.update(versions)
+        self.written_records += len(rows)
+        self.batches += 1
+
+    def _run(self):
+        connection = connect(self.path)
+        stopping = False
+        while not stopping:
+            # Block for the first entry, then take whatever else is already queued
+            entries = [self.queue.get()]
+            records = 0 if entries[0] is _STOP else len(entries[0][5])
+            while records < self.batch_records:
+                try:
+                    entry = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                entries.append(entry)
+                if entry is not _STOP:
+                    records += len(entry[5])
+            stopping = any(entry is _STOP for entry in entries)
+            entries = [entry for entry in entries if entry is not _STOP]
+            if entries:
+                self._write(connection, entries)
+        connection.close()
+
+
+# =====================
+# Reading and replay
+# =====================
+def read_records(path=AUDIT_LOG_PATH, since=None, until=None, route=None, version=None, chunk_size=100000):
+    """Yield chunks of logged records as dicts of arrays, oldest first.
+
+    Each chunk has "id", "logged_at", "route", "model_version",
+    "predicted_type", "confidence", "input_kind" and "input": an (n, 9)
+    uint8 code or float32 property array per input kind present.
+    `since` / `until` are Unix timestamps.
+    """
+    clauses, params = [], []
+    for clause, value in (("logged_at >= ?", since), ("logged_at < ?", until), ("route = ?", route),
+                          ("model_version = ?", version)):
+        if value is not None:
+            clauses.append(clause)
+            params.append(value)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    connection = sqlite3.connect(path)
+    try:
+        cursor = connection.execute(
+            "SELECT id, logged_at, route, model_version, predicted_type, confidence, input_kind, input "
+            f"FROM predictions {where} ORDER BY id", params
+        )
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            ids, logged_at, routes, versions, types, confidences, kinds, inputs = zip(*rows)
+            yield {
+                "id": np.array(ids, dtype=np.int64),
+                "logged_at": np.array(logged_at, dtype=np.float64),
+                "route": list(routes),
+                "model_version": list(versions),
+                "predicted_type": list(types),
+                "confidence": np.array(confidences, dtype=np.float64),
+                "input_kind": list(kinds),
+                # One contiguous buffer per chunk, viewed as a matrix without per-value Python objects
+                "input": {
+                    kind: np.frombuffer(b"".join(blob for k, blob in zip(kinds, inputs) if k == kind),
+                                        dtype=np.uint8 if kind == CODES else np.float32
+                                        ).reshape(-1, len(CLUSTER_COLUMNS))
+                    for kind in set(kinds)
+                },
+            }
+    finally:
+        connection.close()
+
+
+def encode_logged_inputs(feature_schema, input_kind, inputs):
+    """One-hot encode logged codes or raw properties; UNKNOWN_CODE levels leave their group empty like `encode`."""
+    if input_kind == PROPERTIES:
+        return feature_schema.encode_properties(inputs)
+    unknown = inputs >= len(feature_schema.levels)
+    X = feature_schema.encode_codes(np.where(unknown, 0, inputs))
+    rows, columns = np.nonzero(unknown)
+    features = feature_schema.code_index[columns, 0]
+    X[rows[features >= 0], features[features >= 0]] = 0.0
+    return X
+
+
+def replay(artifacts, path=AUDIT_LOG_PATH, since=None, until=None, route=None, version=None, chunk_size=100000):
+    """Re-score logged inputs with `artifacts` in chunks; yield (chunk, new class indices, new probabilities).
+
+    Rows of each chunk are scored grouped by input kind, in one forward pass per kind.
+    """
+    for chunk in read_records(path, since, until, route, version, chunk_size):
+        kinds = np.array(chunk["input_kind"])
+        class_idx = np.empty(len(kinds), dtype=np.int64)
+        probabilities = np.empty((len(kinds), len(artifacts.class_names)), dtype=np.float32)
+        for kind, inputs in chunk["input"].items():
+            rows = np.flatnonzero(kinds == kind)
+            probabilities[rows] = artifacts.predict_probabilities(
+                encode_logged_inputs(artifacts.feature_schema, kind, inputs)
+            )
+            class_idx[rows] = np.argmax(probabilities[rows], axis=1)
+        yield chunk, class_idx, probabilities
+
+
+def parse_time(value):
+    return None if value is None else datetime.fromisoformat(value).timestamp()
+
+
+def main(args):
+    import csv
+    from utils.loaders import load_serving_artifacts
+
+    artifacts = load_serving_artifacts(directory=args.version_dir)
+    class_names = [str(name) for name in artifacts.class_names]
+    total, changed, start = 0, 0, time.perf_counter()
+    writer, output = None, None
+    if args.output:
+        output = open(args.output, "w", newline="")
+        writer = csv.writer(output)
+        writer.writerow(["id", "logged_at", "route", "logged_version", "logged_type", "logged_confidence",
+                         "replayed_type", "replayed_confidence"])
+    try:
+        for chunk, class_idx, probabilities in replay(
+            artifacts, args.db, parse_time(args.since), parse_time(args.until), args.route, args.version,
+            args.chunk_size
+        ):
+            replayed = [class_names[k] for k in class_idx.tolist()]
+            differs = [i for i, name in enumerate(replayed) if name != chunk["predicted_type"][i]]
+            total += len(replayed)
+            changed += len(differs)
+            if writer is not None:
+                confidences = probabilities[np.arange(len(class_idx)), class_idx]
+                writer.writerows(
+                    (chunk["id"][i], datetime.fromtimestamp(chunk["logged_at"][i]).isoformat(), chunk["route"][i],
+                     chunk["model_version"][i], chunk["predicted_type"][i], round(chunk["confidence"][i] * 100, 2),
+                     replayed[i], round(float(confidences[i]) * 100, 2))
+                    for i in differs
+                )
+    finally:
+        if output is not None:
+            output.close()
+    elapsed = time.perf_counter() - start
+    print(f"Replayed {total} logged predictions with version {artifacts.version} in {elapsed:.2f} s "
+          f"({total / elapsed if elapsed else 0:,.0f} rows/s)")
+    print(f"Changed type: {changed} ({changed / total if total else 0:.2%})")
+    if args.output:
+        print(f"Wrote changed predictions to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay logged predictions through a model version")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    replay_parser = subparsers.add_parser("replay", help="Re-score logged inputs and report changed predictions")
+    replay_parser.add_argument("--db", default=AUDIT_LOG_PATH, help="Audit log database")
+    replay_parser.add_argument("--version-dir", help="Published version to replay with (default: models/)")
+    replay_parser.add_argument("--since", help="Only records logged at or after this ISO date/time")
+    replay_parser.add_argument("--until", help="Only records logged before this ISO date/time")
+    replay_parser.add_argument("--route", help="Only records from this route, e.g. /predict")
+    replay_parser.add_argument("--version", help="Only records served by this model version")
+    replay_parser.add_argument("--chunk-size", type=int, default=100000)
+    replay_parser.add_argument("--output", help="CSV of the records whose predicted type changed")
+    main(parser.parse_args())
@@ -0,0 +1,175 @@
+import json
+import numpy as np
+
+# Raw little-endian array body: a 16-byte header followed by the row-major array
+MEDIA_TYPE = "application/x-geotextile-array"
+# Arrow IPC stream body (needs pyarrow)
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+JSON_MEDIA_TYPE = "application/json"
+
+MAGIC = b"GTXA"
+FORMAT_VERSION = 1
+HEADER = np.dtype([
+    ("magic", "S4"), ("version", "u1"), ("kind", "u1"), ("reserved", "<u2"), ("rows", "<u4"), ("columns", "<u4")
+])
+
+# Array kinds and their element types
+CODES = 1          # uint8 cluster codes (0 = C1 ... 4 = C5), cluster column order
+PROPERTIES = 2     # float32 raw property values, property column order
+PROBABILITIES = 3  # float32 calibrated probabilities, class order (responses)
+KIND_DTYPES = {CODES: np.dtype(np.uint8), PROPERTIES: np.dtype("<f4"), PROBABILITIES: np.dtype("<f4")}
+
+
+def encode_array(kind, array):
+    """Header + row-major bytes of a 2-D array of the given kind."""
+    array = np.ascontiguousarray(array, dtype=KIND_DTYPES[kind])
+    header = np.zeros((), dtype=HEADER)
+    header["magic"], header["version"], header["kind"] = MAGIC, FORMAT_VERSION, kind
+    header["rows"], header["columns"] = array.shape
+    return header.tobytes() + array.tobytes()
+
+
+def decode_array(body):
+    """(kind, array) view of a body written by `encode_array`, without copying the data.
+
+    Raises ValueError for a malformed body.
+    """
+    if len(body) < HEADER.itemsize:
+        raise ValueError(f"Body is shorter than the {HEADER.itemsize}-byte header")
+    header = np.frombuffer(body, dtype=HEADER, count=1)[0]
+    if header["magic"] != MAGIC or header["version"] != FORMAT_VERSION:
+        raise ValueError(f"Not a version {FORMAT_VERSION} {MEDIA_TYPE} body")
+    kind = int(header["kind"])
+    if kind not in KIND_DTYPES:
+        raise ValueError(f"Unknown array kind: {kind}")
+    rows, columns = int(header["rows"]), int(header["columns"])
+    dtype = KIND_DTYPES[kind]
+    if len(body) != HEADER.itemsize + rows * columns * dtype.itemsize:
+        raise ValueError(f"Body size does not match a {rows} x {columns} {dtype} array")
+    return kind, np.frombuffer(body, dtype=dtype, count=rows * columns, offset=HEADER.itemsize).reshape(rows, columns)
+
+
+def read_arrow(body, cluster_columns, property_columns):
+    """(kind, array) from an Arrow IPC stream with one column per cluster (codes) or per property.
+
+    Codes must be integer columns and properties numeric ones, without
+    nulls. Each column is cast safely, so a code that does not fit uint8 is
+    rejected instead of wrapping around. Raises ImportError without pyarrow
+    and ValueError for other columns, types, nulls or out-of-range values.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    table = pa.ipc.open_stream(body).read_all()
+    names = set(table.column_names)
+    if names == set(cluster_columns):
+        kind, columns = CODES, cluster_columns
+    elif names == set(property_columns):
+        kind, columns = PROPERTIES, property_columns
+    else:
+        raise ValueError("Arrow columns must be exactly the cluster columns or the property columns")
+    target = pa.uint8() if kind == CODES else pa.float32()
+    # Columnar -> row-major: one copy per column, no per-row Python objects
+    array = np.empty((table.num_rows, len(columns)), dtype=KIND_DTYPES[kind])
+    for j, column in enumerate(columns):
+        values = table.column(column)
+        if values.null_count:
+            raise ValueError(f"Arrow column {column!r} has {values.null_count} null values")
+        if not (pa.types.is_integer(values.type) or (kind == PROPERTIES and pa.types.is_floating(values.type))):
+            expected = "integer cluster codes" if kind == CODES else "numeric"
+            raise ValueError(f"Arrow column {column!r} must be {expected}, not {values.type}")
+        # Checked in the source type: 256 or -1 raises instead of wrapping to another code
+        try:
+            values = pc.cast(values, target, safe=True)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as error:
+            raise ValueError(f"Arrow column {column!r}: {error}")
+        array[:, j] = values.to_numpy()
+    return kind, array
+
+
+def write_arrow(class_names, probabilities):
+    """Arrow IPC stream with the predicted type, confidence (%) and one float32 probability column per class."""
+    import pyarrow as pa
+
+    class_idx = np.argmax(probabilities, axis=1)
+    columns = {
+        "predicted_type": pa.DictionaryArray.from_arrays(
+            pa.array(class_idx.astype(np.int32)), pa.array([str(name) for name in class_names])
+        ),
+        "confidence": pa.array(probabilities[np.arange(len(class_idx)), class_idx] * 100),
+        **{str(name): pa.array(probabilities[:, i]) for i, name in enumerate(class_names)},
+    }
+    table = pa.table(columns)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def parse_accept(accept):
+    """(media_range, q) pairs of an Accept header; ranges with a malformed q are ignored."""
+    ranges = []
+    for media_range in (accept or "").split(","):
+        media_type, *params = media_range.split(";")
+        media_type = media_type.strip().lower()
+        if not media_type:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = None
+        if q is not None and 0 <= q <= 1:
+            ranges.append((media_type, q))
+    return ranges
+
+
+def range_specificity(media_range, media_type):
+    """2 for an exact match, 1 for type/*, 0 for */*, None if the range does not match."""
+    if media_range == media_type:
+        return 2
+    if media_range == media_type.split("/")[0] + "/*":
+        return 1
+    if media_range == "*/*":
+        return 0
+    return None
+
+
+def negotiate(accept, supported=(MEDIA_TYPE, ARROW_MEDIA_TYPE, JSON_MEDIA_TYPE)):
+    """Response media type for an Accept header, or None if nothing acceptable is supported.
+
+    Each supported type takes the q of the most specific range matching it
+    (type/subtype over type/* over */*) and the highest q > 0 wins; ties go
+    to the more specific range, then the one listed first, then JSON, so
+    `*/*` gets JSON. With no Accept header, or none of the supported types
+    matched, the response is JSON unless JSON is explicitly excluded (q=0).
+    """
+    ranges = parse_accept(accept)
+    if not ranges:
+        return JSON_MEDIA_TYPE
+    best, best_key, json_excluded = None, None, False
+    for media_type in supported:
+        match = None
+        for position, (media_range, q) in enumerate(ranges):
+            specificity = range_specificity(media_range, media_type)
+            if specificity is not None and (match is None or specificity > match[1]):
+                match = (q, specificity, -position)
+        if match is None:
+            continue
+        if match[0] == 0:
+            json_excluded = json_excluded or media_type == JSON_MEDIA_TYPE
+            continue
+        key = (*match, media_type == JSON_MEDIA_TYPE)
+        if best_key is None or key > best_key:
+            best, best_key = media_type, key
+    if best is None and not json_excluded:
+        return JSON_MEDIA_TYPE
+    return best
+
+
+def class_names_header(class_names):
+    """Class order of a binary probabilities response, as a JSON list for a response header."""
+    return json.dumps([str(name) for name in class_names])
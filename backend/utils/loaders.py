@@ -1,7 +1,18 @@
+import os
+import json
+import hashlib
+import time
 import numpy as np
-import tensorflow as tf
 import joblib
-from tensorflow.keras.models import load_model
+from utils.versions import artifact_path
+from utils.uncertainty import predictive_uncertainty
+from dataset.constants import (
+    INFERENCE_BACKEND, SHARED_ARTIFACTS, SERVING_BUNDLE_PATH, MODEL_SAVE_PATH, NUMPY_WEIGHTS_PATH, FEATURE_SCHEMA_PATH,
+    QUANTIZED_WEIGHTS_PATHS, TYPE_COSTS_PATH, PREDICTION_TABLE, PREDICTION_TABLE_PATH, PREDICTION_TABLE_META_PATH,
+    SIMILARITY_INDEX, SIMILARITY_INDEX_PATH, UNCERTAINTY_SAMPLES,
+    CLASS_NAMES_PATH, SCALER_PATH, PLATT_PARAMS_PATH, VAL_LOGITS_PATH, VAL_LABELS_PATH
+)
+
 
 class ModelLoader:
     def __init__(self, model_path, encoder_path=None):
@@ -10,8 +21,181 @@ class ModelLoader:
 
     def load(self):
         """Load trained model and optional encoder."""
+        from tensorflow.keras.models import load_model
+
         model = load_model(self.model_path)
         encoder = None
         if self.encoder_path:
             encoder = joblib.load(self.encoder_path)
         return model, encoder
+
+
+def load_inference_model(num_classes, backend=INFERENCE_BACKEND, directory=None):
+    """Load the trained ANN with the configured inference backend.
+
+    The "numpy" backend never imports TensorFlow; "keras" loads the full model;
+    "int8" and "float16" run the NumPy forward pass over quantized weights.
+    All expose `predict_with_platt_scaling` and `load_platt_scaling`.
+    """
+    if backend == "numpy":
+        from models.numpy_ann import NumpyANN
+
+        model = NumpyANN(num_classes=num_classes)
+        model.load_model(artifact_path(NUMPY_WEIGHTS_PATH, directory))
+    elif backend == "keras":
+        from models.ann_model import ANNModel
+
+        model = ANNModel(input_dim=None, num_classes=num_classes)
+        model.load_model(artifact_path(MODEL_SAVE_PATH, directory))
+    elif backend in QUANTIZED_WEIGHTS_PATHS:
+        from models.quantized_ann import QuantizedANN
+
+        model = QuantizedANN(num_classes=num_classes)
+        model.load_model(artifact_path(QUANTIZED_WEIGHTS_PATHS[backend], directory))
+    else:
+        raise ValueError(f"Unknown inference backend: {backend!r}")
+    return model
+
+
+def artifact_hash(paths):
+    """Short SHA-256 over the contents of the given artifact files."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+class ServingArtifacts:
+    """Everything the API needs to score requests, loaded from training artifacts."""
+
+    def __init__(self, feature_schema, scaler, class_names, model, version=None, directory=None, type_costs=None,
+                 prediction_table=None, similarity_index=None):
+        self.feature_schema = feature_schema
+        self.scaler = scaler
+        self.class_names = class_names
+        self.model = model
+        # Per-type cost statistics for /recommend (None if type_costs.json is missing)
+        self.type_costs = type_costs
+        # Precomputed predictions for every cluster combination (None unless built for this version)
+        self.prediction_table = prediction_table
+        # Nearest-catalog-row index (None unless enabled and built)
+        self.similarity_index = similarity_index
+        # Published version name, or content hash of the top-level artifacts
+        self.version = version
+        # Version directory the artifacts came from (None for models/)
+        self.directory = directory
+
+    def predict_probabilities(self, X_input, observe=None):
+        """Scale an encoded (n, num_features) batch and return calibrated class probabilities.
+
+        If given, `observe(stage, seconds)` is called with the time spent in
+        the "scale", "forward" and "calibrate" stages.
+        """
+        if observe is None:
+            return self.model.predict_with_platt_scaling(self.scaler.transform(X_input))
+        start = time.perf_counter()
+        X_scaled = self.scaler.transform(X_input)
+        scaled = time.perf_counter()
+        logits = self.model.predict_logits(X_scaled)
+        forwarded = time.perf_counter()
+        probabilities = self.model.calibrator.transform(logits)
+        observe("scale", scaled - start)
+        observe("forward", forwarded - scaled)
+        observe("calibrate", time.perf_counter() - forwarded)
+        return probabilities
+
+    def predict_uncertainty(self, X_input, samples=UNCERTAINTY_SAMPLES, observe=None, rng=None):
+        """Monte Carlo dropout over an encoded batch: `samples` stochastic passes in one stacked forward.
+
+        Each pass is Platt-calibrated like `predict_probabilities`. Returns
+        (mean probabilities, predictive entropy, mutual information), see
+        utils/uncertainty.py. If given, `observe` gets the "uncertainty" stage time.
+        """
+        start = time.perf_counter()
+        logits = self.model.predict_logits_mc(self.scaler.transform(X_input), samples, rng)
+        probabilities = self.model.calibrator.transform(logits.reshape(-1, logits.shape[-1])).reshape(logits.shape)
+        result = predictive_uncertainty(probabilities)
+        if observe is not None:
+            observe("uncertainty", time.perf_counter() - start)
+        return result
+
+
+def load_serving_artifacts(backend=INFERENCE_BACKEND, shared=SHARED_ARTIFACTS, directory=None,
+                           prediction_table=PREDICTION_TABLE, similarity_index=SIMILARITY_INDEX):
+    """Load schema, scaler, class names, model and calibration written by train.py.
+
+    Nothing here reads the training CSV, so serving only needs the models/ directory.
+    With `shared`, everything is mapped read-only from the serving bundle instead,
+    so all worker processes on a node share one physical copy of the arrays
+    (the bundle is always served by the NumPy engine). `directory` loads a
+    published version (see utils/versions.py), whose name becomes the version.
+    With `prediction_table`, the precomputed table is memory-mapped if it was
+    built from these exact artifacts (same version); otherwise it is ignored.
+    With `similarity_index`, the nearest-neighbor index over the catalog is
+    memory-mapped too.
+    """
+    def path(default):
+        return artifact_path(default, directory)
+
+    def load_type_costs(class_names):
+        from preprocessors.type_costs import TypeCosts
+
+        return TypeCosts.load(path(TYPE_COSTS_PATH), class_names) if os.path.exists(path(TYPE_COSTS_PATH)) else None
+
+    def load_prediction_table(version):
+        if not prediction_table or not os.path.exists(path(PREDICTION_TABLE_META_PATH)):
+            return None
+        from models.prediction_table import PredictionTable
+
+        table = PredictionTable.load(path(PREDICTION_TABLE_PATH), path(PREDICTION_TABLE_META_PATH))
+        # A table built from other weights would silently serve stale predictions
+        return table if table.version == version else None
+
+    def load_similarity_index():
+        if not similarity_index or not os.path.exists(path(SIMILARITY_INDEX_PATH)):
+            return None
+        from models.similarity_index import SimilarityIndex
+
+        return SimilarityIndex.load(path(SIMILARITY_INDEX_PATH))
+
+    if shared:
+        from models.serving_bundle import load_serving_bundle
+
+        model, scaler, feature_schema, class_names = load_serving_bundle(path(SERVING_BUNDLE_PATH))
+        version = os.path.basename(directory) if directory else artifact_hash([SERVING_BUNDLE_PATH])
+        return ServingArtifacts(
+            feature_schema, scaler, class_names, model, version, directory, load_type_costs(class_names),
+            load_prediction_table(version), load_similarity_index()
+        )
+
+    from preprocessors.feature_schema import FeatureSchema
+    from scalers.scaler import DataScaler
+
+    feature_schema = FeatureSchema.load(path(FEATURE_SCHEMA_PATH))
+
+    scaler = DataScaler()
+    scaler.load(path(SCALER_PATH))
+
+    with open(path(CLASS_NAMES_PATH), "r") as f:
+        class_names = json.load(f)
+
+    model = load_inference_model(len(class_names), backend, directory)
+    # Platt scaling fitted at training time (fall back to fitting on validation data)
+    if os.path.exists(path(PLATT_PARAMS_PATH)):
+        model.load_platt_scaling(path(PLATT_PARAMS_PATH))
+        calibration_paths = [path(PLATT_PARAMS_PATH)]
+    else:
+        model.fit_platt_scaling(np.load(path(VAL_LOGITS_PATH)), np.load(path(VAL_LABELS_PATH)))
+        calibration_paths = [path(VAL_LOGITS_PATH), path(VAL_LABELS_PATH)]
+
+    if directory:
+        version = os.path.basename(directory)
+    else:
+        model_path = {"numpy": NUMPY_WEIGHTS_PATH, "keras": MODEL_SAVE_PATH, **QUANTIZED_WEIGHTS_PATHS}[backend]
+        version = artifact_hash([model_path, *calibration_paths, SCALER_PATH, FEATURE_SCHEMA_PATH])
+    return ServingArtifacts(
+        feature_schema, scaler, class_names, model, version, directory, load_type_costs(class_names),
+        load_prediction_table(version), load_similarity_index()
+    )
@@ -0,0 +1,190 @@
+import bisect
+import os
+import threading
+import time
+import numpy as np
+
+# Upper bounds (seconds) of the latency histogram buckets, from 10 µs to 5 s
+LATENCY_BUCKETS = (
+    1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+    1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0
+)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    """Prometheus label set, e.g. {stage="forward"}; empty string without labels."""
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Counter:
+    """Monotonic counter, one series per label tuple."""
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            values = sorted(self.values.items())
+        for labels, value in values:
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram, one series per label tuple.
+
+    `observe` only bisects into a fixed bucket list and bumps two counters, so
+    it is cheap enough to call several times per request.
+    """
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, labels=()):
+        bucket = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bucket] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            series = sorted((labels, (list(counts), total, count)) for labels, (counts, total, count) in self.series.items())
+        for labels, (counts, total, count) in series:
+            cumulative = 0
+            for upper, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                le = _labels(self.labelnames + ("le",), labels + (upper if upper == "+Inf" else repr(float(upper)),))
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total!r}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+def resident_memory_bytes():
+    """Current RSS of this process from /proc, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class ServingMetrics:
+    """Per-process latency, prediction and memory metrics of the API.
+
+    Stage timings come from `ServingArtifacts.predict_probabilities` (scale,
+    forward, calibrate), `ServingArtifacts.predict_uncertainty` (uncertainty)
+    and from the endpoints (encode, lookup, similar, serialize); request latency comes from `MetricsMiddleware`. `render`
+    returns the Prometheus text exposition format. Each uvicorn worker keeps its own counters.
+    """
+
+    def __init__(self):
+        self.stage_seconds = Histogram(
+            "geotextile_stage_duration_seconds", "Time spent in each prediction pipeline stage.", ("stage",)
+        )
+        self.request_seconds = Histogram(
+            "geotextile_request_duration_seconds", "End-to-end request latency.", ("route", "method", "status")
+        )
+        self.predictions = Counter(
+            "geotextile_predictions_total", "Rows scored, by predicted type.", ("type",)
+        )
+        self.started = time.time()
+
+    def observe_stage(self, stage, seconds):
+        self.stage_seconds.observe(seconds, (stage,))
+
+    def count_predictions(self, class_names, class_indices):
+        """Count predicted types from an array of argmax class indices."""
+        counts = np.bincount(np.asarray(class_indices).reshape(-1), minlength=len(class_names))
+        for class_idx in np.flatnonzero(counts).tolist():
+            self.predictions.inc((str(class_names[class_idx]),), int(counts[class_idx]))
+
+    def render(self, version, cache_stats=None):
+        lines = [
+            "# HELP geotextile_model_info Served model version.",
+            "# TYPE geotextile_model_info gauge",
+            f"geotextile_model_info{_labels(('version',), (version,))} 1",
+        ]
+        lines += self.stage_seconds.render()
+        lines += self.request_seconds.render()
+        lines += self.predictions.render()
+        if cache_stats is not None:
+            for name in ("hits", "misses"):
+                lines += [
+                    f"# HELP geotextile_prediction_cache_{name}_total Prediction cache {name}.",
+                    f"# TYPE geotextile_prediction_cache_{name}_total counter",
+                    f"geotextile_prediction_cache_{name}_total {cache_stats[name]}",
+                ]
+        rss = resident_memory_bytes()
+        if rss is not None:
+            lines += [
+                "# HELP process_resident_memory_bytes Resident memory size in bytes.",
+                "# TYPE process_resident_memory_bytes gauge",
+                f"process_resident_memory_bytes {rss}",
+            ]
+        lines += [
+            "# HELP process_start_time_seconds Start time of the process since unix epoch in seconds.",
+            "# TYPE process_start_time_seconds gauge",
+            f"process_start_time_seconds {self.started!r}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording the latency of every HTTP request.
+
+    Requests are labelled with the matched route template (not the raw path),
+    so unknown URLs collapse into one "unmatched" series.
+    """
+
+    def __init__(self, app, metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            self.metrics.request_seconds.observe(
+                time.perf_counter() - start,
+                (getattr(route, "path", "unmatched"), scope["method"], str(status[0]))
+            )
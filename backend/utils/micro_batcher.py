@@ -0,0 +1,130 @@
+import asyncio
+import time
+import numpy as np
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-row predictions into one batched forward pass.
+
+    Requests are queued; a background task collects up to `max_batch_size`
+    rows or waits at most `max_wait_ms` after the first one, runs `predict_fn`
+    once on the stacked batch (in a worker thread) and resolves each caller's
+    future with its own row of the result. Each row carries the context it was
+    encoded with (e.g. the serving artifacts); rows are only stacked with rows
+    of the same context, and `predict_fn(rows, context)` gets it back.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=2.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = None
+        self.task = None
+        self.in_flight = []
+
+        # Batch sizes are counted in power-of-two buckets: 1, 2, 4, ... max_batch_size
+        self.batch_size_buckets = [1]
+        while self.batch_size_buckets[-1] < max_batch_size:
+            self.batch_size_buckets.append(min(self.batch_size_buckets[-1] * 2, max_batch_size))
+        self.batch_size_counts = [0] * len(self.batch_size_buckets)
+        self.batches = 0
+        self.items = 0
+        self.total_wait = 0.0
+        self.max_wait_seen = 0.0
+
+    async def start(self):
+        """Start the background batching task on the running event loop."""
+        self.queue = asyncio.Queue()
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop batching and fail any requests still queued."""
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        pending = list(self.in_flight)
+        while self.queue is not None and not self.queue.empty():
+            pending.append(self.queue.get_nowait())
+        for _, future, _, _ in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("Micro-batcher stopped"))
+        self.in_flight = []
+
+    async def submit(self, row, context=None):
+        """Queue one encoded (1, num_features) row and wait for its predictions."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((row, future, time.perf_counter(), context))
+        return await future
+
+    async def _collect(self):
+        """Wait for the first request, then gather more until the batch is full or the deadline passes."""
+        batch = [await self.queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = self.in_flight = await self._collect()
+            dispatched = time.perf_counter()
+            self._record(batch, dispatched)
+
+            # Stack rows per context (normally all share one)
+            groups = {}
+            for item in batch:
+                groups.setdefault(id(item[3]), []).append(item)
+            for items in groups.values():
+                rows = np.concatenate([row for row, _, _, _ in items], axis=0)
+                try:
+                    predictions = await asyncio.to_thread(self.predict_fn, rows, items[0][3])
+                except Exception as exc:
+                    for _, future, _, _ in items:
+                        if not future.done():
+                            future.set_exception(exc)
+                    continue
+                for i, (_, future, _, _) in enumerate(items):
+                    if not future.done():
+                        future.set_result(predictions[i])
+
+    def _record(self, batch, dispatched):
+        size = len(batch)
+        self.batches += 1
+        self.items += size
+        for bucket, upper in enumerate(self.batch_size_buckets):
+            if size <= upper:
+                self.batch_size_counts[bucket] += 1
+                break
+        for _, _, enqueued, _ in batch:
+            wait = dispatched - enqueued
+            self.total_wait += wait
+            self.max_wait_seen = max(self.max_wait_seen, wait)
+
+    def stats(self):
+        """Queue depth, batch-size histogram and queueing wait times."""
+        return {
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "batch_size_histogram": {
+                f"le_{upper}": count for upper, count in zip(self.batch_size_buckets, self.batch_size_counts)
+            },
+            "mean_wait_ms": self.total_wait / self.items * 1000 if self.items else 0.0,
+            "max_wait_ms": self.max_wait_seen * 1000
+        }
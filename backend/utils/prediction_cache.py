@@ -0,0 +1,96 @@
+import threading
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """Thread-safe LRU cache of calibrated probabilities keyed on the encoded cluster vector.
+
+    Keys are the canonical tuple of active one-hot feature indices (see
+    `FeatureSchema.cache_key`). Every lookup carries the serving artifacts'
+    version. The cache adopts the first version it sees; `reset` switches to a
+    new one and drops all entries, after which lookups and stores for any other
+    version (e.g. requests still in flight on a swapped-out model) are ignored.
+    Entries added with `preload` are pinned and never evicted.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.version = None
+        self.entries = OrderedDict()
+        self.pinned = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def _check_version(self, version):
+        """True if `version` is the cached one. Called with the lock held."""
+        if self.version is None:
+            self.version = version
+        return version == self.version
+
+    def get(self, version, key):
+        """Return cached probabilities for `key`, or None on a miss."""
+        with self.lock:
+            if not self._check_version(version):
+                self.misses += 1
+                return None
+            value = self.pinned.get(key)
+            if value is None:
+                value = self.entries.get(key)
+                if value is not None:
+                    self.entries.move_to_end(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def put(self, version, key, value):
+        """Store probabilities for `key`, evicting the least recently used entry if full."""
+        if self.max_size <= 0:
+            return
+        with self.lock:
+            if not self._check_version(version) or key in self.pinned:
+                return
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def preload(self, version, keys, values):
+        """Pin precomputed probabilities for many keys (e.g. every training combination)."""
+        with self.lock:
+            if not self._check_version(version):
+                return
+            for key, value in zip(keys, values):
+                self.pinned[key] = value
+                self.entries.pop(key, None)
+
+    def reset(self, version):
+        """Switch to a new artifacts version, dropping every entry of the old one."""
+        with self.lock:
+            self.entries.clear()
+            self.pinned.clear()
+            self.version = version
+
+    def clear(self):
+        """Drop all entries and reset the counters."""
+        with self.lock:
+            self.entries.clear()
+            self.pinned.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Hit/miss counters and current occupancy."""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "version": self.version,
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "pinned": len(self.pinned),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,43 @@
+import numpy as np
+
+
+def perturbation_codes(codes, num_levels):
+    """The input's cluster codes followed by every single-column change of them.
+
+    Returns (matrix, columns, levels): an (1 + num_columns * (num_levels - 1),
+    num_columns) code matrix whose row 0 is the unchanged input, and for rows
+    1.. the changed column position and its new level code. All rows are
+    scored together in one forward pass.
+    """
+    codes = np.asarray(codes, dtype=np.int64).reshape(-1)
+    num_columns = len(codes)
+    columns = np.repeat(np.arange(num_columns), num_levels - 1)
+    # Every level except the current one, column by column
+    all_levels = np.broadcast_to(np.arange(num_levels), (num_columns, num_levels))
+    levels = all_levels[all_levels != codes[:, None]]
+    matrix = np.tile(codes, (1 + len(columns), 1))
+    matrix[1 + np.arange(len(columns)), columns] = levels
+    return matrix, columns, levels
+
+
+def analyze_perturbations(probabilities, codes, columns, levels):
+    """Probability deltas, predicted classes and the smallest flip of scored `perturbation_codes` rows.
+
+    Returns (deltas, classes, steps, smallest): per perturbation the change
+    of every class probability from the input's, the predicted class and
+    how many levels the column moved; `smallest` is the perturbation that
+    changes the predicted class with the fewest level steps (the most
+    confident new prediction among ties), or None if none does.
+    """
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    base, perturbed = probabilities[0], probabilities[1:]
+    deltas = perturbed - base
+    classes = np.argmax(perturbed, axis=1)
+    steps = np.abs(levels - np.asarray(codes, dtype=np.int64).reshape(-1)[columns])
+
+    flips = np.flatnonzero(classes != np.argmax(base))
+    smallest = None
+    if flips.size:
+        order = np.lexsort((-perturbed[flips, classes[flips]], steps[flips]))
+        smallest = int(flips[order[0]])
+    return deltas, classes, steps, smallest
@@ -0,0 +1,28 @@
+import numpy as np
+
+# Floor for log(p) so zero probabilities contribute 0 * log(eps) = 0
+_EPS = 1e-12
+
+
+def entropy(probabilities):
+    """Entropy in nats along the last axis."""
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    return -np.sum(probabilities * np.log(np.maximum(probabilities, _EPS)), axis=-1)
+
+
+def predictive_uncertainty(probabilities):
+    """Summarize (samples, n, num_classes) stochastic predictions of the same n inputs.
+
+    Returns (mean, predictive_entropy, mutual_information): the (n,
+    num_classes) mean probabilities, the entropy of that mean (total
+    uncertainty) and its part that comes from disagreement between samples
+    (entropy of the mean minus the mean per-sample entropy). Mutual
+    information is near 0 where the model is consistent, whatever the
+    class, and grows on inputs unlike the training data. Both are in nats;
+    the maximum is log(num_classes).
+    """
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    mean = probabilities.mean(axis=0)
+    total = entropy(mean)
+    mutual_information = np.maximum(total - entropy(probabilities).mean(axis=0), 0.0)
+    return mean, total, mutual_information
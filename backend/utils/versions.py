@@ -0,0 +1,43 @@
+import os
+import time
+from dataset.constants import MODEL_VERSIONS_DIR
+
+LATEST_POINTER = "LATEST"
+
+
+def artifact_path(path, directory=None):
+    """Path of an artifact inside a version directory (same file name), or the default path."""
+    return os.path.join(directory, os.path.basename(path)) if directory else path
+
+
+def current_version(versions_dir=MODEL_VERSIONS_DIR):
+    """Name of the published version, or None if nothing has been published."""
+    try:
+        with open(os.path.join(versions_dir, LATEST_POINTER), "r") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def current_version_dir(versions_dir=MODEL_VERSIONS_DIR):
+    """Directory of the published version, or None to serve the top-level models/ artifacts."""
+    version = current_version(versions_dir)
+    return os.path.join(versions_dir, version) if version else None
+
+
+def new_version_dir(suffix, versions_dir=MODEL_VERSIONS_DIR):
+    """Create an empty directory for a new version named by UTC time and `suffix`."""
+    version = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{suffix}"
+    path = os.path.join(versions_dir, version)
+    os.makedirs(path)
+    return path
+
+
+def publish_version(version_dir, versions_dir=MODEL_VERSIONS_DIR):
+    """Point LATEST at a fully written version directory (atomic rename)."""
+    tmp_path = os.path.join(versions_dir, LATEST_POINTER + ".tmp")
+    with open(tmp_path, "w") as f:
+        f.write(os.path.basename(os.path.normpath(version_dir)))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(versions_dir, LATEST_POINTER))